@@ -4,198 +4,3537 @@ Portable forensic notary: SHA-256 -> Merkle tree -> GPG -> OpenTimestamps
 
 Usage:
     asi-omega audit <path>          Audit a folder
+        --jobs N                    Hash with N parallel workers (default: auto)
+        --backend serial|thread|process|async
+                                    Hashing backend (default: thread;
+                                    process suits many tiny files, async
+                                    high-latency SMB/NFS mounts)
+        --incremental               Only rehash new or changed files
+        --binary-manifest           Also write manifest.bin (mmap, fast lookup)
+        --io readinto|read|mmap|auto
+                                    File read strategy (default: readinto)
+        --block-size BYTES          Read block size (default: 1 MiB)
+        --no-fadvise                Skip page cache hints (POSIX only)
+        --profile                   Time each phase; adds "metrics" to dod.json
+        --profile-out FILE          Also write the metrics JSON to FILE
+        --events jsonl              Progress events as JSON lines on stderr
+        --events-out FILE           Append the events to FILE instead
+        --shard top|N               One Merkle subtree per top-level folder
+                                    (or per N files); root of shard roots
+        --only-shard NAME...        Rescan only these top-level folders,
+                                    keeping the other shards (implies top)
+        --reflinks                  Also read reflinked (CoW) copies once;
+                                    hardlinks are always hashed once
+    asi-omega audit-many <list|glob|path>...
+                                    Audit many folders on one hashing pool
+                                    (a file argument lists one folder or
+                                    glob per line); each gets .asi-omega/
+        --jobs N                    Shared hashing threads (default: auto)
+        --per-device N              Max reads at once per device (default: 4)
+        --parallel N                Targets in progress at once (default: 4)
+        --incremental, --binary-manifest, --shard top|N, --reflinks, --io S, ...
+                                    As for audit
+        --events jsonl, --events-out FILE
+                                    Progress events, with "target" added
+        --summary-out FILE          Write the roots summary as JSON
     asi-omega verify <path>         Verify files are unchanged
+        --quick                     Metadata check only (existence, size)
+        --check-mtime               Also warn about changed modification times
+        --only <glob|relpath>...    Verify only matching files (inclusion proofs)
+        --jobs N, --backend B       Hashing workers, as for audit
+        --io S, --block-size B, --no-fadvise
+                                    File read strategy, as for audit
+        --events jsonl, --events-out FILE
+                                    Progress events, as for audit
+        --only-shard NAME...        Sharded audits: verify only these shards
+        --workers URL...            Hash on 'asi-omega worker' processes
+        --token SECRET              Shared worker secret (or ASI_OMEGA_TOKEN)
+    asi-omega worker                Serve hashing for verify --workers
+        --root PATH...              Folders the worker may hash (required)
+        --host H, --port P          Listen address (default: 127.0.0.1:8765)
+        --jobs N, --backend B       Hashing workers, as for audit
+        --token SECRET              Require this secret (or ASI_OMEGA_TOKEN)
+        --map FROM=TO               Rewrite the coordinator's path prefix
+    asi-omega watch <path>          Report changes as they happen (inotify)
+        --poll                      Poll instead of inotify (default off Linux)
+        --interval SECONDS          Polling interval (default: 5)
+        --events jsonl, --events-out FILE
+                                    Change events, as for audit
+    asi-omega prove <path> <relpath>
+                                    Inclusion proof (JSON) for one file
+        --out FILE                  Write proof to FILE instead of stdout
+    asi-omega check-proof <proof.json>
+                                    Check an inclusion proof offline
+        --file FILE                 Also hash FILE and compare
+        --root HEX                  Also compare with a trusted Merkle root
     asi-omega report <path>         Show audit report
+    asi-omega bench [options]       Benchmark the pipeline (see bench.py)
     asi-omega dash                  Launch web dashboard
 """
+import asyncio
+import atexit
 import hashlib
 import csv
+import fnmatch
 import json
+import mmap
 import os
+import queue
+import shutil
+import stat
+import struct
 import sys
+import tempfile
+import threading
 import datetime
+import heapq
+import io
+import time
+from collections import deque
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor, as_completed, wait)
+from itertools import islice, zip_longest
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, NamedTuple, Optional
 
 
 # ─────────────────────────────────────────────────────
 # Crypto core — single source of truth
 # ─────────────────────────────────────────────────────
 
-def sha256_file(filepath: str) -> str:
+# Hashing I/O engine. Strategies:
+#   readinto  read into one reusable per-thread buffer (default)
+#   read      plain f.read() per block, allocating a bytes object each time
+#   mmap      map the whole file and hash it in one call; fastest on some
+#             storage, but a file truncated while mapped raises SIGBUS/crash
+#   auto      mmap for large files, readinto otherwise
+# With fadvise, POSIX systems get a SEQUENTIAL read-ahead hint and the
+# file's pages are dropped (DONTNEED) afterwards, so an audit does not
+# evict the page cache of everything else on the host.
+
+IO_STRATEGIES = ("readinto", "read", "mmap", "auto")
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+class HashIO(NamedTuple):
+    """How sha256_file() reads files. Picklable, so it reaches process workers."""
+    strategy: str = "readinto"
+    block_size: int = DEFAULT_BLOCK_SIZE
+    fadvise: bool = True
+
+
+DEFAULT_HASH_IO = HashIO()
+
+_buffers = threading.local()
+
+
+def _read_buffer(size: int) -> bytearray:
+    buf = getattr(_buffers, "buf", None)
+    if buf is None or len(buf) != size:
+        buf = _buffers.buf = bytearray(size)
+    return buf
+
+
+def _fadvise(fd: int, advice_name: str):
+    advice = getattr(os, advice_name, None)
+    if advice is not None and hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, advice)
+        except OSError:
+            pass
+
+
+def sha256_file(filepath: str, hash_io: Optional[HashIO] = None) -> str:
     """SHA-256 hash of a file (NIST FIPS 180-4). Returns lowercase hex."""
+    if hash_io is None:
+        hash_io = DEFAULT_HASH_IO
     h = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
+    with open(filepath, "rb", buffering=0) as f:
+        fd = f.fileno()
+        strategy = hash_io.strategy
+        if strategy in ("mmap", "auto"):
+            size = os.fstat(fd).st_size
+            if size == 0:
+                strategy = "readinto"
+            elif strategy == "auto":
+                strategy = "mmap" if size >= MMAP_THRESHOLD else "readinto"
+        if hash_io.fadvise:
+            _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+
+        if strategy == "mmap":
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                h.update(mm)
+        elif strategy == "read":
+            block_size = hash_io.block_size
+            for chunk in iter(lambda: f.read(block_size), b""):
+                h.update(chunk)
+        else:
+            buf = _read_buffer(hash_io.block_size)
+            view = memoryview(buf)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                h.update(view[:n])
+
+        if hash_io.fadvise:
+            _fadvise(fd, "POSIX_FADV_DONTNEED")
     return h.hexdigest()
 
 
-def sha256_bytes(data: bytes) -> str:
-    """SHA-256 hash of raw bytes. Returns lowercase hex."""
-    return hashlib.sha256(data).hexdigest()
+def sha256_bytes(data: bytes) -> str:
+    """SHA-256 hash of raw bytes. Returns lowercase hex."""
+    return hashlib.sha256(data).hexdigest()
+
+
+# ─────────────────────────────────────────────────────
+# RFC 6962 Merkle tree with domain separation
+# ─────────────────────────────────────────────────────
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def merkle_leaf(data: str) -> str:
+    """Hash a leaf: SHA-256(0x00 || data)"""
+    return sha256_bytes(LEAF_PREFIX + data.encode("utf-8"))
+
+
+def merkle_node(left: str, right: str) -> str:
+    """Hash an internal node: SHA-256(0x01 || left || right)"""
+    combined = NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)
+    return sha256_bytes(combined)
+
+
+# Binary engine: each level is one contiguous bytearray of 32-byte digests,
+# so building the tree never round-trips through hex strings. merkle_leaf()
+# and merkle_node() above remain the per-node definitions.
+
+DIGEST_SIZE = 32
+
+# Digests are produced in chunks and appended to the level buffer, which
+# bounds the temporary per-digest bytes objects to one chunk.
+_MERKLE_CHUNK = 65536
+
+
+def merkle_leaf_level(hashes: Iterable[str]) -> bytearray:
+    """
+    Leaf level as a contiguous buffer: SHA-256(0x00 || hex) per file hash.
+    hashes may be any iterable, e.g. streamed from the manifest.
+    """
+    sha = hashlib.sha256
+    level = bytearray()
+    it = iter(hashes)
+    while True:
+        chunk = list(islice(it, _MERKLE_CHUNK))
+        if not chunk:
+            return level
+        level += b"".join([sha(LEAF_PREFIX + h.encode("utf-8")).digest() for h in chunk])
+
+
+def merkle_parent_level(level) -> bytearray:
+    """
+    Hash one level into the next: SHA-256(0x01 || left || right) per pair.
+    An odd trailing node is promoted unchanged.
+    """
+    sha = hashlib.sha256
+    view = memoryview(level)
+    count = len(view) // DIGEST_SIZE
+    pair = 2 * DIGEST_SIZE
+    end = (count // 2) * pair
+    parent = bytearray()
+    for start in range(0, end, _MERKLE_CHUNK * pair):
+        stop = min(end, start + _MERKLE_CHUNK * pair)
+        parent += b"".join([sha(NODE_PREFIX + view[i:i + pair]).digest()
+                            for i in range(start, stop, pair)])
+    if count % 2:
+        parent += view[-DIGEST_SIZE:]
+    return parent
+
+
+def build_merkle_tree(hashes: list[str]) -> str:
+    """
+    Build RFC 6962 Merkle tree from a list of hex hash strings.
+    Returns the root hash. Raises ValueError if list is empty.
+    """
+    if not hashes:
+        raise ValueError("Cannot build Merkle tree from empty list")
+
+    # Leaf layer: apply domain separation
+    level = merkle_leaf_level(hashes)
+
+    # Build tree bottom-up, keeping only the current level in memory
+    while len(level) > DIGEST_SIZE:
+        level = merkle_parent_level(level)
+
+    return bytes(level).hex()
+
+
+def merkle_levels(hashes: Iterable[str]) -> list[bytearray]:
+    """All tree levels, leaves first and the 32-byte root last."""
+    levels = [merkle_leaf_level(hashes)]
+    if not levels[0]:
+        raise ValueError("Cannot build Merkle tree from empty list")
+    while len(levels[-1]) > DIGEST_SIZE:
+        levels.append(merkle_parent_level(levels[-1]))
+    return levels
+
+
+# ─────────────────────────────────────────────────────
+# Merkle tree sidecar and inclusion proofs
+# ─────────────────────────────────────────────────────
+#
+# merkle_tree.bin: 8-byte magic, little-endian u64 leaf count, then every
+# level (leaves first) as packed 32-byte digests. Level sizes follow from
+# the leaf count, so any node can be read with a single seek.
+
+MERKLE_TREE_NAME = "merkle_tree.bin"
+MERKLE_TREE_MAGIC = b"ASIMRKL1"
+_MERKLE_HEADER = struct.Struct("<8sQ")
+
+
+def merkle_level_sizes(leaf_count: int) -> list[int]:
+    """Node count per level, leaves first. Odd nodes are promoted."""
+    sizes = [leaf_count]
+    while sizes[-1] > 1:
+        sizes.append((sizes[-1] + 1) // 2)
+    return sizes
+
+
+def write_merkle_tree(levels: list[bytearray], output_path: str):
+    """Persist all tree levels from merkle_levels() as a binary sidecar."""
+    with open(output_path, "wb") as f:
+        f.write(_MERKLE_HEADER.pack(MERKLE_TREE_MAGIC, len(levels[0]) // DIGEST_SIZE))
+        for level in levels:
+            f.write(level)
+
+
+def _read_merkle_header(f, tree_path: str) -> int:
+    """Check the sidecar header and return the leaf count."""
+    header = f.read(_MERKLE_HEADER.size)
+    if len(header) != _MERKLE_HEADER.size:
+        raise ValueError(f"Truncated Merkle tree file: {tree_path}")
+    magic, leaf_count = _MERKLE_HEADER.unpack(header)
+    if magic != MERKLE_TREE_MAGIC:
+        raise ValueError(f"Not a Merkle tree file: {tree_path}")
+    return leaf_count
+
+
+class MerkleTreeFile:
+    """
+    Read-only view of a merkle_tree.bin sidecar that stays open, so audit
+    paths for many leaves cost O(log n) node reads each and no reopening.
+    """
+
+    def __init__(self, tree_path: str):
+        self.tree_path = tree_path
+        self._file = open(tree_path, "rb")
+        try:
+            self._count = _read_merkle_header(self._file, tree_path)
+            self._offsets = [0]
+            for size in merkle_level_sizes(self._count):
+                self._offsets.append(self._offsets[-1] + size)
+            self.root = self._node(self._offsets[-2], 0)
+        except BaseException:
+            self._file.close()
+            raise
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _node(self, offset: int, index: int) -> str:
+        self._file.seek(_MERKLE_HEADER.size + (offset + index) * DIGEST_SIZE)
+        digest = self._file.read(DIGEST_SIZE)
+        if len(digest) != DIGEST_SIZE:
+            raise ValueError(f"Truncated Merkle tree file: {self.tree_path}")
+        return digest.hex()
+
+    def path(self, leaf_index: int) -> list[str]:
+        """Sibling hashes bottom-up for leaf_index."""
+        if not 0 <= leaf_index < self._count:
+            raise IndexError(f"Leaf index {leaf_index} out of range (0..{self._count - 1})")
+        path = []
+        index = leaf_index
+        for offset, end in zip(self._offsets[:-2], self._offsets[1:-1]):
+            sibling = index ^ 1
+            if sibling < end - offset:
+                path.append(self._node(offset, sibling))
+            index //= 2
+        return path
+
+
+def read_merkle_path(tree_path: str, leaf_index: int) -> tuple[int, list[str], str]:
+    """
+    Read the audit path for leaf_index from a merkle_tree.bin sidecar.
+    Returns (tree_size, sibling hashes bottom-up, root). Reads O(log n) nodes.
+    """
+    with MerkleTreeFile(tree_path) as tree:
+        return len(tree), tree.path(leaf_index), tree.root
+
+
+def merkle_audit_path(levels: list[bytearray], leaf_index: int) -> list[str]:
+    """Sibling hashes bottom-up for leaf_index, from in-memory levels."""
+    path = []
+    index = leaf_index
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level) // DIGEST_SIZE:
+            path.append(bytes(level[sibling * DIGEST_SIZE:(sibling + 1) * DIGEST_SIZE]).hex())
+        index //= 2
+    return path
+
+
+def merkle_root_from_path(file_hash: str, leaf_index: int, tree_size: int,
+                          audit_path: list[str]) -> str:
+    """
+    Recompute the root from a file hash and its audit path.
+    Raises ValueError if the path length does not fit the tree shape.
+    """
+    if not 0 <= leaf_index < tree_size:
+        raise ValueError("Leaf index outside tree")
+    node = merkle_leaf(file_hash)
+    remaining = list(audit_path)
+    index, size = leaf_index, tree_size
+    while size > 1:
+        if index % 2:
+            if not remaining:
+                raise ValueError("Audit path too short")
+            node = merkle_node(remaining.pop(0), node)
+        elif index + 1 < size:
+            if not remaining:
+                raise ValueError("Audit path too short")
+            node = merkle_node(node, remaining.pop(0))
+        # else: odd trailing node, promoted without a sibling
+        index //= 2
+        size = (size + 1) // 2
+    if remaining:
+        raise ValueError("Audit path too long")
+    return node
+
+
+def read_merkle_levels(tree_path: str) -> list[bytearray]:
+    """Load every level of a merkle_tree.bin sidecar, leaves first."""
+    with open(tree_path, "rb") as f:
+        leaf_count = _read_merkle_header(f, tree_path)
+        levels = []
+        for size in merkle_level_sizes(leaf_count):
+            level = bytearray(f.read(size * DIGEST_SIZE))
+            if len(level) != size * DIGEST_SIZE:
+                raise ValueError(f"Truncated Merkle tree file: {tree_path}")
+            levels.append(level)
+    return levels
+
+
+class MerkleTree:
+    """
+    Updatable Merkle tree over stored levels (as from merkle_levels() or
+    merkle_tree.bin). Same shape and odd-node promotion as
+    build_merkle_tree(), so root always equals a full rebuild over the
+    current leaves.
+
+    update()/update_many() replace leaves in place and rehash only their
+    paths to the root: O(log n) per leaf, shared ancestors hashed once.
+    append() touches one path as well. insert() and delete() shift every
+    later leaf one position, and a node's hash depends on its position,
+    so they rehash every node to the right of the change: O(n - index).
+    Batch edits at the end of the manifest order where possible.
+    """
+
+    def __init__(self, levels: list[bytearray]):
+        if not levels or not levels[0]:
+            raise ValueError("Cannot build Merkle tree from empty list")
+        self.levels = levels
+
+    @classmethod
+    def from_hashes(cls, hashes: Iterable[str]) -> "MerkleTree":
+        return cls(merkle_levels(hashes))
+
+    @classmethod
+    def load(cls, tree_path: str) -> "MerkleTree":
+        return cls(read_merkle_levels(tree_path))
+
+    def save(self, output_path: str):
+        write_merkle_tree(self.levels, output_path)
+
+    def __len__(self) -> int:
+        return len(self.levels[0]) // DIGEST_SIZE
+
+    @property
+    def root(self) -> str:
+        return bytes(self.levels[-1]).hex()
+
+    def leaf(self, index: int) -> str:
+        """Leaf hash SHA-256(0x00 || file hash) at index, as hex."""
+        start = self._check(index) * DIGEST_SIZE
+        return bytes(self.levels[0][start:start + DIGEST_SIZE]).hex()
+
+    def _check(self, index: int, size: Optional[int] = None) -> int:
+        size = len(self) if size is None else size
+        if not 0 <= index < size:
+            raise IndexError(f"Leaf index {index} out of range (0..{size - 1})")
+        return index
+
+    @staticmethod
+    def _leaf_digest(file_hash: str) -> bytes:
+        return hashlib.sha256(LEAF_PREFIX + file_hash.encode("utf-8")).digest()
+
+    @staticmethod
+    def _hash_node(child: bytearray, count: int, index: int) -> bytes:
+        left = 2 * index * DIGEST_SIZE
+        if 2 * index + 1 < count:
+            return hashlib.sha256(NODE_PREFIX + child[left:left + 2 * DIGEST_SIZE]).digest()
+        return bytes(child[left:left + DIGEST_SIZE])  # odd trailing node, promoted
+
+    def update(self, index: int, file_hash: str):
+        """Replace the file hash at index and rehash its path."""
+        self.update_many({index: file_hash})
+
+    def update_many(self, changes: dict[int, str]):
+        """Replace several leaves ({index: file hash}), hashing each ancestor once."""
+        leaves = self.levels[0]
+        for index, file_hash in changes.items():
+            start = self._check(index) * DIGEST_SIZE
+            leaves[start:start + DIGEST_SIZE] = self._leaf_digest(file_hash)
+        dirty = set(changes)
+        for child, parent in zip(self.levels, self.levels[1:]):
+            count = len(child) // DIGEST_SIZE
+            dirty = {i // 2 for i in dirty}
+            for i in dirty:
+                parent[i * DIGEST_SIZE:(i + 1) * DIGEST_SIZE] = self._hash_node(child, count, i)
+
+    def append(self, file_hash: str):
+        self.insert(len(self), file_hash)
+
+    def insert(self, index: int, file_hash: str):
+        """Insert a file hash before index (index == len(self) appends)."""
+        self._check(index, len(self) + 1)
+        start = index * DIGEST_SIZE
+        self.levels[0][start:start] = self._leaf_digest(file_hash)
+        self._rehash_from(index)
+
+    def delete(self, index: int):
+        """Remove the leaf at index. The last leaf cannot be removed."""
+        self._check(index)
+        if len(self) == 1:
+            raise ValueError("Cannot remove the only leaf of a Merkle tree")
+        start = index * DIGEST_SIZE
+        del self.levels[0][start:start + DIGEST_SIZE]
+        self._rehash_from(min(index, len(self) - 1))
+
+    def _rehash_from(self, index: int):
+        """Recompute every node right of leaf index; levels may grow or shrink."""
+        level = 0
+        while len(self.levels[level]) > DIGEST_SIZE:
+            child = self.levels[level]
+            count = len(child) // DIGEST_SIZE
+            parent_count = (count + 1) // 2
+            if level + 1 == len(self.levels):
+                self.levels.append(bytearray())
+            parent = self.levels[level + 1]
+            index //= 2
+            # Nodes left of index are unchanged; the rest is rebuilt
+            del parent[index * DIGEST_SIZE:]
+            parent += b"".join(self._hash_node(child, count, i)
+                               for i in range(index, parent_count))
+            level += 1
+        del self.levels[level + 1:]
+
+
+# ─────────────────────────────────────────────────────
+# Manifest — scan files, store hashes with original paths
+# ─────────────────────────────────────────────────────
+
+HASH_BACKENDS = ("serial", "thread", "process", "async")
+
+
+def default_jobs() -> int:
+    """Default number of hashing workers: one per core plus headroom for I/O waits."""
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def walk_files(target: Path, tops: Optional[set] = None) -> Iterator[tuple[str, str]]:
+    """Yield (path, rel) for every file under target; see _walk_entries()."""
+    for filepath, rel, _ in _walk_entries(target, tops):
+        yield filepath, rel
+
+
+def walk_sort_key(rel: str) -> list[str]:
+    """Sort key that reproduces walk_files() order for a relative path."""
+    return [os.path.normcase(part) for part in rel.split(os.sep)]
+
+
+def _walk_entries(target: Path, tops: Optional[set] = None
+                  ) -> Iterator[tuple[str, str, os.DirEntry]]:
+    """
+    Yield (path, rel, DirEntry) for every file under target, skipping .asi-omega.
+    tops: optional set of normcased top-level folder names to walk; files
+    directly in target are included only if ROOT_SHARD is in the set.
+    Streams with os.scandir one directory at a time, so memory grows with
+    directory fan-out and depth rather than total file count. Entries are
+    sorted by name per directory and visited depth-first, which is exactly
+    the order of sorted(target.rglob("*")): Path comparison is part-wise.
+    Like rglob, symlinked directories are not descended and unreadable
+    directories are skipped.
+    """
+    def listing(dirpath: str) -> list[os.DirEntry]:
+        try:
+            with os.scandir(dirpath) as it:
+                entries = [e for e in it if e.name != ".asi-omega"]
+        except PermissionError:
+            return []
+        entries.sort(key=lambda e: os.path.normcase(e.name))
+        return entries
+
+    root = str(target)
+    top_entries = listing(root)
+    if tops is not None:
+        def wanted(e: os.DirEntry) -> bool:
+            # A top-level file always belongs to ROOT_SHARD, whatever its name
+            if e.is_dir(follow_symlinks=False):
+                return os.path.normcase(e.name) in tops
+            return ROOT_SHARD in tops
+        top_entries = [e for e in top_entries if wanted(e)]
+    # Stack of (iterator over sorted entries, rel prefix)
+    stack = [(iter(top_entries), "")]
+    while stack:
+        entries, prefix = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+        rel = prefix + entry.name
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append((iter(listing(entry.path)), rel + os.sep))
+            elif entry.is_file():
+                yield entry.path, rel, entry
+        except OSError:
+            continue
+
+
+def _hash_entry(filepath: str, rel: str, hash_io: Optional[HashIO] = None,
+                size: Optional[int] = None) -> dict:
+    return {
+        "path": filepath,
+        "rel": rel,
+        "sha256": sha256_file(filepath, hash_io),
+        "size": os.stat(filepath).st_size if size is None else size,
+    }
+
+
+def _hash_item(item: tuple, hash_io: Optional[HashIO] = None) -> dict:
+    """Hash a (path, rel) stream item, or (path, rel, size) when the walk already stat()ed it."""
+    return _hash_entry(item[0], item[1], hash_io, item[2] if len(item) > 2 else None)
+
+
+def _hash_batch(target: str, rels: list[str], hash_io: Optional[HashIO] = None,
+                sizes: Optional[list] = None) -> list[tuple[str, str, int]]:
+    """Process-pool worker: hash a batch of relative paths, return (rel, sha256, size)."""
+    results = []
+    for rel, size in zip(rels, sizes or [None] * len(rels)):
+        filepath = os.path.join(target, rel)
+        if size is None:
+            size = os.stat(filepath).st_size
+        results.append((rel, sha256_file(filepath, hash_io), size))
+    return results
+
+
+# Files per process-pool task: large enough to amortise pickling, small
+# enough that workers stay balanced.
+PROCESS_BATCH_SIZE = 256
+
+# Results kept in flight per worker; bounds memory while the walker streams.
+_WINDOW_PER_JOB = 16
+
+
+def _stream_thread_pool(items: Iterable, jobs: int, hash_io: HashIO,
+                        pool=None) -> Iterator[dict]:
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from _stream_thread_pool(items, jobs, hash_io, pool)
+        return
+    window = jobs * _WINDOW_PER_JOB
+    pending = deque()
+    for item in items:
+        if isinstance(item, dict):
+            pending.append(item)
+        else:
+            pending.append(pool.submit(_hash_item, item, hash_io))
+        while len(pending) >= window:
+            head = pending.popleft()
+            yield head if isinstance(head, dict) else head.result()
+    while pending:
+        head = pending.popleft()
+        yield head if isinstance(head, dict) else head.result()
+
+
+def _stream_thread_pool_unordered(items: Iterable, jobs: int, hash_io: HashIO,
+                                  pool=None) -> Iterator[tuple[int, dict]]:
+    if pool is None:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from _stream_thread_pool_unordered(items, jobs, hash_io, pool)
+        return
+    window = jobs * _WINDOW_PER_JOB
+    inflight = {}
+    for seq, item in enumerate(items):
+        if isinstance(item, dict):
+            yield seq, item
+            continue
+        inflight[pool.submit(_hash_item, item, hash_io)] = seq
+        if len(inflight) >= window:
+            done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield inflight.pop(future), future.result()
+    for future in as_completed(inflight):
+        yield inflight[future], future.result()
+
+
+def _stream_process_pool_unordered(target: str, items: Iterable, jobs: int,
+                                   hash_io: HashIO) -> Iterator[tuple[int, dict]]:
+    max_inflight = jobs * 2
+    inflight = {}
+
+    def results(done) -> Iterator[tuple[int, dict]]:
+        for future in done:
+            seqs = inflight.pop(future)
+            for seq, (rel, digest, nbytes) in zip(seqs, future.result()):
+                yield seq, {"path": os.path.join(target, rel), "rel": rel,
+                            "sha256": digest, "size": nbytes}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        seqs, rels, sizes = [], [], []
+        for seq, item in enumerate(items):
+            if isinstance(item, dict):
+                yield seq, item
+                continue
+            seqs.append(seq)
+            rels.append(item[1])
+            sizes.append(item[2] if len(item) > 2 else None)
+            if len(rels) >= PROCESS_BATCH_SIZE:
+                inflight[pool.submit(_hash_batch, target, rels, hash_io, sizes)] = seqs
+                seqs, rels, sizes = [], [], []
+                if len(inflight) >= max_inflight:
+                    done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    yield from results(done)
+        if rels:
+            inflight[pool.submit(_hash_batch, target, rels, hash_io, sizes)] = seqs
+        yield from results(list(as_completed(inflight)))
+
+
+def _stream_process_pool(target: str, items: Iterable, jobs: int,
+                         hash_io: HashIO) -> Iterator[dict]:
+    window = max(jobs * _WINDOW_PER_JOB, 2 * jobs * PROCESS_BATCH_SIZE)
+    pending = deque()
+    batch = {"rels": [], "sizes": [], "future": None}
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        def submit(b: dict):
+            b["future"] = pool.submit(_hash_batch, target, b["rels"], hash_io, b["sizes"])
+
+        def resolve(item) -> dict:
+            nonlocal batch
+            if isinstance(item, dict):
+                return item
+            owner, index = item
+            if owner["future"] is None:
+                submit(owner)
+                batch = {"rels": [], "sizes": [], "future": None}
+            rel, digest, nbytes = owner["future"].result()[index]
+            return {"path": os.path.join(target, rel), "rel": rel,
+                    "sha256": digest, "size": nbytes}
+
+        for item in items:
+            if isinstance(item, dict):
+                pending.append(item)
+            else:
+                batch["rels"].append(item[1])
+                batch["sizes"].append(item[2] if len(item) > 2 else None)
+                pending.append((batch, len(batch["rels"]) - 1))
+                if len(batch["rels"]) >= PROCESS_BATCH_SIZE:
+                    submit(batch)
+                    batch = {"rels": [], "sizes": [], "future": None}
+            while len(pending) >= window:
+                yield resolve(pending.popleft())
+        while pending:
+            yield resolve(pending.popleft())
+
+
+# Files the walk producer pulls per executor call in the async pipeline
+_ASYNC_WALK_CHUNK = 64
+_END = object()
+
+
+def _stream_async(items: Iterable, jobs: int, hash_io: HashIO,
+                  ordered: bool) -> Iterator:
+    """
+    asyncio pipeline for high-latency filesystems (SMB/NFS). A walk
+    producer feeds a bounded queue; `jobs` worker coroutines each keep one
+    open+hash in flight on an executor; a sink hands results back in walk
+    order (or, unordered, as (seq, entry) on completion). The walk itself
+    also runs off the event loop. A window semaphore, released only when
+    the caller takes a result, bounds memory to the queue depth.
+    """
+    depth = jobs * _WINDOW_PER_JOB
+    results = queue.Queue()
+    loop = asyncio.new_event_loop()
+    state = {}
+
+    async def pipeline():
+        window = state["window"] = asyncio.Semaphore(depth)
+        work = asyncio.Queue(maxsize=depth)
+        walk_pool = ThreadPoolExecutor(max_workers=1)
+        hash_pool = ThreadPoolExecutor(max_workers=jobs)
+        reorder = {}
+        next_seq = 0
+
+        def deliver(seq: int, entry: dict):
+            nonlocal next_seq
+            if not ordered:
+                results.put((seq, entry))
+                return
+            reorder[seq] = entry
+            while next_seq in reorder:
+                results.put(reorder.pop(next_seq))
+                next_seq += 1
+
+        async def producer():
+            it = iter(items)
+            seq = 0
+            while True:
+                chunk = await loop.run_in_executor(
+                    walk_pool, lambda: list(islice(it, _ASYNC_WALK_CHUNK)))
+                if not chunk:
+                    break
+                for item in chunk:
+                    await window.acquire()
+                    await work.put((seq, item))
+                    seq += 1
+            for _ in range(jobs):
+                await work.put(None)
+
+        async def worker():
+            while True:
+                job = await work.get()
+                if job is None:
+                    return
+                seq, item = job
+                if not isinstance(item, dict):
+                    item = await loop.run_in_executor(hash_pool, _hash_item, item, hash_io)
+                deliver(seq, item)
+
+        tasks = [loop.create_task(producer())]
+        tasks.extend(loop.create_task(worker()) for _ in range(jobs))
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            walk_pool.shutdown(wait=True)
+            hash_pool.shutdown(wait=True)
+
+    def run():
+        try:
+            state["task"] = loop.create_task(pipeline())
+            loop.run_until_complete(state["task"])
+            results.put(_END)
+        except BaseException as exc:
+            results.put(exc)
+        finally:
+            loop.close()
+
+    def call_in_loop(fn):
+        try:
+            loop.call_soon_threadsafe(fn)
+        except RuntimeError:
+            pass  # loop already closed
+
+    thread = threading.Thread(target=run, name="asi-omega-async", daemon=True)
+    thread.start()
+    try:
+        while True:
+            result = results.get()
+            if result is _END:
+                return
+            if isinstance(result, BaseException):
+                raise result
+            call_in_loop(state["window"].release)
+            yield result
+    finally:
+        if thread.is_alive() and "task" in state:
+            call_in_loop(state["task"].cancel)
+        thread.join()
+
+
+def _hash_stream(target: Path, items: Iterable, jobs: int, backend: str,
+                 hash_io: Optional[HashIO] = None, executor=None) -> Iterator[dict]:
+    """
+    Hash a stream of (path, rel[, size]) items with the chosen backend. Items that
+    are already entry dicts (stat cache hits) pass through. Output order
+    always follows input order. executor: a shared executor to hash on
+    instead of the backend's own pool (see DeviceScheduler).
+    """
+    hash_io = hash_io or DEFAULT_HASH_IO
+    if executor is not None:
+        yield from _stream_thread_pool(items, jobs, hash_io, executor)
+    elif backend == "serial" or jobs <= 1:
+        for item in items:
+            yield item if isinstance(item, dict) else _hash_item(item, hash_io)
+    elif backend == "process":
+        yield from _stream_process_pool(str(target), items, jobs, hash_io)
+    elif backend == "async":
+        yield from _stream_async(items, jobs, hash_io, ordered=True)
+    else:
+        yield from _stream_thread_pool(items, jobs, hash_io)
+
+
+def _hash_stream_unordered(target: Path, items: Iterable, jobs: int, backend: str,
+                           hash_io: Optional[HashIO] = None,
+                           executor=None) -> Iterator[tuple[int, dict]]:
+    """Like _hash_stream(), but yields (seq, entry) as soon as each file is done."""
+    hash_io = hash_io or DEFAULT_HASH_IO
+    if executor is not None:
+        yield from _stream_thread_pool_unordered(items, jobs, hash_io, executor)
+    elif backend == "serial" or jobs <= 1:
+        for seq, item in enumerate(items):
+            yield seq, item if isinstance(item, dict) else _hash_item(item, hash_io)
+    elif backend == "process":
+        yield from _stream_process_pool_unordered(str(target), items, jobs, hash_io)
+    elif backend == "async":
+        yield from _stream_async(items, jobs, hash_io, ordered=False)
+    else:
+        yield from _stream_thread_pool_unordered(items, jobs, hash_io)
+
+
+# Linux FIEMAP, used by reflinks=True to recognise files whose contents
+# are the same shared extents on disk (reflink/CoW copies)
+_FS_IOC_FIEMAP = 0xC020660B
+_FIEMAP_FLAG_SYNC = 0x1
+_FIEMAP_EXTENT_LAST = 0x1
+_FIEMAP_EXTENT_SHARED = 0x2000
+# unknown, delalloc, encoded, encrypted, not aligned, inline, tail, unwritten
+_FIEMAP_EXTENT_UNSAFE = 0x2 | 0x4 | 0x8 | 0x80 | 0x100 | 0x200 | 0x400 | 0x800
+_FIEMAP_MAX_EXTENTS = 64
+
+
+def _extent_map(filepath: str) -> Optional[tuple]:
+    """
+    Physical extent map of a file as ((logical, physical, length), ...), or
+    None unless every extent is a plain shared extent. Two files on the same
+    device with the same size and the same map read the same bytes (holes
+    read as zeros in both). Linux only; None elsewhere or on any error.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return None
+    buf = bytearray(32 + 56 * _FIEMAP_MAX_EXTENTS)
+    struct.pack_into("=QQIIII", buf, 0, 0, 2 ** 64 - 1, _FIEMAP_FLAG_SYNC, 0,
+                     _FIEMAP_MAX_EXTENTS, 0)
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            fcntl.ioctl(fd, _FS_IOC_FIEMAP, buf)
+        finally:
+            os.close(fd)
+    except OSError:
+        return None
+    mapped = struct.unpack_from("=I", buf, 20)[0]
+    extents, flags = [], 0
+    for i in range(mapped):
+        logical, physical, length = struct.unpack_from("=QQQ", buf, 32 + 56 * i)
+        flags = struct.unpack_from("=I", buf, 32 + 56 * i + 40)[0]
+        if flags & _FIEMAP_EXTENT_UNSAFE or not flags & _FIEMAP_EXTENT_SHARED:
+            return None
+        extents.append((logical, physical, length))
+    # More extents than fit in one call: not worth a second round trip
+    if not extents or not flags & _FIEMAP_EXTENT_LAST:
+        return None
+    return tuple(extents)
+
+
+class _SharedContent:
+    """
+    Tracks content identities during one scan so each is hashed once:
+    hardlinks share ("inode", st_dev, st_ino); with reflinks, same-size
+    files whose extent maps match share ("extents", st_dev, size, map).
+    The first file of an identity is hashed; later ones pass through the
+    hashing stream as placeholder entries and get its digest on the way
+    out. Extent maps are only read once a second file of a size turns up.
+    The methods hold a lock: with the async backend claim() runs on the
+    walk thread while resolve() runs on the consumer.
+    """
+
+    def __init__(self, reflinks: bool = False):
+        self.reflinks = reflinks
+        self.digests: dict = {}   # identity -> digest, None while being hashed
+        self.owners: dict = {}    # rel being hashed -> identities it resolves
+        self.held: dict = {}      # identity -> results waiting for its digest
+        self.sizes: dict = {}     # (st_dev, size) -> first file of that size
+        self.files = 0
+        self.bytes = 0
+        self._lock = threading.Lock()
+
+    def _own(self, rel: str, identity):
+        self.digests[identity] = None
+        self.owners.setdefault(rel, []).append(identity)
+
+    def known(self, st: os.stat_result, digest: str):
+        """Record a digest reused from the stat cache."""
+        with self._lock:
+            if st.st_nlink > 1:
+                self.digests.setdefault(("inode", st.st_dev, st.st_ino), digest)
+
+    def claim(self, filepath: str, rel: str, st: os.stat_result):
+        """Identity this file can reuse, or None if it has to be hashed."""
+        with self._lock:
+            identities = []
+            if st.st_nlink > 1:
+                identities.append(("inode", st.st_dev, st.st_ino))
+            if self.reflinks and st.st_size:
+                key = (st.st_dev, st.st_size)
+                first = self.sizes.get(key)
+                if first is None:
+                    self.sizes[key] = {"path": filepath, "rel": rel}
+                    self.owners.setdefault(rel, []).append(("size", key))
+                else:
+                    if "path" in first:
+                        # Second file of this size: the first one is a candidate too
+                        extents = _extent_map(first.pop("path"))
+                        if extents is not None:
+                            identity = ("extents",) + key + (extents,)
+                            if "sha256" in first:
+                                self.digests[identity] = first["sha256"]
+                            else:
+                                self._own(first["rel"], identity)
+                        first.clear()
+                    extents = _extent_map(filepath)
+                    if extents is not None:
+                        identities.append(("extents",) + key + (extents,))
+            for identity in identities:
+                if identity in self.digests:
+                    self.files += 1
+                    self.bytes += st.st_size
+                    return identity
+            for identity in identities:
+                self._own(rel, identity)
+            return None
+
+    def resolve(self, result, ordered: bool) -> list:
+        """Results ready to yield once `result` is out of the hashing stream."""
+        with self._lock:
+            entry = result if ordered else result[1]
+            identity = entry.pop("shared", None)
+            if identity is not None:
+                digest = self.digests[identity]
+                if digest is None:
+                    self.held.setdefault(identity, []).append(result)
+                    return []
+                entry["sha256"] = digest
+                return [result]
+            ready = [result]
+            for identity in self.owners.pop(entry["rel"], ()):
+                if identity[0] == "size":
+                    first = self.sizes[identity[1]]
+                    if first:
+                        first["sha256"] = entry["sha256"]
+                    continue
+                self.digests[identity] = entry["sha256"]
+                for waiting in self.held.pop(identity, ()):
+                    (waiting if ordered else waiting[1])["sha256"] = entry["sha256"]
+                    ready.append(waiting)
+            return ready
+
+
+def _iter_scan(target_path: str, jobs: Optional[int], backend: str,
+               stat_cache: Optional[dict], ordered: bool,
+               hash_io: Optional[HashIO], tops: Optional[set] = None,
+               executor=None, reflinks: bool = False,
+               shared_stats: Optional[dict] = None,
+               cache_stats: Optional[dict] = None) -> Iterator:
+    if backend not in HASH_BACKENDS:
+        raise ValueError(f"Unknown hashing backend: {backend}")
+    target = Path(target_path).resolve()
+    if not target.is_dir():
+        raise FileNotFoundError(f"Directory not found: {target_path}")
+    if jobs is None:
+        jobs = default_jobs()
+    stream = _hash_stream if ordered else _hash_stream_unordered
+
+    files = _walk_entries(target, tops)
+    shared = _SharedContent(reflinks)
+    # Incremental: cache hits become ready entries, misses are hashed.
+    # Hardlinks (and reflinks) of a file already seen become placeholder
+    # entries that shared.resolve() fills in. The one stat per file comes
+    # from the walk's DirEntry and its size is passed on to the hashing.
+    keys = {}
+    hits = {"files": 0, "bytes": 0}
+
+    def lookup():
+        for filepath, rel, entry in files:
+            # On Windows DirEntry.stat() has no st_ino/st_dev/st_nlink, which
+            # the stat cache and hardlink detection need
+            st = os.stat(filepath) if os.name == "nt" else entry.stat()
+            if stat_cache is not None:
+                key = _stat_key(st)
+                keys[rel] = key
+                cached = stat_cache.get(rel)
+                if cached is not None and tuple(cached[:4]) == key:
+                    shared.known(st, cached[4])
+                    hits["files"] += 1
+                    hits["bytes"] += key[0]
+                    yield {"path": filepath, "rel": rel, "sha256": cached[4], "size": key[0]}
+                    continue
+            identity = shared.claim(filepath, rel, st)
+            if identity is not None:
+                yield {"path": filepath, "rel": rel, "sha256": None, "size": st.st_size,
+                       "shared": identity}
+            else:
+                yield filepath, rel, st.st_size
+
+    fresh = {}
+    for result in stream(target, lookup(), jobs, backend, hash_io, executor):
+        for ready in shared.resolve(result, ordered):
+            if stat_cache is not None:
+                entry = ready if ordered else ready[1]
+                fresh[entry["rel"]] = keys.pop(entry["rel"]) + (entry["sha256"],)
+            yield ready
+    if shared_stats is not None:
+        shared_stats.update(files=shared.files, bytes=shared.bytes)
+    if cache_stats is not None:
+        cache_stats.update(hits)
+    if stat_cache is not None:
+        stat_cache.clear()
+        stat_cache.update(fresh)
+
+
+def iter_scan(target_path: str, jobs: Optional[int] = None,
+              backend: str = "thread",
+              stat_cache: Optional[dict] = None,
+              hash_io: Optional[HashIO] = None) -> Iterator[dict]:
+    """
+    Streaming form of scan_directory(): yields {path, rel, sha256, size} in
+    sorted path order while the walk and hashing are still in progress.
+    stat_cache is updated in place once the generator is exhausted.
+    """
+    return _iter_scan(target_path, jobs, backend, stat_cache, True, hash_io)
+
+
+def iter_scan_completed(target_path: str, jobs: Optional[int] = None,
+                        backend: str = "thread",
+                        stat_cache: Optional[dict] = None,
+                        hash_io: Optional[HashIO] = None,
+                        tops: Optional[set] = None,
+                        executor=None, reflinks: bool = False,
+                        shared_stats: Optional[dict] = None,
+                        cache_stats: Optional[dict] = None) -> Iterator[tuple[int, dict]]:
+    """
+    Like iter_scan(), but yields (seq, entry) in completion order, so one
+    slow file never stalls the pool. seq is the file's position in sorted
+    order; sort_scan_results() restores that order.
+    tops: only scan these top-level folders (see _walk_entries()).
+    executor: hash on this shared executor instead of a private pool.
+    reflinks: also reuse digests between same-size files that share all
+    their extents on disk (see _extent_map()).
+    shared_stats: filled with {"files", "bytes"} not read because their
+    content was already hashed under another path.
+    cache_stats: filled with {"files", "bytes"} whose digest came from
+    stat_cache instead of being hashed.
+    """
+    return _iter_scan(target_path, jobs, backend, stat_cache, False, hash_io, tops,
+                      executor, reflinks, shared_stats, cache_stats)
+
+
+def scan_directory(target_path: str, jobs: Optional[int] = None,
+                   backend: str = "thread",
+                   stat_cache: Optional[dict] = None,
+                   hash_io: Optional[HashIO] = None) -> list[dict]:
+    """
+    Scan all files in target_path, return list of {path, rel, sha256, size}.
+    backend: "serial", "thread" (default), "process" or "async" (asyncio
+    pipeline, see _stream_async; jobs = opens in flight). With jobs > 1 files are
+    hashed concurrently; entries are always returned in sorted path order, so
+    the manifest and Merkle root are identical to a serial run.
+
+    stat_cache: optional {rel: (size, mtime_ns, inode, ctime_ns, sha256)} from
+    load_stat_cache(). Files whose stat tuple is unchanged reuse the stored
+    digest; everything else is hashed. The dict is updated in place to
+    describe the current tree, ready for save_stat_cache().
+
+    Hardlinks are hashed once per (st_dev, st_ino); every path still gets
+    its own entry, so the result is the same as hashing each link.
+
+    hash_io: how files are read (strategy, block size, fadvise); see HashIO.
+    """
+    return list(iter_scan(target_path, jobs=jobs, backend=backend,
+                          stat_cache=stat_cache, hash_io=hash_io))
+
+
+def write_manifest(entries: Iterable[dict], output_path: str):
+    """Write manifest as CSV."""
+    with open(output_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=["path", "rel", "sha256", "size"])
+        writer.writeheader()
+        writer.writerows(entries)
+
+
+def iter_manifest(manifest_path: str) -> Iterator[dict]:
+    """Stream manifest CSV rows as dicts without loading the whole file."""
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def read_manifest(manifest_path: str) -> list[dict]:
+    """Read manifest CSV, return list of dicts."""
+    return list(iter_manifest(manifest_path))
+
+
+# Rows held in memory before a sorted run is spilled to disk
+MANIFEST_RUN_SIZE = 100_000
+
+
+def _write_run(rows: list[tuple[int, dict]], run_path: str):
+    rows.sort(key=lambda r: r[0])
+    with open(run_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        for seq, e in rows:
+            writer.writerow([seq, e["path"], e["rel"], e["sha256"], e["size"]])
+
+
+def _read_run(run_path: str) -> Iterator[tuple[int, dict]]:
+    with open(run_path, "r", newline="", encoding="utf-8") as f:
+        for seq, path, rel, digest, size in csv.reader(f):
+            yield int(seq), {"path": path, "rel": rel, "sha256": digest, "size": size}
+
+
+def sort_scan_results(results: Iterable[tuple[int, dict]], run_dir: str,
+                      run_size: int = MANIFEST_RUN_SIZE) -> Iterator[dict]:
+    """
+    External merge sort of (seq, entry) pairs from iter_scan_completed().
+    Rows are buffered up to run_size, spilled to sorted run files in
+    run_dir and merged back in seq order, so memory stays bounded by
+    run_size regardless of file count. Run files are removed afterwards.
+    """
+    runs = []
+    buffer = []
+    try:
+        for result in results:
+            buffer.append(result)
+            if len(buffer) >= run_size:
+                run_path = os.path.join(run_dir, f".manifest-run-{len(runs):04d}.csv")
+                _write_run(buffer, run_path)
+                runs.append(run_path)
+                buffer = []
+
+        buffer.sort(key=lambda r: r[0])
+        if not runs:
+            for _, e in buffer:
+                yield e
+            return
+
+        streams = [_read_run(r) for r in runs] + [iter(buffer)]
+        for _, e in heapq.merge(*streams, key=lambda r: r[0]):
+            yield e
+    finally:
+        for run_path in runs:
+            try:
+                os.remove(run_path)
+            except OSError:
+                pass
+
+
+# ─────────────────────────────────────────────────────
+# Binary manifest — fixed-width records, mmap and O(log n) lookup
+# ─────────────────────────────────────────────────────
+#
+# manifest.bin, written next to manifest.csv by 'audit --binary-manifest':
+#   header   magic, record count, string table offset, index offset,
+#            base path length, Merkle root (32 bytes)
+#   records  one per manifest row, in manifest (leaf) order:
+#            sha256 (32 bytes), size, rel offset, rel length
+#   strings  UTF-8: base path, then every rel
+#   index    record numbers sorted by os.path.normcase(rel) (UTF-8 bytes),
+#            so lookups match the manifest.csv fallback on Windows too
+# The absolute path is not stored per row; it is base path + rel.
+# manifest.csv stays the authoritative, human- and PowerShell-readable form.
+
+BINARY_MANIFEST_NAME = "manifest.bin"
+BINARY_MANIFEST_MAGIC = b"ASIMANF2"  # 1: index sorted by rel as written
+_BIN_HEADER = struct.Struct("<8sQQQQ32s")
+_BIN_RECORD = struct.Struct("<32sQQI4x")
+_BIN_INDEX = struct.Struct("<Q")
+
+
+def _bin_key(rel: str) -> bytes:
+    """Index sort and search key: normcased UTF-8, as _normalize_rel() compares."""
+    return os.path.normcase(rel).encode("utf-8")
+
+
+def write_binary_manifest(entries: Iterable[dict], output_path: str,
+                          base_path: str, merkle_root: str):
+    """Write entries (in manifest order) as a binary manifest."""
+    base = base_path.encode("utf-8")
+    keys = []
+    with open(output_path, "wb") as f, tempfile.TemporaryFile() as strings:
+        f.write(b"\0" * _BIN_HEADER.size)
+        strings.write(base)
+        str_offset = len(base)
+        for e in entries:
+            rel = e["rel"].encode("utf-8")
+            f.write(_BIN_RECORD.pack(bytes.fromhex(e["sha256"]), int(e["size"]),
+                                     str_offset, len(rel)))
+            strings.write(rel)
+            str_offset += len(rel)
+            keys.append(_bin_key(e["rel"]))
+
+        strings_offset = f.tell()
+        strings.seek(0)
+        shutil.copyfileobj(strings, f)
+
+        index_offset = f.tell()
+        for i in sorted(range(len(keys)), key=keys.__getitem__):
+            f.write(_BIN_INDEX.pack(i))
+
+        f.seek(0)
+        f.write(_BIN_HEADER.pack(BINARY_MANIFEST_MAGIC, len(keys), strings_offset,
+                                 index_offset, len(base), bytes.fromhex(merkle_root)))
+
+
+class BinaryManifest:
+    """
+    Memory-mapped reader for manifest.bin. Rows come back as dicts with the
+    same keys as manifest.csv rows (size as int); nothing is parsed until
+    it is accessed.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"Empty binary manifest: {path}")
+        if len(self._mm) < _BIN_HEADER.size:
+            self.close()
+            raise ValueError(f"Truncated binary manifest: {path}")
+        (magic, self._count, self._strings, self._index,
+         base_len, root) = _BIN_HEADER.unpack_from(self._mm, 0)
+        if magic != BINARY_MANIFEST_MAGIC:
+            self.close()
+            raise ValueError(f"Not a binary manifest: {path}")
+        self.merkle_root = root.hex()
+        self.base_path = self._mm[self._strings:self._strings + base_len].decode("utf-8")
+
+    def close(self):
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _rel_bytes(self, i: int) -> bytes:
+        offset, length = struct.unpack_from(
+            "<QI", self._mm, _BIN_HEADER.size + i * _BIN_RECORD.size + 40)
+        start = self._strings + offset
+        return self._mm[start:start + length]
+
+    def _key(self, i: int) -> bytes:
+        return _bin_key(self._rel_bytes(i).decode("utf-8"))
+
+    def sha256(self, i: int) -> str:
+        start = _BIN_HEADER.size + i * _BIN_RECORD.size
+        return self._mm[start:start + DIGEST_SIZE].hex()
+
+    def entry(self, i: int) -> dict:
+        """Row i in manifest order."""
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        digest, size, offset, length = _BIN_RECORD.unpack_from(
+            self._mm, _BIN_HEADER.size + i * _BIN_RECORD.size)
+        start = self._strings + offset
+        rel = self._mm[start:start + length].decode("utf-8")
+        return {"path": os.path.join(self.base_path, rel), "rel": rel,
+                "sha256": digest.hex(), "size": size}
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self._count):
+            yield self.entry(i)
+
+    def find(self, rel: str) -> tuple[int, Optional[dict]]:
+        """
+        Binary search by rel, normalised like the manifest.csv lookup
+        (normpath, normcase); returns (manifest index, entry) or (-1, None).
+        """
+        wanted = _bin_key(os.path.normpath(rel))
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            (i,) = _BIN_INDEX.unpack_from(self._mm, self._index + mid * _BIN_INDEX.size)
+            if self._key(i) < wanted:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count:
+            (i,) = _BIN_INDEX.unpack_from(self._mm, self._index + lo * _BIN_INDEX.size)
+            if self._key(i) == wanted:
+                return i, self.entry(i)
+        return -1, None
+
+
+def open_binary_manifest(output_dir: str, merkle_root: Optional[str] = None) -> Optional[BinaryManifest]:
+    """
+    Open output_dir/manifest.bin if present and (when merkle_root is given)
+    written for that root. Returns None otherwise, so callers fall back to CSV.
+    """
+    path = Path(output_dir) / BINARY_MANIFEST_NAME
+    if not path.exists():
+        return None
+    try:
+        bm = BinaryManifest(str(path))
+    except (OSError, ValueError):
+        return None
+    if merkle_root is not None and bm.merkle_root != merkle_root:
+        bm.close()
+        return None
+    return bm
+
+
+# ─────────────────────────────────────────────────────
+# Stat cache — reuse digests of unchanged files (audit --incremental)
+# ─────────────────────────────────────────────────────
+
+STAT_CACHE_NAME = "stat_cache.json"
+STAT_CACHE_VERSION = 1
+
+# Files modified this close to the previous scan may have changed again
+# within the same timestamp tick (FAT has 2 s resolution); never trust them.
+RACY_WINDOW_NS = 2_000_000_000
+
+
+def _stat_key(st: os.stat_result) -> tuple[int, int, int, int]:
+    return (st.st_size, st.st_mtime_ns, st.st_ino, st.st_ctime_ns)
+
+
+def _read_stat_cache(cache_path: str) -> dict:
+    """Raw stat cache document, or {} if missing, unreadable or another version."""
+    path = Path(cache_path)
+    if not path.exists():
+        return {}
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != STAT_CACHE_VERSION:
+        return {}
+    return data
+
+
+def load_stat_cache(cache_path: str) -> dict:
+    """
+    Read stat cache written by save_stat_cache(), dropping racy entries.
+    Returns {} if the file is missing, unreadable or from another version.
+    """
+    data = _read_stat_cache(cache_path)
+
+    cutoff = data.get("scan_started_ns", 0) - RACY_WINDOW_NS
+    return {
+        rel: tuple(row)
+        for rel, row in data.get("entries", {}).items()
+        if row[1] < cutoff
+    }
+
+
+def save_stat_cache(stat_cache: dict, cache_path: str, scan_started_ns: int):
+    """Write stat cache as JSON. scan_started_ns: time.time_ns() before the scan."""
+    data = {
+        "version": STAT_CACHE_VERSION,
+        "scan_started_ns": scan_started_ns,
+        "entries": {rel: list(row) for rel, row in stat_cache.items()},
+    }
+    Path(cache_path).write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+
+
+# ─────────────────────────────────────────────────────
+# Shards — one Merkle subtree per top-level folder or per N files
+# ─────────────────────────────────────────────────────
+#
+# A sharded audit (audit --shard top|N) builds one Merkle tree per shard
+# over that shard's manifest rows, in manifest order, and a top tree whose
+# leaves are the shard roots (hex) in dod.json order. dod.json records
+# "sharding" and "shards"; merkle_root is the top root. The manifest stays
+# one file in walk order, so every other reader is unchanged.
+
+ROOT_SHARD = "."  # shard of the files directly in the audited folder
+
+
+def parse_shard_spec(spec: str) -> dict:
+    """'top' or a file count N -> the dod.json "sharding" block. Raises ValueError."""
+    if spec == "top":
+        return {"mode": "top"}
+    try:
+        size = int(spec)
+    except ValueError:
+        raise ValueError(f"Unknown shard spec: {spec} (use 'top' or a file count)") from None
+    if size < 1:
+        raise ValueError("Shard size must be at least 1")
+    return {"mode": "files", "size": size}
+
+
+def shard_of(sharding: dict, rel: str, index: int) -> str:
+    """Shard name of a manifest row: its top-level folder, or index // size."""
+    if sharding["mode"] == "top":
+        head, sep, _ = rel.partition(os.sep)
+        return head if sep else ROOT_SHARD
+    return str(index // sharding["size"])
+
+
+def build_shards(rows: Iterable[dict], sharding: dict) -> list[dict]:
+    """
+    One Merkle subtree per shard over manifest rows (streamed, in manifest
+    order). Returns [{name, merkle_root, file_count, total_size_bytes}] in
+    order of each shard's first row. Memory is one leaf digest per file.
+    """
+    sha = hashlib.sha256
+    shards = {}  # name -> [leaf level, file count, bytes]
+    for index, e in enumerate(rows):
+        name = shard_of(sharding, e["rel"], index)
+        acc = shards.get(name)
+        if acc is None:
+            acc = shards[name] = [bytearray(), 0, 0]
+        acc[0] += sha(LEAF_PREFIX + e["sha256"].encode("utf-8")).digest()
+        acc[1] += 1
+        acc[2] += int(e["size"]) if e.get("size") not in (None, "") else 0
+    result = []
+    for name, (level, count, nbytes) in shards.items():
+        while len(level) > DIGEST_SIZE:
+            level = merkle_parent_level(level)
+        result.append({"name": name, "merkle_root": bytes(level).hex(),
+                       "file_count": count, "total_size_bytes": nbytes})
+    return result
+
+
+def combine_shard_roots(shards: list[dict]) -> str:
+    """Top root: a Merkle tree whose leaves are the shard roots, in list order."""
+    return build_merkle_tree([s["merkle_root"] for s in shards])
+
+
+def check_shard_roots(recomputed: list[dict], dod: dict, stored_root: str,
+                      progress: Optional["ProgressReporter"] = None) -> bool:
+    """
+    Compare shard roots recomputed from the manifest (build_shards()) with
+    dod.json, then the top root with stored_root. Prints OK/FEIL lines.
+    """
+    ok = True
+    recorded = {s["name"]: s["merkle_root"] for s in dod.get("shards", [])}
+    changed = [s["name"] for s in recomputed if recorded.get(s["name"]) != s["merkle_root"]]
+    changed += [name for name in recorded if name not in {s["name"] for s in recomputed}]
+    for name in changed:
+        print(f"  FEIL: Shard-rot MATCHER IKKE: {name}")
+        if progress:
+            progress.failure("shard_root_mismatch", detail=name)
+        ok = False
+    if ok:
+        print(f"  OK: Shard-rotter (reberegnet) matcher for alle {len(recomputed)} shards")
+    if recorded and combine_shard_roots(dod["shards"]) == stored_root:
+        print("  OK: Merkle-rot (av shard-rotter) matcher")
+    else:
+        print("  FEIL: Merkle-rot (av shard-rotter) MATCHER IKKE")
+        if progress:
+            progress.failure("merkle_root_mismatch")
+        ok = False
+    return ok
+
+
+# ─────────────────────────────────────────────────────
+# Metrics — per-phase timing and resource use (audit --profile)
+# ─────────────────────────────────────────────────────
+
+METRICS_VERSION = 1
+
+
+def peak_memory_bytes() -> Optional[int]:
+    """Process high-water mark memory in bytes, or None where unavailable."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class _MemoryCounters(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)]
+                _fields_ += [(name, ctypes.c_size_t) for name in (
+                    "PeakWorkingSetSize", "WorkingSetSize",
+                    "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                    "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage",
+                    "PagefileUsage", "PeakPagefileUsage")]
+
+            counters = _MemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters),
+                                                         counters.cb):
+                return counters.PeakWorkingSetSize
+        except (OSError, AttributeError):
+            pass
+    return None
+
+
+def _cpu_seconds() -> float:
+    # Includes reaped child processes, so the process backend's workers
+    # count once the pool has shut down (POSIX only; 0 on Windows).
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+class PhaseTimer:
+    """
+    Collects wall time, CPU time, files, bytes read and peak memory per
+    pipeline phase. Phases are timed back to back:
+
+        timer = PhaseTimer()
+        timer.start("scan")
+        ...
+        timer.stop(files=n, bytes_read=b)
+
+    peak_memory_bytes is the process high-water mark when the phase ended,
+    so it only grows from phase to phase.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, dict] = {}
+        self._started = time.perf_counter()
+        self._cpu_started = _cpu_seconds()
+        self._current = None
+
+    def start(self, name: str):
+        if self._current is not None:
+            self.stop()
+        self._current = (name, time.perf_counter(), _cpu_seconds())
+
+    def stop(self, files: int = 0, bytes_read: int = 0) -> dict:
+        name, started, cpu_started = self._current
+        self._current = None
+        seconds = time.perf_counter() - started
+        phase = {
+            "wall_seconds": round(seconds, 6),
+            "cpu_seconds": round(_cpu_seconds() - cpu_started, 6),
+            "files": files,
+            "bytes_read": bytes_read,
+            "files_per_s": round(files / seconds, 1) if files and seconds else None,
+            "mb_per_s": round(bytes_read / 1e6 / seconds, 2) if bytes_read and seconds else None,
+            "peak_memory_bytes": peak_memory_bytes(),
+        }
+        self.phases[name] = phase
+        return phase
+
+    def result(self, **extra) -> dict:
+        """The metrics block stored in dod.json."""
+        if self._current is not None:
+            self.stop()
+        return {
+            "version": METRICS_VERSION,
+            "wall_seconds": round(time.perf_counter() - self._started, 6),
+            "cpu_seconds": round(_cpu_seconds() - self._cpu_started, 6),
+            "peak_memory_bytes": peak_memory_bytes(),
+            **extra,
+            "phases": self.phases,
+        }
+
+
+def _effective_jobs(jobs: Optional[int], backend: str, executor=None) -> int:
+    """Hashing workers an audit really ran with, as _hash_stream() picks them."""
+    if executor is not None:
+        # Shared pool (audit-many): its size, not this audit's --jobs
+        scheduler = getattr(executor, "scheduler", None)
+        return scheduler.jobs if scheduler is not None else executor._max_workers
+    jobs = jobs or default_jobs()
+    return 1 if backend == "serial" or jobs <= 1 else jobs
+
+
+def format_metrics(metrics: dict) -> str:
+    """Fixed-width phase table for the terminal."""
+    lines = [f"  {'Fase':<16}{'Tid (s)':>10}{'CPU (s)':>10}{'Filer/s':>12}{'MB/s':>10}{'Minne (MB)':>12}"]
+
+    def row(name: str, m: dict) -> str:
+        peak = m.get("peak_memory_bytes")
+        return (f"  {name:<16}{m['wall_seconds']:>10.3f}{m['cpu_seconds']:>10.3f}"
+                f"{m.get('files_per_s') or '-':>12}{m.get('mb_per_s') or '-':>10}"
+                f"{round(peak / 1e6, 1) if peak else '-':>12}")
+
+    for name, phase in metrics["phases"].items():
+        lines.append(row(name, phase))
+    lines.append(row("totalt", metrics))
+    return "\n".join(lines)
+
+
+# ─────────────────────────────────────────────────────
+# Progress events — structured reporting (--events jsonl)
+# ─────────────────────────────────────────────────────
+
+EVENTS_VERSION = 1
+PROGRESS_INTERVAL = 0.5  # seconds between throttled "progress" events
+
+
+class ProgressReporter:
+    """
+    Turns per-file updates from audit() and verify() into event dicts for
+    a callback. Every event carries "event", "command" and "ts" (Unix time):
+
+      start     target, version
+      phase     phase, total_files, total_bytes (None when unknown)
+      progress  phase, files, bytes, current, elapsed_seconds, eta_seconds
+      failure   kind, rel, detail    (the run will fail)
+      warning   kind, rel, detail    (reported, but the run can pass)
+      resolved  kind, rel            (an earlier failure/warning cleared; watch)
+      done      ok, elapsed_seconds
+
+    "progress" is throttled to one event per `interval` seconds, plus a
+    final one when a phase ends, so per-file cost is a counter update and
+    a clock read. All other events are emitted immediately. The callback
+    runs on the thread calling audit()/verify(). With callback=None every
+    method is a no-op.
+    """
+
+    def __init__(self, callback, command: str, interval: float = PROGRESS_INTERVAL):
+        self.callback = callback
+        self.command = command
+        self.interval = interval
+        self._started = time.monotonic()
+        self._phase = None
+
+    def _emit(self, event: str, **fields):
+        self.callback({"event": event, "command": self.command,
+                       "ts": round(time.time(), 3), **fields})
+
+    def start(self, target: str):
+        if self.callback:
+            self._emit("start", target=target, version=EVENTS_VERSION)
+
+    def phase(self, name: str, total_files: Optional[int] = None,
+              total_bytes: Optional[int] = None):
+        """Begin a phase; ends the previous one. Totals enable the ETA."""
+        if not self.callback:
+            return
+        self.end_phase()
+        self._phase = name
+        self._total_files = total_files
+        self._total_bytes = total_bytes
+        self._phase_started = time.monotonic()
+        self._next_emit = self._phase_started + self.interval
+        self.files = 0
+        self.bytes = 0
+        self.current = None
+        self._emitted_files = 0
+        self._emit("phase", phase=name, total_files=total_files, total_bytes=total_bytes)
+
+    def advance(self, rel: str, size: int = 0):
+        """Count one processed file."""
+        if not self.callback:
+            return
+        self.files += 1
+        self.bytes += size
+        self.current = rel
+        now = time.monotonic()
+        if now >= self._next_emit:
+            self._progress(now)
+
+    def _progress(self, now: float):
+        elapsed = now - self._phase_started
+        eta = None
+        if elapsed > 0:
+            # Prefer bytes: one large file skews a file-count ETA
+            if self._total_bytes and self.bytes:
+                eta = (self._total_bytes - self.bytes) * elapsed / self.bytes
+            elif self._total_files and self.files:
+                eta = (self._total_files - self.files) * elapsed / self.files
+        self._emit("progress", phase=self._phase, files=self.files, bytes=self.bytes,
+                   current=self.current, elapsed_seconds=round(elapsed, 3),
+                   eta_seconds=round(max(eta, 0.0), 1) if eta is not None else None)
+        self._emitted_files = self.files
+        self._next_emit = now + self.interval
+
+    def end_phase(self):
+        if self.callback and self._phase is not None:
+            if self.files != self._emitted_files:
+                self._progress(time.monotonic())
+            self._phase = None
+
+    def failure(self, kind: str, rel: Optional[str] = None, detail=None):
+        if self.callback:
+            self._emit("failure", kind=kind, rel=rel, detail=detail)
+
+    def warning(self, kind: str, rel: Optional[str] = None, detail=None):
+        if self.callback:
+            self._emit("warning", kind=kind, rel=rel, detail=detail)
+
+    def resolved(self, kind: Optional[str], rel: Optional[str] = None):
+        if self.callback:
+            self._emit("resolved", kind=kind, rel=rel)
+
+    def done(self, ok: bool):
+        if self.callback:
+            self.end_phase()
+            self._emit("done", ok=ok,
+                       elapsed_seconds=round(time.monotonic() - self._started, 3))
+
+
+def jsonl_event_writer(stream):
+    """Event callback writing one JSON object per line to stream."""
+    def write(event: dict):
+        stream.write(json.dumps(event, ensure_ascii=False) + "\n")
+        stream.flush()
+    return write
+
+
+# ─────────────────────────────────────────────────────
+# Audit — full pipeline
+# ─────────────────────────────────────────────────────
+
+def audit(target_path: str, output_dir: Optional[str] = None,
+          jobs: Optional[int] = None, backend: str = "thread",
+          incremental: bool = False, binary_manifest: bool = False,
+          hash_io: Optional[HashIO] = None, profile: bool = False,
+          on_event=None, shard: Optional[str] = None,
+          only_shards: Optional[list[str]] = None, executor=None,
+          reflinks: bool = False) -> dict:
+    """
+    Run full audit on target_path.
+    Creates: manifest.csv, merkle_root.txt, dod.json, rapport.txt
+    jobs: number of hashing workers (None = auto, 1 = serial).
+    backend: hashing backend, see scan_directory().
+    incremental: reuse digests from stat_cache.json for unchanged files
+    (and write an updated cache for the next run). If no file was added or
+    removed, merkle_tree.bin is updated for the changed leaves only.
+    binary_manifest: also write manifest.bin for fast lookups.
+    hash_io: file read strategy, see HashIO.
+    profile: time each phase and store the figures under "metrics" in
+    dod.json (see PhaseTimer). bytes_read counts file contents hashed, so
+    digests reused from the stat cache are not included.
+    on_event: optional callback receiving progress event dicts, see
+    ProgressReporter. The scan phase's ETA uses the previous audit's totals.
+    shard: "top" for one Merkle subtree per top-level folder, or a file
+    count N for one per N files in manifest order (see build_shards()).
+    only_shards: with shard="top", rescan only these top-level folders
+    (ROOT_SHARD for loose files) and keep the other shards' manifest rows
+    from the previous sharded audit, so untouched shards keep their roots.
+    Names must be shards of that audit or top-level folders added since;
+    anything else raises ValueError.
+    executor: shared executor to hash on instead of a private pool, with
+    jobs as the in-flight window (see audit_many()).
+    reflinks: also hash reflinked (CoW) copies once, see iter_scan_completed().
+    Hardlinks are always hashed once per inode.
+    Returns audit result dict.
+    """
+    timer = PhaseTimer() if profile else None
+    target = Path(target_path).resolve()
+    if output_dir is None:
+        output_dir = str(target / ".asi-omega")
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    progress = ProgressReporter(on_event, "audit")
+    progress.start(str(target))
+
+    previous_dod = {}
+    if (out / "dod.json").exists():
+        try:
+            previous_dod = json.loads((out / "dod.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            pass
+    expected_files = previous_dod.get("file_count")
+    expected_bytes = previous_dod.get("total_size_bytes")
+
+    sharding = parse_shard_spec(shard) if shard else None
+    tops = None
+    if only_shards:
+        if sharding != {"mode": "top"} or previous_dod.get("sharding") != sharding \
+                or not (out / "manifest.csv").exists():
+            raise ValueError("only_shards needs an earlier audit made with shard='top', "
+                             "and shard='top' again")
+        tops = {os.path.normcase(name) for name in only_shards}
+        # Shards of the previous audit, or top-level folders added since
+        known = {os.path.normcase(s["name"]) for s in previous_dod.get("shards", [])}
+        unknown = sorted(name for name in only_shards
+                         if os.path.normcase(name) not in known
+                         and (name == ROOT_SHARD or not (target / name).is_dir()
+                              or os.sep in name or (os.altsep and os.altsep in name)))
+        if unknown:
+            raise ValueError(f"Unknown shards: {', '.join(unknown)} (not a shard of the "
+                             f"previous audit or a top-level folder)")
+        expected_files = expected_bytes = None
+
+    # Step 1+2: Scan files, streaming rows into the manifest as they are hashed
+    print(f"  [1/3] Scanner filer i {target}...")
+    if timer:
+        timer.start("scan")
+    progress.phase("scan", expected_files, expected_bytes)
+    stat_cache = None
+    cache_path = out / STAT_CACHE_NAME
+    if incremental:
+        stat_cache = load_stat_cache(str(cache_path))
+    kept_cache = {}
+    if tops is not None and stat_cache is not None:
+        # The scan replaces the cache; keep the entries of untouched shards
+        kept_cache = {rel: row for rel, row in stat_cache.items()
+                      if os.path.normcase(shard_of(sharding, rel, 0)) not in tops}
+    scan_started_ns = time.time_ns()
+
+    totals = {"files": 0, "bytes": 0}
+    manifest_path = out / "manifest.csv"
+    tree_path = out / MERKLE_TREE_NAME
+
+    # Incremental audits compare the new rows with the previous manifest in
+    # step. If the file set is unchanged, the stored tree is updated in place
+    # for the changed leaves (see MerkleTree) instead of being rebuilt.
+    same_files = None
+    if incremental and not sharding and tree_path.exists() and manifest_path.exists():
+        same_files = {"old": iter_manifest(str(manifest_path)), "same": True, "changes": {}}
+
+    def counted(rows: Iterable[dict]) -> Iterator[dict]:
+        for e in rows:
+            if same_files is not None and same_files["same"]:
+                old = next(same_files["old"], None)
+                if old is None or old["rel"] != e["rel"]:
+                    same_files["same"] = False
+                elif old["sha256"] != e["sha256"]:
+                    same_files["changes"][totals["files"]] = e["sha256"]
+            totals["files"] += 1
+            totals["bytes"] += int(e["size"])
+            yield e
+
+    def tracked(results: Iterable[tuple[int, dict]]) -> Iterator[tuple[int, dict]]:
+        # Progress is counted before the sort, as files complete
+        for seq, e in results:
+            progress.advance(e["rel"], e["size"])
+            yield seq, e
+
+    partial_path = out / "manifest.csv.partial"
+    shared_stats = {}
+    cache_stats = {}
+    results = iter_scan_completed(str(target), jobs=jobs, backend=backend,
+                                  stat_cache=stat_cache, hash_io=hash_io, tops=tops,
+                                  executor=executor, reflinks=reflinks,
+                                  shared_stats=shared_stats, cache_stats=cache_stats)
+    rows = sort_scan_results(tracked(results), str(out))
+    if tops is not None:
+        # Both streams are in walk order, so a merge keeps the manifest sorted
+        kept = (e for e in iter_manifest(str(manifest_path))
+                if os.path.normcase(shard_of(sharding, e["rel"], 0)) not in tops)
+        rows = heapq.merge(rows, kept, key=lambda e: walk_sort_key(e["rel"]))
+    try:
+        write_manifest(counted(rows), str(partial_path))
+        if same_files is not None and next(same_files["old"], None) is not None:
+            same_files["same"] = False  # files were removed at the end
+    except OSError as exc:
+        progress.failure("read_error", getattr(exc, "filename", None), str(exc))
+        progress.done(False)
+        raise
+    finally:
+        if same_files is not None:
+            same_files["old"].close()
+    os.replace(partial_path, manifest_path)
+    file_count = totals["files"]
+    bytes_hashed = totals["bytes"]
+
+    print(f"        {file_count} filer registrert")
+    if shared_stats.get("files"):
+        bytes_hashed -= shared_stats["bytes"]
+        kind = "hardlenker/reflinks" if reflinks else "hardlenker"
+        print(f"        {shared_stats['files']} {kind} delte innhold med en fil som "
+              f"allerede var hashet")
+    if stat_cache is not None:
+        # Only real cache hits count: a racy file keeps its stat but is rehashed
+        bytes_hashed -= cache_stats["bytes"]
+        hashed = file_count - cache_stats["files"] - shared_stats.get("files", 0)
+        print(f"        {cache_stats['files']} gjenbrukt fra stat-cache, {hashed} hashet")
+        stat_cache.update(kept_cache)
+        save_stat_cache(stat_cache, str(cache_path), scan_started_ns)
+    if timer:
+        timer.stop(files=file_count, bytes_read=bytes_hashed)
+
+    # Step 3: Build Merkle tree
+    if not file_count:
+        print("  FEIL: Ingen filer funnet i mappen.")
+        progress.failure("empty")
+        progress.done(False)
+        sys.exit(1)
+    print("  [2/3] Bygger Merkle-tre (RFC 6962)...")
+    if timer:
+        timer.start("merkle")
+    progress.phase("merkle", file_count)
+    shards = None
+    if sharding:
+        shards = build_shards(iter_manifest(str(manifest_path)), sharding)
+        root = combine_shard_roots(shards)
+        print(f"        {len(shards)} shards")
+        old_roots = {s["name"]: s["merkle_root"] for s in previous_dod.get("shards", [])}
+        if previous_dod.get("sharding") == sharding:
+            changed = [s["name"] for s in shards if old_roots.get(s["name"]) != s["merkle_root"]]
+            print(f"        {len(changed)} shard(s) endret siden forrige audit")
+        # Proofs for sharded audits are built per shard (see prove())
+        if tree_path.exists():
+            tree_path.unlink()
+    else:
+        tree = None
+        if same_files is not None and same_files["same"]:
+            try:
+                tree = MerkleTree.load(str(tree_path))
+            except (OSError, ValueError):
+                pass
+            # The sidecar must describe the previous audit, or it is rebuilt
+            if tree is not None and (len(tree) != file_count
+                                     or tree.root != previous_dod.get("merkle_root")):
+                tree = None
+        if tree is not None:
+            tree.update_many(same_files["changes"])
+            print(f"        {len(same_files['changes'])} blad(er) oppdatert i lagret tre")
+        else:
+            tree = MerkleTree.from_hashes(e["sha256"] for e in iter_manifest(str(manifest_path)))
+        root = tree.root
+        tree.save(str(tree_path))
+        del tree
+    print(f"        Merkle-rot: {root[:16]}...")
+
+    merkle_path = out / "merkle_root.txt"
+    merkle_path.write_text(root, encoding="utf-8")
+
+    if timer:
+        timer.stop(files=file_count)
+
+    bin_path = out / BINARY_MANIFEST_NAME
+    if binary_manifest:
+        if timer:
+            timer.start("binary_manifest")
+        write_binary_manifest(iter_manifest(str(manifest_path)), str(bin_path),
+                              str(target), root)
+        if timer:
+            timer.stop(files=file_count)
+    elif bin_path.exists():
+        # A manifest.bin from an earlier audit no longer matches
+        bin_path.unlink()
+
+    # Step 4: Generate DoD report
+    print("  [3/3] Genererer rapport...")
+    if timer:
+        timer.start("report")
+    progress.phase("report", file_count)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    dod = {
+        "schema_version": 2,
+        "merkle_root": root,
+        "generated": now.isoformat(),
+        "target_path": str(target),
+        "file_count": file_count,
+        "total_size_bytes": totals["bytes"],
+        "platform": sys.platform,
+    }
+    if sharding:
+        dod["sharding"] = sharding
+        dod["shards"] = shards
+
+    # Step 5: Human-readable report, streamed from the manifest. Sizes are
+    # converted back to int so empty files render as for scanned entries.
+    rapport_path = out / "rapport.txt"
+    rows = ({**e, "size": int(e["size"])} for e in iter_manifest(str(manifest_path)))
+    write_report(rows, dod, str(rapport_path))
+
+    # dod.json is written last so the metrics cover the report phase too
+    if timer:
+        timer.stop(files=file_count)
+        dod["metrics"] = timer.result(
+            backend=backend, jobs=_effective_jobs(jobs, backend, executor),
+            io=(hash_io or DEFAULT_HASH_IO)._asdict(), incremental=incremental)
+    dod_path = out / "dod.json"
+    dod_path.write_text(json.dumps(dod, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    print()
+    print(f"  AUDIT FULLFORT")
+    print(f"  Filer:       {file_count}")
+    print(f"  Merkle-rot:  {root[:16]}...")
+    print(f"  Tidspunkt:   {now.strftime('%Y-%m-%d %H:%M:%S')} UTC")
+    print(f"  Utdata:      {out}")
+    if timer:
+        print()
+        print(format_metrics(dod["metrics"]))
+    print()
+    print(f"  Verifiser senere:")
+    print(f"    asi-omega verify \"{target}\"")
+    print()
+
+    progress.done(True)
+    return dod
+
+
+# ─────────────────────────────────────────────────────
+# Batch audit — many targets on one hashing pool
+# ─────────────────────────────────────────────────────
+
+AUDIT_MANY_PER_DEVICE = 4    # files read at once from one device (st_dev)
+AUDIT_MANY_TARGETS = 4       # targets walked and written at the same time
+
+
+class _DeviceExecutor(NamedTuple):
+    """Executor-like view of a DeviceScheduler for one device."""
+    scheduler: "DeviceScheduler"
+    dev: int
+
+    def submit(self, fn, *args) -> Future:
+        return self.scheduler.submit(self.dev, fn, *args)
+
+
+class DeviceScheduler:
+    """
+    One thread pool shared by many audits, with at most per_device files
+    read from any one device at a time. Work over the limit waits in a
+    per-device queue rather than holding a pool thread, so a slow device
+    never starves the others. for_device(dev) gives the executor that
+    audit(executor=...) hashes on.
+    """
+
+    def __init__(self, jobs: int, per_device: int = AUDIT_MANY_PER_DEVICE):
+        self.jobs = jobs
+        self.pool = ThreadPoolExecutor(max_workers=jobs)
+        self.per_device = max(1, per_device)
+        self._lock = threading.Lock()
+        self._running: dict[int, int] = {}
+        self._waiting: dict[int, deque] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.pool.shutdown(wait=True)
+
+    def for_device(self, dev: int) -> _DeviceExecutor:
+        return _DeviceExecutor(self, dev)
+
+    def submit(self, dev: int, fn, *args) -> Future:
+        future = Future()
+        with self._lock:
+            running = self._running.get(dev, 0)
+            if running >= self.per_device:
+                self._waiting.setdefault(dev, deque()).append((future, fn, args))
+                return future
+            self._running[dev] = running + 1
+        self._start(dev, future, fn, args)
+        return future
+
+    def _start(self, dev: int, future: Future, fn, args):
+        def finished(inner: Future):
+            with self._lock:
+                waiting = self._waiting.get(dev)
+                following = waiting.popleft() if waiting else None
+                if following is None:
+                    self._running[dev] -= 1
+            if following is not None:
+                self._start(dev, *following)
+            if inner.exception() is not None:
+                future.set_exception(inner.exception())
+            else:
+                future.set_result(inner.result())
+        self.pool.submit(fn, *args).add_done_callback(finished)
+
+
+class ThreadOutput(io.TextIOBase):
+    """
+    sys.stdout stand-in: output from a thread that has set .local.buffer
+    goes to that buffer, everything else to the original stream.
+    redirect_stdout() swaps sys.stdout for the whole process and cannot
+    capture several audits running at once.
+    """
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self.local = threading.local()
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        return (buffer if buffer is not None else self.fallback).write(text)
+
+    def flush(self):
+        self.fallback.flush()
+
+
+_thread_output_lock = threading.Lock()
+
+
+def thread_output() -> ThreadOutput:
+    """Install ThreadOutput as sys.stdout on first use and return it."""
+    with _thread_output_lock:
+        if not isinstance(sys.stdout, ThreadOutput):
+            sys.stdout = ThreadOutput(sys.stdout)
+        return sys.stdout
+
+
+def expand_targets(specs: Iterable[str]) -> list[str]:
+    """
+    Turn audit-many arguments into target folders, in order and without
+    duplicates. A folder is taken as is, a file is read as a list of
+    folders or globs (one per line, '#' starts a comment) and anything else
+    is expanded as a glob. A plain path that does not exist is kept, so it
+    is reported as missing instead of silently skipped.
+    """
+    import glob
+    targets, seen = [], set()
+
+    def add(spec: str):
+        spec = os.path.expanduser(spec)
+        if glob.escape(spec) == spec:
+            matches = [spec]
+        else:
+            matches = [m for m in sorted(glob.glob(spec)) if os.path.isdir(m)]
+        for path in matches:
+            path = os.path.abspath(path)
+            if os.path.normcase(path) not in seen:
+                seen.add(os.path.normcase(path))
+                targets.append(path)
+
+    for spec in specs:
+        if os.path.isfile(spec):
+            with open(spec, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.split("#", 1)[0].strip()
+                    if line:
+                        add(line)
+        else:
+            add(spec)
+    return targets
+
+
+def _audit_captured(target: str, dev: Optional[int], scheduler: DeviceScheduler,
+                    jobs: int, on_event, **options) -> dict:
+    """Audit one target of audit_many() with its output captured."""
+    result = {"target": target, "ok": False, "merkle_root": None, "file_count": 0,
+              "total_size_bytes": 0, "error": None, "output": []}
+    if dev is None:
+        result["error"] = "Mappe ikke funnet"
+        return result
+    output = thread_output()
+    buffer = io.StringIO()
+    output.local.buffer = buffer
+    started = time.perf_counter()
+    try:
+        dod = audit(target, jobs=jobs, executor=scheduler.for_device(dev),
+                    on_event=on_event, **options)
+        result.update(ok=True, merkle_root=dod["merkle_root"], file_count=dod["file_count"],
+                      total_size_bytes=dod["total_size_bytes"])
+    except SystemExit:
+        result["error"] = "Ingen filer funnet"  # audit() exits on an empty folder
+    except (OSError, ValueError) as exc:
+        result["error"] = str(exc)
+    except Exception as exc:
+        # Any other failure is this target's alone; the batch carries on
+        result["error"] = f"{type(exc).__name__}: {exc}"
+    finally:
+        output.local.buffer = None
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    result["output"] = buffer.getvalue().rstrip("\n").split("\n")
+    return result
+
+
+def audit_many(targets: list[str], jobs: Optional[int] = None,
+               per_device: int = AUDIT_MANY_PER_DEVICE,
+               parallel: int = AUDIT_MANY_TARGETS, on_event=None,
+               **options) -> list[dict]:
+    """
+    Audit many folders in one process. Every target gets its own
+    .asi-omega output, exactly as from audit(), but all files are hashed
+    on one shared pool of `jobs` threads with at most `per_device` reads
+    per device (st_dev of the target folder), and `parallel` targets are
+    in progress at once. Targets are interleaved by device so the ones
+    running together read from different disks.
+    options: passed on to audit() (incremental, binary_manifest, hash_io,
+    shard, reflinks). on_event: progress events as for audit(), with "target" added.
+    Returns one {target, ok, merkle_root, file_count, total_size_bytes,
+    error, seconds, output} per target, in the order given.
+    """
+    if jobs is None:
+        jobs = default_jobs()
+    devices = {}
+    for target in targets:
+        try:
+            devices[target] = os.stat(target).st_dev if os.path.isdir(target) else None
+        except OSError:
+            devices[target] = None
+    by_device: dict = {}
+    for target in targets:
+        by_device.setdefault(devices[target], []).append(target)
+    order = [t for group in zip_longest(*by_device.values()) for t in group if t is not None]
+
+    event_lock = threading.Lock()
+
+    def target_events(target: str):
+        if on_event is None:
+            return None
+
+        def emit(event: dict):
+            with event_lock:
+                on_event({**event, "target": target})
+        return emit
+
+    print(f"  AUDIT AV {len(targets)} MAPPER ({jobs} jobber, maks {per_device} per enhet, "
+          f"{len(by_device)} enhet(er))")
+    print()
+    results = {}
+    thread_output()  # per-target capture; this thread still prints through
+    with DeviceScheduler(jobs, per_device) as scheduler, \
+            ThreadPoolExecutor(max_workers=max(1, parallel)) as runner:
+        futures = [runner.submit(_audit_captured, t, devices[t], scheduler, jobs,
+                                 target_events(t), **options) for t in order]
+        for n, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results[result["target"]] = result
+            if result["ok"]:
+                print(f"  [{n}/{len(order)}] OK: {result['target']} "
+                      f"({result['file_count']} filer, {result['seconds']:.1f} s)")
+            else:
+                print(f"  [{n}/{len(order)}] FEIL: {result['target']}: {result['error']}")
+                for line in result["output"]:
+                    if line.strip():
+                        print(f"      {line}")
+
+    ordered = [results[t] for t in targets]
+    failed = [r for r in ordered if not r["ok"]]
+    print()
+    print("  SAMMENDRAG")
+    for r in ordered:
+        root = r["merkle_root"] or "-"
+        print(f"  {'OK  ' if r['ok'] else 'FEIL'} {root:<64} {r['file_count']:>9}  {r['target']}")
+    print()
+    print(f"  {len(ordered) - len(failed)} av {len(ordered)} mapper revidert, "
+          f"{sum(r['file_count'] for r in ordered)} filer")
+    if failed:
+        print(f"  FEIL: {len(failed)} mappe(r) feilet")
+    return ordered
+
+
+# ─────────────────────────────────────────────────────
+# Verify — check all files against manifest
+# ─────────────────────────────────────────────────────
+
+def _candidate_digests(target: Path, candidates: list, jobs: int, backend: str,
+                       hash_io: Optional[HashIO] = None) -> Iterator[Optional[str]]:
+    """
+    Digest per (path, rel, sha256, size) candidate, in order, or None for a
+    file that vanished or became unreadable after the metadata tier. An
+    error ends the pool's stream at the first unfinished candidate, so that
+    one is retried alone and hashing resumes after it.
+    """
+    start = 0
+    while start < len(candidates):
+        items = ((p, r) for p, r, _, _ in candidates[start:])
+        try:
+            for entry in _hash_stream(target, items, jobs, backend, hash_io):
+                start += 1
+                yield entry["sha256"]
+            return
+        except OSError:
+            pass
+        try:
+            digest = sha256_file(candidates[start][0], hash_io)
+        except OSError:
+            digest = None
+        start += 1
+        yield digest
+
+
+def _load_audit(target: Path, out: Path, progress: Optional[ProgressReporter] = None
+                ) -> Optional[tuple[str, dict]]:
+    """
+    Stored Merkle root and dod.json of the audit in out. If manifest.csv,
+    merkle_root.txt or dod.json is missing, says so and returns None.
+    """
+    missing = [name for name in ("manifest.csv", "merkle_root.txt", "dod.json")
+               if not (out / name).exists()]
+    if missing:
+        print(f"  FEIL: Mangler filer: {', '.join(missing)}")
+        print(f"  Kjoer 'asi-omega audit \"{target}\"' foerst.")
+        if progress is not None:
+            progress.failure("no_audit", detail=missing)
+        return None
+    stored_root = (out / "merkle_root.txt").read_text(encoding="utf-8").strip()
+    dod = json.loads((out / "dod.json").read_text(encoding="utf-8"))
+    return stored_root, dod
+
+
+def _check_dod_root(dod: dict, stored_root: str,
+                    progress: Optional[ProgressReporter] = None) -> bool:
+    """Check 1 of verify: dod.json records the same root as merkle_root.txt."""
+    if dod.get("merkle_root") == stored_root:
+        print("  OK: DoD merkle_root matcher merkle_root.txt")
+        return True
+    print("  FEIL: DoD merkle_root matcher IKKE merkle_root.txt")
+    if progress is not None:
+        progress.failure("dod_root_mismatch")
+    return False
+
+
+def _check_contents(candidates: list, digests: Iterable[Optional[str]],
+                    progress: ProgressReporter) -> dict[str, int]:
+    """
+    Content tier: compare the digest of each (path, rel, sha256, size)
+    candidate with its manifest hash, reporting every difference. A None
+    digest is a file that vanished or became unreadable after the
+    metadata tier. Returns counts for "ok", "modified", "unreadable" and
+    "missing".
+    """
+    counts = dict.fromkeys(("ok", "modified", "unreadable", "missing"), 0)
+    for (filepath, rel, expected, size), actual in zip(candidates, digests):
+        progress.advance(rel, size)
+        if actual == expected:
+            counts["ok"] += 1
+        elif actual is None and not os.path.isfile(filepath):
+            print(f"  FEIL: FIL MANGLER: {rel}")
+            progress.failure("missing", rel)
+            counts["missing"] += 1
+        elif actual is None:
+            print(f"  FEIL: ULESELIG: {rel}")
+            progress.failure("unreadable", rel)
+            counts["unreadable"] += 1
+        else:
+            print(f"  FEIL: ENDRET: {rel}")
+            print(f"        Forventet: {expected[:16]}...")
+            print(f"        Faktisk:   {actual[:16]}...")
+            progress.failure("modified", rel, {"expected": expected, "actual": actual})
+            counts["modified"] += 1
+    return counts
+
+
+def verify(target_path: str, output_dir: Optional[str] = None,
+           quick: bool = False, check_mtime: bool = False,
+           jobs: Optional[int] = None, backend: str = "thread",
+           hash_io: Optional[HashIO] = None, on_event=None,
+           only_shards: Optional[list[str]] = None,
+           workers: Optional[list[str]] = None, token: Optional[str] = None) -> bool:
+    """
+    Verify files against stored audit.
+    One sorted directory walk is merge-joined against the manifest (both
+    are in walk order), classifying every file as unchanged, missing,
+    resized or extra from metadata alone. Only files that pass that tier
+    are hashed, using the same worker pool as audit.
+    quick: stop after the metadata tier (contents are not hashed).
+    check_mtime: warn about files whose mtime differs from stat_cache.json.
+    jobs/backend/hash_io: hashing workers and read strategy, as for audit.
+    on_event: optional progress callback, see ProgressReporter. Phases are
+    "merkle", "metadata" and "hash"; every missing, resized, modified or
+    unreadable file is a "failure" event, every extra file a "warning".
+    only_shards: for sharded audits, check and hash only these shards.
+    Shard and top roots are still recomputed from the whole manifest.
+    workers: URLs of 'asi-omega worker' processes that hash the content
+    tier in ranges (see serve_worker()); token is their shared secret.
+    Returns True if all checks pass.
+    """
+    if backend not in HASH_BACKENDS:
+        raise ValueError(f"Unknown hashing backend: {backend}")
+    target = Path(target_path).resolve()
+    if output_dir is None:
+        output_dir = str(target / ".asi-omega")
+    out = Path(output_dir)
+    if jobs is None:
+        jobs = default_jobs()
+    progress = ProgressReporter(on_event, "verify")
+    progress.start(str(target))
+
+    manifest_path = out / "manifest.csv"
+    audit_state = _load_audit(target, out, progress)
+    if audit_state is None:
+        progress.done(False)
+        return False
+    stored_root, dod = audit_state
+    sharding = dod.get("sharding")
+    selected_shards = None
+    if only_shards:
+        if not sharding:
+            print("  FEIL: --only-shard krever en shardet audit (audit --shard)")
+            progress.done(False)
+            return False
+        selected_shards = set(only_shards)
+        unknown = selected_shards - {s["name"] for s in dod.get("shards", [])}
+        if unknown:
+            print(f"  FEIL: Ukjente shards: {', '.join(sorted(unknown))}")
+            progress.done(False)
+            return False
+    stored_stats = None
+    if check_mtime:
+        stored_stats = _read_stat_cache(str(out / STAT_CACHE_NAME)).get("entries", {})
+
+    # One streaming pass over the manifest: leaf hashes for the Merkle
+    # check, row count, and whether rows are in walk order for the join.
+    manifest_count = 0
+    in_walk_order = True
+    previous_key = None
+    progress.phase("merkle", dod.get("file_count"))
+
+    def manifest_rows() -> Iterator[dict]:
+        nonlocal manifest_count, in_walk_order, previous_key
+        for e in iter_manifest(str(manifest_path)):
+            key = walk_sort_key(e["rel"])
+            if previous_key is not None and key <= previous_key:
+                in_walk_order = False
+            previous_key = key
+            manifest_count += 1
+            progress.advance(e["rel"])
+            yield e
+
+    recomputed = recomputed_shards = None
+    if sharding:
+        recomputed_shards = build_shards(manifest_rows(), sharding)
+    else:
+        leaves = merkle_leaf_level(e["sha256"] for e in manifest_rows())
+        if leaves:
+            while len(leaves) > DIGEST_SIZE:
+                leaves = merkle_parent_level(leaves)
+            recomputed = bytes(leaves).hex()
+        del leaves
+
+    print(f"  VERIFISERER: {target}")
+    print(f"  {manifest_count} filer i manifest")
+    print()
+
+    warnings = 0
+
+    # Check 1: DoD merkle_root matches merkle_root.txt
+    ok = _check_dod_root(dod, stored_root, progress)
+
+    # Check 2: Recompute Merkle root from manifest
+    if sharding:
+        ok = check_shard_roots(recomputed_shards, dod, stored_root, progress) and ok
+    elif recomputed == stored_root:
+        print("  OK: Merkle-rot (reberegnet) matcher")
+    else:
+        print("  FEIL: Merkle-rot MATCHER IKKE — manifest kan vaere endret")
+        progress.failure("merkle_root_mismatch")
+        ok = False
+
+    # Check 3a: Metadata tier — a single walk merge-joined with the manifest.
+    # Existence and size only; a size mismatch proves modification without
+    # hashing. Disk files with no manifest row are the unauthorized files.
+    if in_walk_order:
+        rows = iter_manifest(str(manifest_path))
+    else:
+        rows = iter(sorted(read_manifest(str(manifest_path)),
+                           key=lambda e: walk_sort_key(e["rel"])))
+    disk = _walk_entries(target)
+    expected_count = manifest_count
+    if selected_shards is not None:
+        # Shards of N files are assigned by manifest position, so membership
+        # is resolved against the manifest; top-level shards prune the walk.
+        member_rels = {e["rel"] for index, e in enumerate(iter_manifest(str(manifest_path)))
+                       if shard_of(sharding, e["rel"], index) in selected_shards}
+        expected_count = len(member_rels)
+        rows = (e for e in rows if e["rel"] in member_rels)
+        if sharding["mode"] == "top":
+            disk = _walk_entries(target, {os.path.normcase(n) for n in selected_shards})
+        else:
+            disk = (d for d in disk if d[1] in member_rels)
+            print("  INFO: Shards per filantall: nye filer paa disk kan ikke knyttes til en shard")
+        print(f"  INFO: Kontrollerer {expected_count} filer i {len(selected_shards)} shard(s)")
+    progress.phase("metadata", expected_count)
+
+    files_ok = 0
+    files_fail = 0
+    files_unreadable = 0
+    files_missing = 0
+    files_resized = 0
+    mtime_changed = 0
+    extra = []
+    candidates = []
+
+    def report_missing(e: dict):
+        nonlocal files_missing, ok
+        print(f"  FEIL: FIL MANGLER: {e['rel']}")
+        progress.failure("missing", e["rel"])
+        files_missing += 1
+        ok = False
+
+    d = next(disk, None)
+    e = next(rows, None)
+    d_key = walk_sort_key(d[1]) if d else None
+    e_key = walk_sort_key(e["rel"]) if e else None
+    while d is not None or e is not None:
+        if e is None or (d is not None and d_key < e_key):
+            extra.append(d[1])
+            progress.warning("extra", d[1])
+            d = next(disk, None)
+            d_key = walk_sort_key(d[1]) if d else None
+            continue
+        if d is None or e_key < d_key:
+            report_missing(e)
+            progress.advance(e["rel"])
+            e = next(rows, None)
+            e_key = walk_sort_key(e["rel"]) if e else None
+            continue
+
+        filepath, rel, entry = d
+        try:
+            st = entry.stat()
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            report_missing(e)
+        elif e.get("size") not in (None, "") and st.st_size != int(e["size"]):
+            print(f"  FEIL: ENDRET STORRELSE: {e['rel']}")
+            print(f"        Forventet: {int(e['size']):,} bytes")
+            print(f"        Faktisk:   {st.st_size:,} bytes")
+            progress.failure("resized", e["rel"],
+                             {"expected": int(e["size"]), "actual": st.st_size})
+            files_resized += 1
+            ok = False
+        else:
+            if stored_stats is not None:
+                row = stored_stats.get(e["rel"])
+                if row is not None and row[1] != st.st_mtime_ns:
+                    print(f"  ADVARSEL: ENDRET TIDSSTEMPEL: {e['rel']}")
+                    progress.warning("mtime", e["rel"])
+                    mtime_changed += 1
+            candidates.append((filepath, rel, e["sha256"], st.st_size))
+        progress.advance(e["rel"])
+
+        d = next(disk, None)
+        d_key = walk_sort_key(d[1]) if d else None
+        e = next(rows, None)
+        e_key = walk_sort_key(e["rel"]) if e else None
+
+    if len(candidates) == expected_count:
+        print(f"  OK: Metadata (eksistens og storrelse) stemmer for alle {expected_count} filer")
+    else:
+        if files_missing:
+            print(f"  FEIL: {files_missing} fil(er) mangler")
+        if files_resized:
+            print(f"  FEIL: {files_resized} fil(er) har endret storrelse")
+    if mtime_changed:
+        print(f"  ADVARSEL: {mtime_changed} fil(er) har endret tidsstempel")
+        warnings += 1
+
+    # Check 3b: Content tier — hash only files that passed the metadata tier
+    if quick:
+        print(f"  INFO: --quick: innholdshashing hoppet over ({len(candidates)} filer)")
+    else:
+        progress.phase("hash", len(candidates), sum(c[3] for c in candidates))
+        failed_workers = []
+        if workers:
+            print(f"  INFO: Innholdshashing fordelt paa {len(workers)} arbeider(e)")
+            digests = _distributed_digests(target, candidates, workers, token, jobs, backend,
+                                           hash_io, failed=failed_workers)
+        else:
+            digests = _candidate_digests(target, candidates, jobs, backend, hash_io)
+        counts = _check_contents(candidates, digests, progress)
+        files_ok = counts["ok"]
+        files_fail = counts["modified"]
+        files_unreadable = counts["unreadable"]
+        files_missing += counts["missing"]
+        if files_ok < len(candidates):
+            ok = False
+        for url, error in failed_workers:
+            print(f"  ADVARSEL: Arbeider {url} feilet ({error}); omraadene ble flyttet")
+            warnings += 1
+
+        if files_ok == expected_count:
+            print(f"  OK: Alle {files_ok} filer verifisert")
+        if files_fail:
+            print(f"  FEIL: {files_fail} fil(er) endret")
+        if files_unreadable:
+            print(f"  FEIL: {files_unreadable} fil(er) kunne ikke leses")
+
+    # Check 4: Unauthorized files (found by the same walk)
+    if extra:
+        print(f"  ADVARSEL: {len(extra)} fil(er) paa disk som ikke er i manifest:")
+        for rel in extra[:5]:
+            print(f"    + {rel}")
+        if len(extra) > 5:
+            print(f"    ... og {len(extra) - 5} til")
+        warnings += 1
+    else:
+        print("  OK: Ingen uautoriserte filer")
+
+    # Result
+    print()
+    if ok and quick:
+        print(f"  HURTIGSJEKK BESTATT — metadata uendret (innhold ikke hashet)")
+    elif ok:
+        if warnings:
+            print(f"  VERIFISERING BESTATT med {warnings} advarsel(er)")
+        else:
+            print(f"  VERIFISERING BESTATT — alle filer er uendret")
+    else:
+        print(f"  VERIFISERING FEILET — filer kan ha blitt endret")
+
+    progress.done(ok)
+    return ok
+
+
+def _rel_matches(rel: str, patterns: list[str]) -> bool:
+    """True if rel equals, lies under, or glob-matches one of patterns."""
+    rel_n = os.path.normcase(rel)
+    for pattern in patterns:
+        pat_n = os.path.normcase(os.path.normpath(pattern))
+        if rel_n == pat_n or rel_n.startswith(pat_n + os.sep) or fnmatch.fnmatchcase(rel_n, pat_n):
+            return True
+    return False
+
+
+def verify_subset(target_path: str, patterns: list[str],
+                  output_dir: Optional[str] = None,
+                  quick: bool = False, check_mtime: bool = False,
+                  jobs: Optional[int] = None, backend: str = "thread",
+                  hash_io: Optional[HashIO] = None, on_event=None,
+                  workers: Optional[list[str]] = None, token: Optional[str] = None) -> bool:
+    """
+    Verify only the files matching patterns (relative paths, folders or globs).
+    Each selected manifest row is tied to the stored root with an inclusion
+    proof from merkle_tree.bin (or, for older audits without the sidecar, by
+    recomputing the root from manifest hashes), and only the selected files
+    are hashed. Unlisted files on disk are not looked for.
+    quick, check_mtime, jobs, backend, hash_io, workers, token: as for
+    verify(), applied to the selected files.
+    on_event: progress callback as for verify(); phases are "merkle"
+    (selecting rows), "metadata" and "hash" over the selected files.
+    Returns True if all checks pass.
+    """
+    if backend not in HASH_BACKENDS:
+        raise ValueError(f"Unknown hashing backend: {backend}")
+    target = Path(target_path).resolve()
+    if output_dir is None:
+        output_dir = str(target / ".asi-omega")
+    out = Path(output_dir)
+    if jobs is None:
+        jobs = default_jobs()
+    progress = ProgressReporter(on_event, "verify")
+    progress.start(str(target))
+
+    manifest_path = out / "manifest.csv"
+    tree_path = out / MERKLE_TREE_NAME
+    audit_state = _load_audit(target, out, progress)
+    if audit_state is None:
+        progress.done(False)
+        return False
+    stored_root, dod = audit_state
+    sharding = dod.get("sharding")
+    progress.phase("merkle", dod.get("file_count"))
+
+    # Stream the manifest, keeping only selected rows and their leaf index.
+    # Rows from manifest.bin are safe to use: each one is checked against
+    # the stored root below. Sharded audits have no per-file proofs, so
+    # their rows are read from manifest.csv in the same pass that rebuilds
+    # the shard roots.
+    selected = []
+    all_hashes = [] if not tree_path.exists() and not sharding else None
+    bm = None if sharding else open_binary_manifest(str(out), stored_root)
+    rows = bm if bm is not None else iter_manifest(str(manifest_path))
+
+    def select(rows: Iterable[dict]) -> Iterator[dict]:
+        for index, e in enumerate(rows):
+            if all_hashes is not None:
+                all_hashes.append(e["sha256"])
+            if _rel_matches(e["rel"], patterns):
+                selected.append((index, e))
+            progress.advance(e["rel"])
+            yield e
+
+    recomputed = None
+    try:
+        if sharding:
+            recomputed = build_shards(select(rows), sharding)
+        else:
+            for _ in select(rows):
+                pass
+    finally:
+        if bm is not None:
+            bm.close()
+
+    print(f"  VERIFISERER UTVALG: {target}")
+    print(f"  {len(selected)} filer valgt ({', '.join(patterns)})")
+    print()
+
+    if not selected:
+        print("  FEIL: Ingen filer i manifest matcher utvalget")
+        progress.failure("empty", detail=patterns)
+        progress.done(False)
+        return False
+
+    # Check 1: DoD merkle_root matches merkle_root.txt
+    ok = _check_dod_root(dod, stored_root, progress)
+
+    # Check 2: Selected manifest rows belong to the stored root
+    if sharding:
+        ok = check_shard_roots(recomputed, dod, stored_root, progress) and ok
+    elif all_hashes is None:
+        # One open sidecar for all proofs; a bad sidecar proves nothing
+        not_included = []
+        try:
+            with MerkleTreeFile(str(tree_path)) as tree_file:
+                for index, e in selected:
+                    try:
+                        computed = merkle_root_from_path(e["sha256"], index, len(tree_file),
+                                                         tree_file.path(index))
+                    except (IndexError, ValueError):
+                        computed = None
+                    if computed != stored_root:
+                        not_included.append(e["rel"])
+        except (OSError, ValueError):
+            not_included = [e["rel"] for _, e in selected]
+        if not_included:
+            for rel in not_included:
+                progress.failure("merkle_root_mismatch", rel)
+            for rel in not_included[:5]:
+                print(f"  FEIL: Inklusjonsbevis feiler: {rel}")
+            print(f"  FEIL: {len(not_included)} manifest-rad(er) er ikke med i Merkle-roten")
+            ok = False
+        else:
+            print(f"  OK: Inklusjonsbevis matcher Merkle-rot for alle {len(selected)} filer")
+    else:
+        if build_merkle_tree(all_hashes) == stored_root:
+            print("  OK: Merkle-rot (reberegnet) matcher")
+        else:
+            print("  FEIL: Merkle-rot MATCHER IKKE — manifest kan vaere endret")
+            progress.failure("merkle_root_mismatch")
+            ok = False
+
+    # Check 3a: Metadata tier — existence and size of the selected files
+    progress.phase("metadata", len(selected))
+    stored_stats = None
+    if check_mtime:
+        stored_stats = _read_stat_cache(str(out / STAT_CACHE_NAME)).get("entries", {})
+    files_missing = 0
+    files_resized = 0
+    mtime_changed = 0
+    candidates = []
+    for _, e in selected:
+        # Relative to the target, as verify() walks it, so a moved folder still verifies
+        filepath = os.path.join(str(target), e["rel"])
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            st = None
+        progress.advance(e["rel"])
+        if st is None or not stat.S_ISREG(st.st_mode):
+            print(f"  FEIL: FIL MANGLER: {e['rel']}")
+            progress.failure("missing", e["rel"])
+            files_missing += 1
+            ok = False
+            continue
+        if e.get("size") not in (None, "") and st.st_size != int(e["size"]):
+            print(f"  FEIL: ENDRET STORRELSE: {e['rel']}")
+            print(f"        Forventet: {int(e['size']):,} bytes")
+            print(f"        Faktisk:   {st.st_size:,} bytes")
+            progress.failure("resized", e["rel"],
+                             {"expected": int(e["size"]), "actual": st.st_size})
+            files_resized += 1
+            ok = False
+            continue
+        if stored_stats is not None:
+            row = stored_stats.get(e["rel"])
+            if row is not None and row[1] != st.st_mtime_ns:
+                print(f"  ADVARSEL: ENDRET TIDSSTEMPEL: {e['rel']}")
+                progress.warning("mtime", e["rel"])
+                mtime_changed += 1
+        candidates.append((filepath, e["rel"], e["sha256"], st.st_size))
+
+    if len(candidates) == len(selected):
+        print(f"  OK: Metadata (eksistens og storrelse) stemmer for alle {len(selected)} valgte filer")
+    else:
+        if files_missing:
+            print(f"  FEIL: {files_missing} fil(er) mangler")
+        if files_resized:
+            print(f"  FEIL: {files_resized} fil(er) har endret storrelse")
+    if mtime_changed:
+        print(f"  ADVARSEL: {mtime_changed} fil(er) har endret tidsstempel")
+
+    # Check 3b: Content tier — hash only the candidates, on the usual pool
+    files_ok = 0
+    if quick:
+        print(f"  INFO: --quick: innholdshashing hoppet over ({len(candidates)} filer)")
+    else:
+        progress.phase("hash", len(candidates), sum(c[3] for c in candidates))
+        failed_workers = []
+        if workers:
+            print(f"  INFO: Innholdshashing fordelt paa {len(workers)} arbeider(e)")
+            digests = _distributed_digests(target, candidates, workers, token, jobs, backend,
+                                           hash_io, failed=failed_workers)
+        else:
+            digests = _candidate_digests(target, candidates, jobs, backend, hash_io)
+        counts = _check_contents(candidates, digests, progress)
+        files_ok = counts["ok"]
+        if files_ok < len(candidates):
+            ok = False
+        for url, error in failed_workers:
+            print(f"  ADVARSEL: Arbeider {url} feilet ({error}); omraadene ble flyttet")
+        if files_ok == len(selected):
+            print(f"  OK: Alle {files_ok} valgte filer verifisert")
+        if counts["missing"]:
+            print(f"  FEIL: {counts['missing']} fil(er) forsvant under hashing")
+        if counts["modified"]:
+            print(f"  FEIL: {counts['modified']} fil(er) endret")
+        if counts["unreadable"]:
+            print(f"  FEIL: {counts['unreadable']} fil(er) kunne ikke leses")
+
+    print()
+    if ok and quick:
+        print(f"  HURTIGSJEKK BESTATT — metadata for {len(selected)} valgte filer uendret"
+              f" (innhold ikke hashet)")
+    elif ok:
+        print(f"  VERIFISERING BESTATT — {files_ok} valgte filer er uendret")
+    else:
+        print(f"  VERIFISERING FEILET — filer kan ha blitt endret")
+
+    progress.done(ok)
+    return ok
+
+
+# ─────────────────────────────────────────────────────
+# Distributed verification — coordinator and workers
+# ─────────────────────────────────────────────────────
+#
+# verify --workers URL... keeps the manifest, Merkle and metadata checks on
+# the coordinator and sends the content tier to workers ('asi-omega worker')
+# over HTTP: POST /v1/hash with {"target", "rows": [[rel, sha256, size]]}
+# returns {"ok", "bytes", "mismatches": [[row index, actual sha256 or null]]}.
+# Rows are handed out in ranges from a shared queue, so faster workers take
+# more ranges; a range from a failed worker goes back on the queue.
+
+WORKER_PORT = 8765
+WORKER_RANGE_SIZE = 1000     # manifest rows per request
+WORKER_INFLIGHT = 2          # requests in flight per worker
+WORKER_TIMEOUT = 3600        # seconds to wait for one range
+WORKER_MAX_REQUEST = 256 * 1024 * 1024
+WORKER_TOKEN_HEADER = "X-ASI-Omega-Token"
+
+
+def _hash_rows(target: Path, rows: list, jobs: int, backend: str,
+               hash_io: Optional[HashIO] = None) -> dict:
+    """
+    Hash target/rel for [rel, sha256, size] rows. Returns the worker reply:
+    matching rows are only counted; mismatches carry the actual digest, or
+    None for files that are missing or unreadable.
+    """
+    items, indices, mismatches = [], [], []
+    for i, (rel, _, _) in enumerate(rows):
+        filepath = os.path.join(str(target), rel)
+        if os.path.isfile(filepath):
+            items.append((filepath, rel))
+            indices.append(i)
+        else:
+            mismatches.append([i, None])
+    try:
+        digests = [e["sha256"] for e in _hash_stream(target, items, jobs, backend, hash_io)]
+    except OSError:
+        # A file vanished mid-run: redo this range one file at a time
+        digests = []
+        for filepath, _ in items:
+            try:
+                digests.append(sha256_file(filepath, hash_io))
+            except OSError:
+                digests.append(None)
+    nbytes = 0
+    for i, digest in zip(indices, digests):
+        if digest != rows[i][1]:
+            mismatches.append([i, digest])
+        elif rows[i][2] not in (None, ""):
+            nbytes += int(rows[i][2])
+    mismatches.sort()
+    return {"ok": len(rows) - len(mismatches), "bytes": nbytes, "mismatches": mismatches}
+
 
+def _safe_rel(rel: str) -> bool:
+    parts = rel.replace("\\", "/").split("/")
+    return (bool(rel) and not os.path.isabs(rel) and not os.path.splitdrive(rel)[0]
+            and ".." not in parts)
 
-# ─────────────────────────────────────────────────────
-# RFC 6962 Merkle tree with domain separation
-# ─────────────────────────────────────────────────────
 
-LEAF_PREFIX = b"\x00"
-NODE_PREFIX = b"\x01"
+def _worker_rows(rows) -> list:
+    """
+    Validate the [rel, sha256, size] rows of a hash request and return them
+    with rel in local form: the coordinator may use either separator.
+    Raises ValueError or TypeError for anything malformed.
+    """
+    parsed = []
+    for rel, sha, size in rows:
+        if not isinstance(rel, str) or not isinstance(sha, str):
+            raise TypeError("rel and sha256 must be strings")
+        if size not in (None, ""):
+            size = int(size)
+        if not _safe_rel(rel):
+            raise ValueError(f"rel outside target: {rel}")
+        parsed.append([os.path.normpath(rel.replace("\\", "/")), sha, size])
+    return parsed
 
 
-def merkle_leaf(data: str) -> str:
-    """Hash a leaf: SHA-256(0x00 || data)"""
-    return sha256_bytes(LEAF_PREFIX + data.encode("utf-8"))
+def _map_target(target: str, path_map: Optional[tuple[str, str]]) -> str:
+    """Apply (coordinator prefix, local prefix) to target on a path boundary."""
+    if not path_map:
+        return target
+    prefix = path_map[0].rstrip("/\\")
+    rest = target[len(prefix):]
+    if target.startswith(prefix) and (not rest or rest[0] in "/\\"):
+        return path_map[1].rstrip("/\\") + rest
+    return target
 
 
-def merkle_node(left: str, right: str) -> str:
-    """Hash an internal node: SHA-256(0x01 || left || right)"""
-    combined = NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)
-    return sha256_bytes(combined)
+def _within_roots(target: str, roots: list[str]) -> bool:
+    """True if target, with symlinks resolved, is one of roots or below one."""
+    real = os.path.normcase(os.path.realpath(target))
+    for root in roots:
+        root = os.path.normcase(os.path.realpath(root))
+        try:
+            if os.path.commonpath([real, root]) == root:
+                return True
+        except ValueError:  # different drives
+            continue
+    return False
 
 
-def build_merkle_tree(hashes: list[str]) -> str:
+def serve_worker(roots: list[str], host: str = "127.0.0.1", port: int = WORKER_PORT,
+                 jobs: Optional[int] = None, backend: str = "thread",
+                 hash_io: Optional[HashIO] = None, token: Optional[str] = None,
+                 path_map: Optional[tuple[str, str]] = None, ready=None):
     """
-    Build RFC 6962 Merkle tree from a list of hex hash strings.
-    Returns the root hash. Raises ValueError if list is empty.
+    Serve hashing requests from verify --workers until interrupted.
+    roots: folders the worker may hash under; any other target (after
+    path_map) is refused, so the worker is not a hash oracle for every
+    file its user can read.
+    token: shared secret the coordinator must send (recommended whenever
+    host is not loopback). path_map: (coordinator prefix, local prefix)
+    for hosts that mount the same storage at a different path.
+    ready: optional callback receiving the server once it is listening.
     """
-    if not hashes:
-        raise ValueError("Cannot build Merkle tree from empty list")
+    if not roots:
+        raise ValueError("serve_worker needs at least one root folder")
+    import hmac
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-    # Leaf layer: apply domain separation
-    nodes = [merkle_leaf(h) for h in hashes]
-
-    # Build tree bottom-up
-    while len(nodes) > 1:
-        next_level = []
-        for i in range(0, len(nodes), 2):
-            if i + 1 < len(nodes):
-                next_level.append(merkle_node(nodes[i], nodes[i + 1]))
-            else:
-                # Odd node: promote (RFC 6962 padding)
-                next_level.append(nodes[i])
-        nodes = next_level
+    if jobs is None:
+        jobs = default_jobs()
 
-    return nodes[0]
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
 
+        def _authorized(self) -> bool:
+            if token is None:
+                return True
+            sent = self.headers.get(WORKER_TOKEN_HEADER, "")
+            return hmac.compare_digest(sent.encode("utf-8"), token.encode("utf-8"))
 
-# ─────────────────────────────────────────────────────
-# Manifest — scan files, store hashes with original paths
-# ─────────────────────────────────────────────────────
+        def do_GET(self):
+            if self.path != "/v1/ping":
+                return self._reply(404, {"error": "not found"})
+            if not self._authorized():
+                return self._reply(403, {"error": "bad token"})
+            self._reply(200, {"ok": True, "jobs": jobs, "backend": backend})
 
-def scan_directory(target_path: str) -> list[dict]:
-    """Scan all files in target_path, return list of {path, rel, sha256, size}."""
-    target = Path(target_path).resolve()
-    if not target.is_dir():
-        raise FileNotFoundError(f"Directory not found: {target_path}")
+        def do_POST(self):
+            if self.path != "/v1/hash":
+                return self._reply(404, {"error": "not found"})
+            if not self._authorized():
+                return self._reply(403, {"error": "bad token"})
+            length = int(self.headers.get("Content-Length", 0))
+            if not 0 < length <= WORKER_MAX_REQUEST:
+                return self._reply(413, {"error": "bad request size"})
+            try:
+                request = json.loads(self.rfile.read(length))
+                target, rows = request["target"], _worker_rows(request["rows"])
+                if not isinstance(target, str):
+                    raise TypeError("target must be a string")
+            except (ValueError, KeyError, TypeError) as exc:
+                return self._reply(400, {"error": f"bad request: {exc}"})
+            target = _map_target(target, path_map)
+            if not _within_roots(target, roots):
+                return self._reply(403, {"error": f"target outside worker roots: {target}"})
+            if not os.path.isdir(target):
+                return self._reply(404, {"error": f"target not found: {target}"})
+            result = _hash_rows(Path(target), rows, jobs, backend, hash_io)
+            print(f"  INFO: [{datetime.datetime.now():%H:%M:%S}] {len(rows)} filer fra "
+                  f"{self.client_address[0]}, {len(result['mismatches'])} avvik", flush=True)
+            self._reply(200, result)
 
-    entries = []
-    for filepath in sorted(target.rglob("*")):
-        if filepath.is_file() and ".asi-omega" not in filepath.parts:
-            rel = filepath.relative_to(target)
-            entries.append({
-                "path": str(filepath),
-                "rel": str(rel),
-                "sha256": sha256_file(str(filepath)),
-                "size": filepath.stat().st_size,
-            })
-    return entries
+        def log_message(self, format, *args):
+            pass  # one INFO line per range is printed instead
 
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"  ARBEIDER: http://{host}:{server.server_address[1]} "
+          f"({jobs} jobber, {backend}){' med token' if token else ''}", flush=True)
+    for root in roots:
+        print(f"  INFO: Tillatt rot: {os.path.realpath(root)}", flush=True)
+    if ready:
+        ready(server)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
 
-def write_manifest(entries: list[dict], output_path: str):
-    """Write manifest as CSV."""
-    with open(output_path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=["path", "rel", "sha256", "size"])
-        writer.writeheader()
-        writer.writerows(entries)
 
+def _post_json(url: str, payload: dict, token: Optional[str] = None,
+               timeout: float = WORKER_TIMEOUT) -> dict:
+    import urllib.request
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers[WORKER_TOKEN_HEADER] = token
+    request = urllib.request.Request(url, data=json.dumps(payload).encode("utf-8"),
+                                     headers=headers, method="POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
 
-def read_manifest(manifest_path: str) -> list[dict]:
-    """Read manifest CSV, return list of dicts."""
-    with open(manifest_path, "r", encoding="utf-8") as f:
-        return list(csv.DictReader(f))
+
+def _distributed_digests(target: Path, candidates: list, workers: list[str],
+                         token: Optional[str] = None, jobs: int = 1,
+                         backend: str = "thread", hash_io: Optional[HashIO] = None,
+                         range_size: int = WORKER_RANGE_SIZE,
+                         failed: Optional[list] = None) -> Iterator[Optional[str]]:
+    """
+    Actual digest per (path, rel, sha256, size) candidate, in candidate
+    order, hashed by the workers (None = missing on the worker). Ranges
+    left over when every worker has failed are hashed locally. Failed
+    workers are appended to `failed` as (url, error).
+    """
+    ranges = [candidates[i:i + range_size] for i in range(0, len(candidates), range_size)]
+    todo = queue.Queue()
+    for r in range(len(ranges)):
+        todo.put(r)
+    done: dict[int, dict] = {}
+    cond = threading.Condition()
+    failed = failed if failed is not None else []
+
+    def run(url: str):
+        while True:
+            try:
+                r = todo.get_nowait()
+            except queue.Empty:
+                return
+            rows = [[rel, expected, size] for _, rel, expected, size in ranges[r]]
+            try:
+                reply = _post_json(url.rstrip("/") + "/v1/hash",
+                                   {"target": str(target), "rows": rows}, token)
+                mismatches = {int(i): actual for i, actual in reply["mismatches"]}
+            except (OSError, ValueError, KeyError, TypeError) as exc:
+                todo.put(r)
+                with cond:
+                    if url not in (u for u, _ in failed):
+                        failed.append((url, str(exc)))
+                    cond.notify_all()
+                return
+            with cond:
+                done[r] = mismatches
+                cond.notify_all()
+
+    threads = [threading.Thread(target=run, args=(url,), daemon=True)
+               for url in workers for _ in range(WORKER_INFLIGHT)]
+    for t in threads:
+        t.start()
+
+    for r, chunk in enumerate(ranges):
+        with cond:
+            while r not in done and any(t.is_alive() for t in threads):
+                cond.wait(timeout=1.0)
+        if r not in done:
+            # No worker left: hash what is still queued here
+            while True:
+                try:
+                    left = todo.get_nowait()
+                except queue.Empty:
+                    break
+                rows = [[rel, expected, size] for _, rel, expected, size in ranges[left]]
+                reply = _hash_rows(target, rows, jobs, backend, hash_io)
+                done[left] = {i: actual for i, actual in reply["mismatches"]}
+        mismatches = done.pop(r)
+        for i, (_, _, expected, _) in enumerate(chunk):
+            yield mismatches.get(i, expected)
 
 
 # ─────────────────────────────────────────────────────
-# Audit — full pipeline
+# Watch — continuous verification (asi-omega watch)
 # ─────────────────────────────────────────────────────
 
-def audit(target_path: str, output_dir: Optional[str] = None) -> dict:
+WATCH_POLL_INTERVAL = 5.0  # seconds between polling passes
+WATCH_SETTLE = 0.5          # wait this long after the last event before hashing
+WATCH_MAX_DELAY = 2.0       # hash pending files at least this often under constant events
+
+# inotify(7) constants
+_IN_MODIFY = 0x00000002
+_IN_ATTRIB = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ONLYDIR = 0x01000000
+_IN_DONT_FOLLOW = 0x02000000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_IN_WATCH_MASK = (_IN_MODIFY | _IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+                  | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF
+                  | _IN_ONLYDIR | _IN_DONT_FOLLOW)
+_INOTIFY_EVENT = struct.Struct("iIII")
+
+
+class _Inotify:
     """
-    Run full audit on target_path.
-    Creates: manifest.csv, merkle_root.txt, dod.json, rapport.txt
-    Returns audit result dict.
+    Minimal recursive inotify watcher over ctypes (Linux only). read()
+    returns the relative paths touched since the last call, plus the
+    relative directories that must be rescanned in full: new or moved-in
+    directories, and "" after a queue overflow. Raises OSError when
+    inotify is unavailable or the watch limit is reached, so the caller
+    can fall back to polling.
+    """
+
+    def __init__(self, target: Path):
+        import ctypes
+        import ctypes.util
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify requires Linux")
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.target = target
+        self.dirs: dict[int, str] = {}  # watch descriptor -> rel dir ("" for the root)
+
+    def add_tree(self, rel_dir: str = ""):
+        """Watch rel_dir and every directory below it (except .asi-omega)."""
+        stack = [rel_dir]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(str(self.target), rel) if rel else str(self.target)
+            wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), _IN_WATCH_MASK)
+            if wd < 0:
+                err = self._ctypes.get_errno()
+                if err == 28:  # ENOSPC: fs.inotify.max_user_watches reached
+                    raise OSError(err, "inotify watch limit reached")
+                continue  # vanished or unreadable directory
+            self.dirs[wd] = rel
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if entry.name != ".asi-omega" and entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.name if not rel else rel + os.sep + entry.name)
+            except OSError:
+                pass
+
+    def read(self, timeout: Optional[float]) -> tuple[set, set]:
+        import select
+        touched, rescan = set(), set()
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return touched, rescan
+        data = b""
+        while True:
+            try:
+                chunk = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _INOTIFY_EVENT.unpack_from(data, offset)
+            offset += _INOTIFY_EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                rescan.add("")
+                continue
+            if mask & _IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            rel_dir = self.dirs.get(wd)
+            if rel_dir is None or not name or name == ".asi-omega":
+                continue
+            rel = name if not rel_dir else rel_dir + os.sep + name
+            if mask & _IN_ISDIR:
+                if mask & (_IN_CREATE | _IN_MOVED_TO):
+                    self.add_tree(rel)
+                # Files under a directory that came or went are all touched
+                rescan.add(rel)
+            else:
+                touched.add(rel)
+        return touched, rescan
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _watch_snapshot(target: Path, rel_dir: str = "") -> dict[str, tuple]:
+    """{rel: stat key} for every file under target/rel_dir."""
+    base = target / rel_dir if rel_dir else target
+    prefix = rel_dir + os.sep if rel_dir else ""
+    snapshot = {}
+    if not base.is_dir():
+        return snapshot
+    for _, rel, entry in _walk_entries(base):
+        try:
+            snapshot[prefix + rel] = _stat_key(entry.stat())
+        except OSError:
+            pass
+    return snapshot
+
+
+def watch(target_path: str, output_dir: Optional[str] = None, poll: bool = False,
+          interval: float = WATCH_POLL_INTERVAL, hash_io: Optional[HashIO] = None,
+          on_event=None, stop: Optional[threading.Event] = None) -> bool:
+    """
+    Watch an audited folder and report changes against its manifest as
+    they happen, until interrupted (Ctrl+C) or `stop` is set.
+    Uses inotify on Linux and falls back to polling stat() every
+    `interval` seconds elsewhere, or when poll=True or inotify fails.
+    Only touched files are rehashed, once no new events have arrived
+    for WATCH_SETTLE seconds, and at the latest WATCH_MAX_DELAY seconds
+    after the oldest pending event, so a file written without pause does
+    not hold back the others. A file is reported when its state changes:
+    modified, deleted, new, or restored to its audited content.
+    At startup the manifest is checked against merkle_root.txt and
+    dod.json (as verify does); watching does not start if they disagree.
+    Then one metadata pass (as verify --quick) reports missing,
+    resized and extra files; files whose stat differs from
+    stat_cache.json are hashed. Without a stat cache, contents are
+    assumed to match until touched; run verify once for a full check.
+    on_event: progress callback, see ProgressReporter (command "watch").
+    Returns True if every file matched the manifest when watching stopped.
     """
     target = Path(target_path).resolve()
     if output_dir is None:
         output_dir = str(target / ".asi-omega")
     out = Path(output_dir)
-    out.mkdir(parents=True, exist_ok=True)
+    manifest_path = out / "manifest.csv"
+    audit_state = _load_audit(target, out)
+    if audit_state is None:
+        return False
+    stored_root, dod = audit_state
 
-    # Step 1: Scan files
-    print(f"  [1/3] Scanner filer i {target}...")
-    entries = scan_directory(str(target))
-    print(f"        {len(entries)} filer registrert")
+    expected = {e["rel"]: (e["sha256"], int(e["size"]) if e.get("size") not in (None, "") else None)
+                for e in iter_manifest(str(manifest_path))}
+    stored_stats = _read_stat_cache(str(out / STAT_CACHE_NAME)).get("entries", {})
+    progress = ProgressReporter(on_event, "watch")
+    progress.start(str(target))
 
-    # Step 2: Write manifest
-    manifest_path = out / "manifest.csv"
-    write_manifest(entries, str(manifest_path))
+    # The manifest is the reference for everything below: tie it to the root
+    print(f"  OVERVAKER: {target}")
+    print(f"  {len(expected)} filer i manifest")
+    trusted = _check_dod_root(dod, stored_root, progress)
+    if dod.get("sharding"):
+        shards = build_shards(iter_manifest(str(manifest_path)), dod["sharding"])
+        trusted = check_shard_roots(shards, dod, stored_root, progress) and trusted
+    elif build_merkle_tree([sha for sha, _ in expected.values()]) == stored_root:
+        print("  OK: Merkle-rot (reberegnet) matcher")
+    else:
+        print("  FEIL: Merkle-rot MATCHER IKKE — manifest kan vaere endret")
+        progress.failure("merkle_root_mismatch")
+        trusted = False
+    if not trusted:
+        print("  OVERVAKING IKKE STARTET — manifestet kan ikke brukes som referanse")
+        progress.done(False)
+        return False
 
-    # Step 3: Build Merkle tree
-    if not entries:
-        print("  FEIL: Ingen filer funnet i mappen.")
-        sys.exit(1)
-    print("  [2/3] Bygger Merkle-tre (RFC 6962)...")
-    hashes = [e["sha256"] for e in entries]
-    root = build_merkle_tree(hashes)
-    print(f"        Merkle-rot: {root[:16]}...")
+    # rel -> "ok" | "modified" | "missing" | "extra"; only transitions are reported
+    state = {rel: "ok" for rel in expected}
 
-    merkle_path = out / "merkle_root.txt"
-    merkle_path.write_text(root, encoding="utf-8")
+    def stamp() -> str:
+        return datetime.datetime.now().strftime("%H:%M:%S")
 
-    # Step 4: Generate DoD report
-    print("  [3/3] Genererer rapport...")
-    now = datetime.datetime.now(datetime.timezone.utc)
-    dod = {
-        "schema_version": 2,
-        "merkle_root": root,
-        "generated": now.isoformat(),
-        "target_path": str(target),
-        "file_count": len(entries),
-        "total_size_bytes": sum(int(e["size"]) for e in entries),
-        "platform": sys.platform,
-    }
-    dod_path = out / "dod.json"
-    dod_path.write_text(json.dumps(dod, indent=2, ensure_ascii=False), encoding="utf-8")
+    def report(rel: str, new: str, detail=None):
+        old = state.get(rel, "ok" if rel in expected else None)
+        if new == old:
+            return
+        if new == "ok":
+            print(f"  OK: [{stamp()}] GJENOPPRETTET: {rel}")
+            progress.resolved(old, rel)
+        elif new == "modified":
+            print(f"  FEIL: [{stamp()}] ENDRET: {rel}")
+            progress.failure("modified", rel, detail)
+        elif new == "missing":
+            print(f"  FEIL: [{stamp()}] FIL MANGLER: {rel}")
+            progress.failure("missing", rel)
+        elif new == "extra":
+            print(f"  ADVARSEL: [{stamp()}] NY FIL: {rel}")
+            progress.warning("extra", rel)
+        elif new is None:
+            print(f"  INFO: [{stamp()}] Ny fil fjernet igjen: {rel}")
+            progress.resolved(old, rel)
+        if new is None:
+            state.pop(rel, None)
+        else:
+            state[rel] = new
 
-    # Step 5: Human-readable report
-    rapport = generate_report(entries, dod)
-    rapport_path = out / "rapport.txt"
-    rapport_path.write_text(rapport, encoding="utf-8")
+    def check(rels: Iterable[str]):
+        """Compare touched files with the manifest, hashing only what exists."""
+        to_hash = []
+        for rel in sorted(rels, key=walk_sort_key):
+            filepath = os.path.join(str(target), rel)
+            try:
+                st = os.stat(filepath)
+            except OSError:
+                st = None
+            if st is None or not stat.S_ISREG(st.st_mode):
+                report(rel, "missing" if rel in expected else None)
+                snapshot.pop(rel, None)
+                continue
+            snapshot[rel] = _stat_key(st)
+            if rel not in expected:
+                report(rel, "extra")
+            elif expected[rel][1] is not None and st.st_size != expected[rel][1]:
+                report(rel, "modified", {"expected_size": expected[rel][1], "actual_size": st.st_size})
+            else:
+                to_hash.append((filepath, rel))
+        for filepath, rel in to_hash:
+            try:
+                digest = sha256_file(filepath, hash_io)
+            except OSError:
+                report(rel, "missing")
+                continue
+            if digest == expected[rel][0]:
+                report(rel, "ok")
+            else:
+                report(rel, "modified", {"expected": expected[rel][0], "actual": digest})
 
-    print()
-    print(f"  AUDIT FULLFORT")
-    print(f"  Filer:       {len(entries)}")
-    print(f"  Merkle-rot:  {root[:16]}...")
-    print(f"  Tidspunkt:   {now.strftime('%Y-%m-%d %H:%M:%S')} UTC")
-    print(f"  Utdata:      {out}")
-    print()
-    print(f"  Verifiser senere:")
-    print(f"    asi-omega verify \"{target}\"")
+    # Watch before the startup pass, so changes made during it are not lost
+    notifier = None
+    if not poll:
+        try:
+            notifier = _Inotify(target)
+            notifier.add_tree()
+        except OSError as exc:
+            if notifier is not None:
+                notifier.close()
+            notifier = None
+            print(f"  INFO: inotify utilgjengelig ({exc}), bruker polling")
+
+    # Startup: one metadata pass, hashing only files the stat cache can't vouch for
+    snapshot = _watch_snapshot(target)
+    suspects = [rel for rel in set(snapshot) | set(expected)
+                if rel not in snapshot or rel not in expected
+                or (stored_stats and tuple(stored_stats.get(rel, ()))[:4] != snapshot[rel])
+                or (expected[rel][1] is not None and snapshot[rel][0] != expected[rel][1])]
+    check(suspects)
+    if not stored_stats:
+        print("  INFO: Ingen stat-cache; innhold antas uendret til filer endres."
+              " Kjoer 'asi-omega verify' for full kontroll.")
+
+    if notifier:
+        print(f"  INFO: Overvaker {len(notifier.dirs)} mapper med inotify (Ctrl+C for aa stoppe)")
+    else:
+        print(f"  INFO: Poller hvert {interval:g}. sekund (Ctrl+C for aa stoppe)")
     print()
 
-    return dod
+    stop = stop or threading.Event()
+    pending: set[str] = set()
+    deadline = None   # latest time to check what is pending
+    try:
+        while not stop.is_set():
+            if notifier:
+                # Block until an event arrives; short timeouts only while settling
+                timeout = 1.0
+                if pending:
+                    timeout = max(0.0, min(WATCH_SETTLE, deadline - time.monotonic()))
+                touched, rescan = notifier.read(timeout)
+                for rel_dir in rescan:
+                    current = _watch_snapshot(target, rel_dir)
+                    prefix = rel_dir + os.sep if rel_dir else ""
+                    touched |= set(current)
+                    touched |= {rel for rel in state if rel.startswith(prefix)}
+                if touched:
+                    if not pending:
+                        deadline = time.monotonic() + WATCH_MAX_DELAY
+                    pending |= touched
+                    if time.monotonic() < deadline:
+                        continue
+            else:
+                if stop.wait(interval):
+                    break
+                current = _watch_snapshot(target)
+                pending |= {rel for rel in set(current) | set(snapshot)
+                            if current.get(rel) != snapshot.get(rel)}
+            if pending:
+                check(pending)
+                pending.clear()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if notifier:
+            notifier.close()
+
+    failures = sum(1 for s in state.values() if s in ("modified", "missing"))
+    extra = sum(1 for s in state.values() if s == "extra")
+    print()
+    if failures:
+        print(f"  OVERVAKING STOPPET — {failures} fil(er) avviker fra manifest")
+    elif extra:
+        print(f"  OVERVAKING STOPPET — uendret, {extra} ny(e) fil(er)")
+    else:
+        print("  OVERVAKING STOPPET — alle filer er uendret")
+    progress.done(failures == 0)
+    return failures == 0
 
 
 # ─────────────────────────────────────────────────────
-# Verify — check all files against manifest
+# Prove — inclusion proof for a single file
 # ─────────────────────────────────────────────────────
 
-def verify(target_path: str, output_dir: Optional[str] = None) -> bool:
+PROOF_VERSION = 1
+
+
+def _normalize_rel(rel: str) -> str:
+    return os.path.normcase(os.path.normpath(rel))
+
+
+def _find_manifest_entry(manifest_path: str, rel: str) -> tuple[int, Optional[dict]]:
+    """Stream the manifest and return (leaf index, entry) for rel, or (-1, None)."""
+    wanted = _normalize_rel(rel)
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        for index, e in enumerate(csv.DictReader(f)):
+            if _normalize_rel(e["rel"]) == wanted:
+                return index, e
+    return -1, None
+
+
+def prove(target_path: str, rel: str, output_dir: Optional[str] = None) -> dict:
     """
-    Verify files against stored audit.
-    Returns True if all checks pass.
+    Build an inclusion proof (audit path) for one file from the stored tree.
+    Does not rebuild the tree or hash other files. The file is found by
+    binary search in manifest.bin (audit --binary-manifest); without it,
+    manifest.csv is scanned up to the file, which is O(n).
+    For sharded audits the proof runs from the file to its shard root
+    (leaf_index, tree_size, audit_path) and on to the top root ("shard");
+    the shard's tree is rebuilt from its manifest rows.
+    Raises FileNotFoundError if the audit or sidecar is missing and
+    KeyError if rel is not in the manifest.
     """
     target = Path(target_path).resolve()
     if output_dir is None:
@@ -203,99 +3542,159 @@ def verify(target_path: str, output_dir: Optional[str] = None) -> bool:
     out = Path(output_dir)
 
     manifest_path = out / "manifest.csv"
-    merkle_path = out / "merkle_root.txt"
     dod_path = out / "dod.json"
+    if dod_path.exists():
+        dod = json.loads(dod_path.read_text(encoding="utf-8"))
+        if dod.get("sharding"):
+            return _prove_sharded(manifest_path, dod, rel)
 
-    # Check required files exist
-    missing = []
-    for f, name in [(manifest_path, "manifest.csv"), (merkle_path, "merkle_root.txt"), (dod_path, "dod.json")]:
+    tree_path = out / MERKLE_TREE_NAME
+    for f in (manifest_path, tree_path):
         if not f.exists():
-            missing.append(name)
-    if missing:
-        print(f"  FEIL: Mangler filer: {', '.join(missing)}")
-        print(f"  Kjoer 'asi-omega audit \"{target}\"' foerst.")
-        return False
+            raise FileNotFoundError(f"Missing {f.name} in {out}")
 
-    entries = read_manifest(str(manifest_path))
-    stored_root = merkle_path.read_text(encoding="utf-8").strip()
-    dod = json.loads(dod_path.read_text(encoding="utf-8"))
+    bm = open_binary_manifest(str(out))
+    if bm is not None:
+        with bm:
+            leaf_index, entry = bm.find(rel)
+    else:
+        leaf_index, entry = _find_manifest_entry(str(manifest_path), rel)
+    if entry is None:
+        raise KeyError(rel)
+
+    tree_size, audit_path, root = read_merkle_path(str(tree_path), leaf_index)
+    # Guard against a sidecar that does not belong to this manifest
+    if merkle_root_from_path(entry["sha256"], leaf_index, tree_size, audit_path) != root:
+        raise ValueError(f"{MERKLE_TREE_NAME} does not match manifest.csv")
+
+    return {
+        "version": PROOF_VERSION,
+        "rel": entry["rel"],
+        "sha256": entry["sha256"],
+        "size": int(entry["size"]),
+        "leaf_index": leaf_index,
+        "tree_size": tree_size,
+        "audit_path": audit_path,
+        "merkle_root": root,
+    }
 
-    print(f"  VERIFISERER: {target}")
-    print(f"  {len(entries)} filer i manifest")
-    print()
 
+def _prove_sharded(manifest_path: Path, dod: dict, rel: str) -> dict:
+    sharding = dod["sharding"]
+    wanted = _normalize_rel(rel)
+    by_folder = sharding["mode"] == "top"
+    if by_folder:
+        wanted_shard = os.path.normcase(shard_of(sharding, wanted, 0))
+    # Only the hashes of one shard are kept: the requested file's folder,
+    # or the current block of N files until the file has been found
+    entry = shard = current = None
+    hashes = []
+    for index, e in enumerate(iter_manifest(str(manifest_path))):
+        name = shard_of(sharding, e["rel"], index)
+        if by_folder:
+            if os.path.normcase(name) != wanted_shard:
+                continue
+        elif name != current:
+            if entry is not None:
+                break
+            current, hashes = name, []
+        hashes.append(e["sha256"])
+        if entry is None and _normalize_rel(e["rel"]) == wanted:
+            entry, shard, leaf_index = e, name, len(hashes) - 1
+    if entry is None:
+        raise KeyError(rel)
+
+    levels = merkle_levels(hashes)
+    shard_root = bytes(levels[-1]).hex()
+    names = [s["name"] for s in dod["shards"]]
+    recorded = dict(zip(names, (s["merkle_root"] for s in dod["shards"])))
+    if recorded.get(shard) != shard_root:
+        raise ValueError(f"Shard {shard} in manifest.csv does not match dod.json")
+    top_levels = merkle_levels(recorded[n] for n in names)
+    shard_index = names.index(shard)
+
+    return {
+        "version": PROOF_VERSION,
+        "rel": entry["rel"],
+        "sha256": entry["sha256"],
+        "size": int(entry["size"]),
+        "leaf_index": leaf_index,
+        "tree_size": len(hashes),
+        "audit_path": merkle_audit_path(levels, leaf_index),
+        "shard": {
+            "name": shard,
+            "merkle_root": shard_root,
+            "leaf_index": shard_index,
+            "tree_size": len(names),
+            "audit_path": merkle_audit_path(top_levels, shard_index),
+        },
+        "merkle_root": bytes(top_levels[-1]).hex(),
+    }
+
+
+def check_proof(proof: dict, file_path: Optional[str] = None,
+                expected_root: Optional[str] = None) -> bool:
+    """
+    Check an inclusion proof offline. Needs only the proof itself, and
+    optionally the file (hashed and compared) and a trusted root
+    (e.g. from a signed or timestamped dod.json).
+    Returns True if all checks pass.
+    """
     ok = True
-    warnings = 0
+    try:
+        if not isinstance(proof, dict):
+            raise ValueError("proof is not a JSON object")
+        computed = merkle_root_from_path(proof["sha256"], int(proof["leaf_index"]),
+                                         int(proof["tree_size"]), proof["audit_path"])
+        shard = proof.get("shard")
+        if shard is not None:
+            # Sharded audit: the file's path ends at its shard root, which
+            # is in turn a leaf of the top tree
+            if computed == shard["merkle_root"]:
+                print(f"  OK: Revisjonssti gir shard-roten ({shard['name']})")
+            else:
+                print(f"  FEIL: Revisjonssti gir IKKE shard-roten ({shard['name']})")
+                ok = False
+            computed = merkle_root_from_path(shard["merkle_root"], int(shard["leaf_index"]),
+                                             int(shard["tree_size"]), shard["audit_path"])
+    except (KeyError, ValueError, TypeError, AttributeError) as exc:
+        # Malformed JSON fields: missing keys, wrong types, non-hex digests
+        print(f"  FEIL: Ugyldig bevis: {exc}")
+        return False
 
-    # Check 1: DoD merkle_root matches merkle_root.txt
-    if dod.get("merkle_root") == stored_root:
-        print("  OK: DoD merkle_root matcher merkle_root.txt")
+    if computed == proof.get("merkle_root"):
+        print("  OK: Revisjonssti gir Merkle-roten i beviset")
     else:
-        print("  FEIL: DoD merkle_root matcher IKKE merkle_root.txt")
+        print("  FEIL: Revisjonssti gir IKKE Merkle-roten i beviset")
         ok = False
 
-    # Check 2: Recompute Merkle root from manifest
-    hashes = [e["sha256"] for e in entries]
-    recomputed = build_merkle_tree(hashes)
-    if recomputed == stored_root:
-        print("  OK: Merkle-rot (reberegnet) matcher")
-    else:
-        print("  FEIL: Merkle-rot MATCHER IKKE — manifest kan vaere endret")
-        ok = False
+    if expected_root is not None:
+        if computed == expected_root.strip().lower():
+            print("  OK: Merkle-rot matcher forventet rot")
+        else:
+            print("  FEIL: Merkle-rot matcher IKKE forventet rot")
+            ok = False
 
-    # Check 3: Verify each file on disk
-    files_ok = 0
-    files_fail = 0
-    files_missing = 0
-    for e in entries:
-        filepath = Path(e["path"])
-        if not filepath.exists():
-            print(f"  FEIL: FIL MANGLER: {e['rel']}")
-            files_missing += 1
+    if file_path is not None:
+        try:
+            current = sha256_file(file_path)
+        except OSError as exc:
+            print(f"  FEIL: Kan ikke lese filen: {exc}")
             ok = False
         else:
-            current_hash = sha256_file(str(filepath))
-            if current_hash == e["sha256"]:
-                files_ok += 1
+            if current == proof["sha256"]:
+                print(f"  OK: Filen matcher SHA-256 i beviset")
             else:
-                print(f"  FEIL: ENDRET: {e['rel']}")
-                print(f"        Forventet: {e['sha256'][:16]}...")
-                print(f"        Faktisk:   {current_hash[:16]}...")
-                files_fail += 1
+                print(f"  FEIL: Filen matcher IKKE SHA-256 i beviset")
+                print(f"        Forventet: {proof['sha256'][:16]}...")
+                print(f"        Faktisk:   {current[:16]}...")
                 ok = False
 
-    if files_ok == len(entries):
-        print(f"  OK: Alle {files_ok} filer verifisert")
-    else:
-        if files_missing:
-            print(f"  FEIL: {files_missing} fil(er) mangler")
-        if files_fail:
-            print(f"  FEIL: {files_fail} fil(er) endret")
-
-    # Check 4: Unauthorized files (files on disk not in manifest)
-    manifest_paths = {str(Path(e["path"]).resolve()) for e in entries}
-    disk_files = {str(f.resolve()) for f in target.rglob("*") if f.is_file() and ".asi-omega" not in str(f)}
-    extra = disk_files - manifest_paths
-    if extra:
-        print(f"  ADVARSEL: {len(extra)} fil(er) paa disk som ikke er i manifest:")
-        for f in sorted(extra)[:5]:
-            print(f"    + {Path(f).relative_to(target)}")
-        if len(extra) > 5:
-            print(f"    ... og {len(extra) - 5} til")
-        warnings += 1
-    else:
-        print("  OK: Ingen uautoriserte filer")
-
-    # Result
     print()
     if ok:
-        if warnings:
-            print(f"  VERIFISERING BESTATT med {warnings} advarsel(er)")
-        else:
-            print(f"  VERIFISERING BESTATT — alle filer er uendret")
+        print(f"  BEVIS GYLDIG — {proof.get('rel', '?')} er med i audit {computed[:16]}...")
     else:
-        print(f"  VERIFISERING FEILET — filer kan ha blitt endret")
-
+        print("  BEVIS UGYLDIG")
     return ok
 
 
@@ -303,9 +3702,14 @@ def verify(target_path: str, output_dir: Optional[str] = None) -> bool:
 # Report generation
 # ─────────────────────────────────────────────────────
 
-def generate_report(entries: list[dict], dod: dict) -> str:
-    """Generate human-readable Norwegian report."""
-    lines = [
+def iter_report_lines(entries: Iterable[dict], dod: dict) -> Iterator[str]:
+    """Yield the lines of the human-readable Norwegian report."""
+    if isinstance(entries, (list, tuple)):
+        file_count = len(entries)
+    else:
+        file_count = dod["file_count"]
+
+    yield from [
         "=" * 60,
         "  ASI-OMEGA AUDIT PIPELINE",
         "  Integritetsrapport",
@@ -324,20 +3728,29 @@ def generate_report(entries: list[dict], dod: dict) -> str:
         "  Dette er et unikt fingeravtrykk for alle filene nedenfor.",
         "  Endres en eneste byte i en eneste fil, endres dette tallet.",
         "",
+    ]
+
+    if dod.get("shards"):
+        yield f"  Shards ({len(dod['shards'])} stk., Merkle-roten er bygget av disse):"
+        for s in dod["shards"]:
+            yield f"    {s['name']}: {s['merkle_root']} ({s['file_count']} filer)"
+        yield ""
+
+    yield from [
         "=" * 60,
-        f"  REGISTRERTE FILER ({len(entries)} stk.)",
+        f"  REGISTRERTE FILER ({file_count} stk.)",
         "=" * 60,
         "",
     ]
 
     for e in entries:
         size = f"{int(e['size']):,} bytes" if e.get("size") else "ukjent"
-        lines.append(f"    {e['rel']}")
-        lines.append(f"      SHA-256:    {e['sha256']}")
-        lines.append(f"      Storrelse:  {size}")
-        lines.append("")
+        yield f"    {e['rel']}"
+        yield f"      SHA-256:    {e['sha256']}"
+        yield f"      Storrelse:  {size}"
+        yield ""
 
-    lines.extend([
+    yield from [
         "=" * 60,
         "  SLIK VERIFISERER DU",
         "=" * 60,
@@ -348,15 +3761,109 @@ def generate_report(entries: list[dict], dod: dict) -> str:
         "  ASI-Omega Audit Pipeline v2",
         "  https://github.com/shahonader-art/asi-omega-audit-pipeline",
         "=" * 60,
-    ])
+    ]
+
+
+def generate_report(entries: Iterable[dict], dod: dict) -> str:
+    """Generate human-readable Norwegian report."""
+    return "\n".join(iter_report_lines(entries, dod))
 
-    return "\n".join(lines)
+
+def write_report(entries: Iterable[dict], dod: dict, output_path: str):
+    """Write the report line by line; same content as generate_report()."""
+    with open(output_path, "w", encoding="utf-8") as f:
+        for i, line in enumerate(iter_report_lines(entries, dod)):
+            if i:
+                f.write("\n")
+            f.write(line)
 
 
 # ─────────────────────────────────────────────────────
 # CLI
 # ─────────────────────────────────────────────────────
 
+def _pop_option(args: list[str], name: str, default: Optional[str] = None) -> Optional[str]:
+    """Remove '--name value' from args and return value (or default)."""
+    if name in args:
+        idx = args.index(name)
+        if idx + 1 >= len(args):
+            print(f"Mangler verdi for {name}")
+            sys.exit(1)
+        value = args[idx + 1]
+        del args[idx:idx + 2]
+        return value
+    return default
+
+
+def _pop_flag(args: list[str], name: str) -> bool:
+    """Remove a boolean '--name' flag from args, return whether it was present."""
+    if name in args:
+        args.remove(name)
+        return True
+    return False
+
+
+def _pop_multi_option(args: list[str], name: str) -> list[str]:
+    """
+    Remove every '--name v1 v2 ...' group from args and return the values.
+    Values run until the next '--' flag.
+    """
+    values = []
+    while name in args:
+        idx = args.index(name)
+        end = idx + 1
+        while end < len(args) and not args[end].startswith("--"):
+            end += 1
+        values.extend(args[idx + 1:end])
+        del args[idx:end]
+    return values
+
+
+def _pop_int_option(args: list[str], name: str, default: Optional[int] = None) -> Optional[int]:
+    value = _pop_option(args, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Ugyldig tall for {name}: {value}")
+        sys.exit(1)
+
+
+def _pop_events(args: list[str]):
+    """
+    Handle --events jsonl [--events-out FILE]: returns an event callback
+    or None. Events go to stderr unless --events-out is given, so
+    they never mix with the status lines on stdout.
+    """
+    events = _pop_option(args, "--events")
+    events_out = _pop_option(args, "--events-out")
+    if events is None and events_out is None:
+        return None
+    if events not in (None, "jsonl"):
+        print(f"Ukjent hendelsesformat: {events} (velg jsonl)")
+        sys.exit(1)
+    stream = sys.stderr
+    if events_out:
+        stream = open(events_out, "a", encoding="utf-8")
+        atexit.register(stream.close)
+    return jsonl_event_writer(stream)
+
+
+def _pop_hash_io(args: list[str]) -> HashIO:
+    """Parse --io, --block-size and --no-fadvise into a HashIO."""
+    strategy = _pop_option(args, "--io", DEFAULT_HASH_IO.strategy)
+    if strategy not in IO_STRATEGIES:
+        print(f"Ukjent I/O-strategi: {strategy} (velg {', '.join(IO_STRATEGIES)})")
+        sys.exit(1)
+    block_size = _pop_int_option(args, "--block-size", DEFAULT_HASH_IO.block_size)
+    if block_size <= 0:
+        print("--block-size maa vaere stoerre enn 0")
+        sys.exit(1)
+    fadvise = not _pop_flag(args, "--no-fadvise")
+    return HashIO(strategy, block_size, fadvise)
+
+
 def main():
     if len(sys.argv) < 2:
         print(__doc__)
@@ -365,23 +3872,210 @@ def main():
     cmd = sys.argv[1].lower()
 
     if cmd == "audit":
-        if len(sys.argv) < 3:
-            print("Bruk: asi-omega audit <mappe>")
+        args = sys.argv[2:]
+        jobs = _pop_int_option(args, "--jobs")
+        backend = _pop_option(args, "--backend", "thread")
+        incremental = _pop_flag(args, "--incremental")
+        binary_manifest = _pop_flag(args, "--binary-manifest")
+        hash_io = _pop_hash_io(args)
+        profile_out = _pop_option(args, "--profile-out")
+        profile = _pop_flag(args, "--profile") or profile_out is not None
+        on_event = _pop_events(args)
+        only_shards = _pop_multi_option(args, "--only-shard")
+        shard = _pop_option(args, "--shard", "top" if only_shards else None)
+        reflinks = _pop_flag(args, "--reflinks")
+        if backend not in HASH_BACKENDS:
+            print(f"Ukjent backend: {backend} (velg {', '.join(HASH_BACKENDS)})")
+            sys.exit(1)
+        if shard:
+            try:
+                parse_shard_spec(shard)
+            except ValueError:
+                print(f"Ugyldig verdi for --shard: {shard} (bruk 'top' eller et antall filer)")
+                sys.exit(1)
+        if not args:
+            print("Bruk: asi-omega audit <mappe> [--jobs N] [--backend serial|thread|process|async]"
+                  " [--incremental] [--binary-manifest] [--profile] [--profile-out FIL]"
+                  " [--shard top|N] [--only-shard NAVN...] [--reflinks]")
+            sys.exit(1)
+        target = args[0]
+        try:
+            dod = audit(target, jobs=jobs, backend=backend, incremental=incremental,
+                        binary_manifest=binary_manifest, hash_io=hash_io, profile=profile,
+                        on_event=on_event, shard=shard, only_shards=only_shards,
+                        reflinks=reflinks)
+        except ValueError as exc:
+            print(f"  FEIL: {exc}")
+            sys.exit(1)
+        if profile_out:
+            Path(profile_out).write_text(json.dumps(dod["metrics"], indent=2), encoding="utf-8")
+            print(f"  OK: Profil skrevet til {profile_out}")
+
+    elif cmd == "audit-many":
+        args = sys.argv[2:]
+        jobs = _pop_int_option(args, "--jobs")
+        per_device = _pop_int_option(args, "--per-device", AUDIT_MANY_PER_DEVICE)
+        parallel = _pop_int_option(args, "--parallel", AUDIT_MANY_TARGETS)
+        incremental = _pop_flag(args, "--incremental")
+        binary_manifest = _pop_flag(args, "--binary-manifest")
+        hash_io = _pop_hash_io(args)
+        on_event = _pop_events(args)
+        shard = _pop_option(args, "--shard")
+        summary_out = _pop_option(args, "--summary-out")
+        reflinks = _pop_flag(args, "--reflinks")
+        if shard:
+            try:
+                parse_shard_spec(shard)
+            except ValueError:
+                print(f"Ugyldig verdi for --shard: {shard} (bruk 'top' eller et antall filer)")
+                sys.exit(1)
+        targets = expand_targets(args)
+        if not targets:
+            print("Bruk: asi-omega audit-many <liste.txt|glob|mappe>... [--jobs N]"
+                  " [--per-device N] [--parallel N] [--incremental] [--summary-out FIL]")
             sys.exit(1)
-        target = sys.argv[2]
-        audit(target)
+        results = audit_many(targets, jobs=jobs, per_device=per_device, parallel=parallel,
+                             on_event=on_event, incremental=incremental,
+                             binary_manifest=binary_manifest, hash_io=hash_io, shard=shard,
+                             reflinks=reflinks)
+        if summary_out:
+            summary = [{k: v for k, v in r.items() if k != "output"} for r in results]
+            Path(summary_out).write_text(json.dumps(summary, indent=2, ensure_ascii=False),
+                                         encoding="utf-8")
+            print(f"  OK: Sammendrag skrevet til {summary_out}")
+        sys.exit(0 if all(r["ok"] for r in results) else 1)
 
     elif cmd == "verify":
-        if len(sys.argv) < 3:
-            print("Bruk: asi-omega verify <mappe>")
+        args = sys.argv[2:]
+        only = _pop_multi_option(args, "--only")
+        quick = _pop_flag(args, "--quick")
+        check_mtime = _pop_flag(args, "--check-mtime")
+        jobs = _pop_int_option(args, "--jobs")
+        backend = _pop_option(args, "--backend", "thread")
+        if backend not in HASH_BACKENDS:
+            print(f"Ukjent backend: {backend} (velg {', '.join(HASH_BACKENDS)})")
+            sys.exit(1)
+        hash_io = _pop_hash_io(args)
+        on_event = _pop_events(args)
+        only_shards = _pop_multi_option(args, "--only-shard")
+        workers = _pop_multi_option(args, "--workers")
+        token = _pop_option(args, "--token", os.environ.get("ASI_OMEGA_TOKEN"))
+        if not args:
+            print("Bruk: asi-omega verify <mappe> [--quick] [--check-mtime] [--only <glob|sti>...]"
+                  " [--only-shard NAVN...] [--workers URL...]")
+            sys.exit(1)
+        target = args[0]
+        if only and only_shards:
+            print("  FEIL: --only og --only-shard kan ikke kombineres")
+            sys.exit(1)
+        if only:
+            success = verify_subset(target, only, quick=quick, check_mtime=check_mtime,
+                                    jobs=jobs, backend=backend, hash_io=hash_io,
+                                    on_event=on_event, workers=workers, token=token)
+        else:
+            success = verify(target, quick=quick, check_mtime=check_mtime,
+                             jobs=jobs, backend=backend, hash_io=hash_io,
+                             on_event=on_event, only_shards=only_shards,
+                             workers=workers, token=token)
+        sys.exit(0 if success else 1)
+
+    elif cmd == "watch":
+        args = sys.argv[2:]
+        poll = _pop_flag(args, "--poll")
+        interval = _pop_option(args, "--interval")
+        hash_io = _pop_hash_io(args)
+        on_event = _pop_events(args)
+        if not args:
+            print("Bruk: asi-omega watch <mappe> [--poll] [--interval SEKUNDER] [--events jsonl]")
             sys.exit(1)
-        target = sys.argv[2]
-        success = verify(target)
+        try:
+            interval = float(interval) if interval else WATCH_POLL_INTERVAL
+        except ValueError:
+            print(f"Ugyldig verdi for --interval: {interval}")
+            sys.exit(1)
+        success = watch(args[0], poll=poll, interval=interval, hash_io=hash_io,
+                        on_event=on_event)
+        sys.exit(0 if success else 1)
+
+    elif cmd == "worker":
+        args = sys.argv[2:]
+        host = _pop_option(args, "--host", "127.0.0.1")
+        port = _pop_int_option(args, "--port", WORKER_PORT)
+        jobs = _pop_int_option(args, "--jobs")
+        backend = _pop_option(args, "--backend", "thread")
+        hash_io = _pop_hash_io(args)
+        token = _pop_option(args, "--token", os.environ.get("ASI_OMEGA_TOKEN"))
+        mapping = _pop_option(args, "--map")
+        roots = _pop_multi_option(args, "--root")
+        if not roots:
+            print("Bruk: asi-omega worker --root MAPPE... [--host H] [--port P] [--token T]"
+                  " [--map FRA=TIL]")
+            sys.exit(1)
+        missing = [root for root in roots if not os.path.isdir(root)]
+        if missing:
+            print(f"  FEIL: Fant ikke mappe(r): {', '.join(missing)}")
+            sys.exit(1)
+        if backend not in HASH_BACKENDS:
+            print(f"Ukjent backend: {backend} (velg {', '.join(HASH_BACKENDS)})")
+            sys.exit(1)
+        path_map = None
+        if mapping:
+            if "=" not in mapping:
+                print("Bruk: --map KOORDINATOR-STI=LOKAL-STI")
+                sys.exit(1)
+            path_map = tuple(mapping.split("=", 1))
+        if host not in ("127.0.0.1", "localhost", "::1") and not token:
+            print("  ADVARSEL: Arbeideren lytter paa nettverket uten --token")
+        serve_worker(roots, host, port, jobs=jobs, backend=backend, hash_io=hash_io,
+                     token=token, path_map=path_map)
+
+    elif cmd == "prove":
+        args = sys.argv[2:]
+        out_file = _pop_option(args, "--out")
+        if len(args) < 2:
+            print("Bruk: asi-omega prove <mappe> <relativ-sti> [--out bevis.json]")
+            sys.exit(1)
+        try:
+            proof = prove(args[0], args[1])
+        except FileNotFoundError as exc:
+            print(f"  FEIL: {exc}")
+            print(f"  Kjoer 'asi-omega audit \"{args[0]}\"' paa nytt.")
+            sys.exit(1)
+        except KeyError:
+            print(f"  FEIL: {args[1]} finnes ikke i manifest")
+            sys.exit(1)
+        except ValueError as exc:
+            print(f"  FEIL: {exc}")
+            sys.exit(1)
+        text = json.dumps(proof, indent=2, ensure_ascii=False)
+        if out_file:
+            Path(out_file).write_text(text, encoding="utf-8")
+            print(f"  Bevis skrevet til {out_file}")
+        else:
+            print(text)
+
+    elif cmd == "check-proof":
+        args = sys.argv[2:]
+        file_path = _pop_option(args, "--file")
+        expected_root = _pop_option(args, "--root")
+        if not args:
+            print("Bruk: asi-omega check-proof <bevis.json> [--file FIL] [--root HEX]")
+            sys.exit(1)
+        try:
+            proof = json.loads(Path(args[0]).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            print(f"  FEIL: Kan ikke lese bevis {args[0]}: {exc}")
+            sys.exit(1)
+        success = check_proof(proof, file_path=file_path, expected_root=expected_root)
         sys.exit(0 if success else 1)
 
     elif cmd in ("help", "-h", "--help"):
         print(__doc__)
 
+    elif cmd == "bench":
+        from bench import main as bench_main
+        sys.exit(bench_main(sys.argv[2:]))
+
     elif cmd == "dash":
         from dashboard import start_dashboard
         port = 5050
@@ -0,0 +1,312 @@
+"""
+ASI-Omega Audit Pipeline — Benchmarks
+Measures pipeline throughput on synthetic trees, and hashing throughput so
+the right I/O settings can be chosen per storage class (local NVMe,
+NFS/SMB mounts, spinning disks).
+
+Usage:
+    python bench.py [suite]                         Time each pipeline phase
+        --scenarios tiny,huge,deep                  Synthetic trees to build
+        --scale F                                   Size multiplier (default 1.0)
+        --dir PATH                                  Build trees here (default: temp)
+        --jobs N, --backend B                       Hashing workers, as for audit
+        --out FILE                                  Also write the JSON to FILE
+    python bench.py io <path>                       Compare read strategies
+        --strategies readinto,read,mmap             Strategies to test
+        --block-sizes 65536,1048576,4194304         Block sizes in bytes
+        --repeat N                                  Runs per setting (best is kept)
+        --no-fadvise                                Keep pages in the page cache
+
+Also available as 'asi-omega bench ...'. Results are printed as JSON.
+"""
+import contextlib
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from asi_omega import (
+    DEFAULT_BLOCK_SIZE, HASH_BACKENDS, IO_STRATEGIES, HashIO, audit,
+    build_merkle_tree, generate_report, peak_memory_bytes, read_manifest,
+    scan_directory, sha256_file, verify, walk_files, write_manifest,
+)
+
+
+# ─────────────────────────────────────────────────────
+# Synthetic trees
+# ─────────────────────────────────────────────────────
+
+SCENARIOS = ("tiny", "huge", "deep")
+
+
+def _write_random(path: Path, size: int, rng: random.Random):
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining:
+            n = min(remaining, 4 * 1024 * 1024)
+            f.write(rng.randbytes(n))
+            remaining -= n
+
+
+def make_tree(root: str, scenario: str, scale: float = 1.0, seed: int = 1) -> Path:
+    """
+    Build a deterministic synthetic tree under root/scenario:
+      tiny  many files of 100 B - 4 KB spread over 100 folders
+      huge  a few files of 64 MB each
+      deep  a 40-level deep chain of folders with files at every level
+    """
+    rng = random.Random(f"{scenario}:{seed}")
+    base = Path(root) / scenario
+    if base.exists():
+        shutil.rmtree(base)
+    base.mkdir(parents=True)
+
+    if scenario == "tiny":
+        for i in range(max(1, int(5000 * scale))):
+            folder = base / f"d{i % 100:03d}"
+            folder.mkdir(exist_ok=True)
+            _write_random(folder / f"f{i:07d}.dat", rng.randint(100, 4096), rng)
+    elif scenario == "huge":
+        for i in range(max(1, int(4 * scale))):
+            _write_random(base / f"big{i:03d}.bin", 64 * 1024 * 1024, rng)
+    elif scenario == "deep":
+        folder = base
+        for depth in range(40):
+            folder = folder / f"n{depth:02d}"
+            folder.mkdir()
+            for i in range(max(1, int(25 * scale))):
+                _write_random(folder / f"f{i:04d}.dat", rng.randint(1024, 65536), rng)
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    return base
+
+
+# ─────────────────────────────────────────────────────
+# Measurement
+# ─────────────────────────────────────────────────────
+
+def _phase(name: str, fn, results: dict):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    value = fn()
+    results[name] = {
+        "seconds": round(time.perf_counter() - start, 6),
+        "cpu_seconds": round(time.process_time() - cpu_start, 6),
+        "peak_rss_bytes": peak_memory_bytes(),
+    }
+    return value
+
+
+def _add_rates(phase: dict, files: int, nbytes: int):
+    seconds = phase["seconds"]
+    phase["files_per_s"] = round(files / seconds, 1) if seconds else None
+    phase["mb_per_s"] = round(nbytes / 1e6 / seconds, 2) if seconds and nbytes else None
+
+
+def bench_tree(tree: str, jobs=None, backend: str = "thread") -> dict:
+    """
+    Time each pipeline phase separately on an existing tree:
+    scan_directory, build_merkle_tree, write_manifest, read_manifest,
+    generate_report, audit and verify. The tree's .asi-omega output is
+    replaced. peak_rss_bytes is the process high-water mark after the
+    phase, so it only grows from phase to phase.
+    """
+    phases = {}
+    work = tempfile.mkdtemp(prefix="asi-omega-bench-")
+    try:
+        entries = _phase("scan_directory",
+                         lambda: scan_directory(tree, jobs=jobs, backend=backend), phases)
+        files = len(entries)
+        nbytes = sum(int(e["size"]) for e in entries)
+
+        hashes = [e["sha256"] for e in entries]
+        root = _phase("build_merkle_tree", lambda: build_merkle_tree(hashes), phases)
+
+        manifest = os.path.join(work, "manifest.csv")
+        _phase("write_manifest", lambda: write_manifest(entries, manifest), phases)
+        _phase("read_manifest", lambda: read_manifest(manifest), phases)
+
+        dod = {"merkle_root": root, "generated": "", "target_path": tree,
+               "platform": sys.platform, "file_count": files}
+        _phase("generate_report", lambda: generate_report(entries, dod), phases)
+        del entries, hashes
+
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            _phase("audit", lambda: audit(tree, jobs=jobs, backend=backend), phases)
+            passed = _phase("verify", lambda: verify(tree, jobs=jobs, backend=backend), phases)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    for name, phase in phases.items():
+        # Only phases that read file contents get a MB/s figure
+        _add_rates(phase, files, nbytes if name in ("scan_directory", "audit", "verify") else 0)
+
+    return {"files": files, "total_bytes": nbytes, "merkle_root": root,
+            "verify_passed": passed, "phases": phases}
+
+
+def bench_suite(scenarios=SCENARIOS, scale: float = 1.0, base_dir=None,
+                jobs=None, backend: str = "thread") -> dict:
+    """Build each synthetic tree, benchmark it and clean up afterwards."""
+    root = tempfile.mkdtemp(prefix="asi-omega-trees-", dir=base_dir)
+    results = {}
+    try:
+        for scenario in scenarios:
+            tree = make_tree(root, scenario, scale)
+            results[scenario] = bench_tree(str(tree), jobs=jobs, backend=backend)
+            shutil.rmtree(tree, ignore_errors=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return {
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "cpu_count": os.cpu_count(),
+        "scale": scale,
+        "jobs": jobs,
+        "backend": backend,
+        "scenarios": results,
+    }
+
+
+# ─────────────────────────────────────────────────────
+# Hashing I/O strategies
+# ─────────────────────────────────────────────────────
+
+
+def _collect_files(path: str) -> list[str]:
+    p = Path(path).resolve()
+    if p.is_file():
+        return [str(p)]
+    if not p.is_dir():
+        raise FileNotFoundError(f"Path not found: {path}")
+    return [filepath for filepath, _ in walk_files(p)]
+
+
+def bench_io(path: str, strategies: tuple = ("readinto", "read", "mmap"),
+             block_sizes: tuple = (64 * 1024, DEFAULT_BLOCK_SIZE, 4 * 1024 * 1024),
+             repeat: int = 3, fadvise: bool = True) -> dict:
+    """
+    Hash every file under path once per (strategy, block size) and report
+    the best of `repeat` runs. mmap ignores the block size, so it is run
+    once per repeat. Digests must agree across settings; a mismatch raises
+    RuntimeError.
+    """
+    files = _collect_files(path)
+    total_bytes = sum(os.stat(f).st_size for f in files)
+
+    settings = []
+    for strategy in strategies:
+        if strategy not in IO_STRATEGIES:
+            raise ValueError(f"Unknown I/O strategy: {strategy}")
+        sizes = (DEFAULT_BLOCK_SIZE,) if strategy in ("mmap", "auto") else block_sizes
+        settings.extend(HashIO(strategy, size, fadvise) for size in sizes)
+
+    reference = None
+    results = []
+    for hash_io in settings:
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            digests = [sha256_file(f, hash_io) for f in files]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        if reference is None:
+            reference = digests
+        elif digests != reference:
+            raise RuntimeError(f"Digest mismatch for {hash_io}")
+        results.append({
+            "strategy": hash_io.strategy,
+            "block_size": hash_io.block_size,
+            "fadvise": hash_io.fadvise,
+            "seconds": round(best, 6),
+            "mb_per_s": round(total_bytes / 1e6 / best, 2) if best else None,
+            "files_per_s": round(len(files) / best, 1) if best else None,
+        })
+
+    results.sort(key=lambda r: r["seconds"])
+    return {
+        "path": str(Path(path).resolve()),
+        "files": len(files),
+        "total_bytes": total_bytes,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def _int_list(value: str) -> tuple:
+    return tuple(int(v) for v in value.split(",") if v)
+
+
+def main(argv: list[str]) -> int:
+    if argv and argv[0] in ("help", "-h", "--help"):
+        print(__doc__)
+        return 0
+
+    if argv and argv[0].lower() in ("io", "suite"):
+        cmd, args = argv[0].lower(), list(argv[1:])
+    else:
+        cmd, args = "suite", list(argv)
+
+    if cmd == "suite":
+        opts = {"scenarios": ",".join(SCENARIOS), "scale": "1.0", "dir": None,
+                "jobs": None, "backend": "thread", "out": None}
+        while args:
+            arg = args.pop(0)
+            if arg.startswith("--") and arg[2:] in opts and args:
+                opts[arg[2:]] = args.pop(0)
+            else:
+                print(f"Ukjent argument: {arg}")
+                return 1
+        scenarios = tuple(opts["scenarios"].split(","))
+        for scenario in scenarios:
+            if scenario not in SCENARIOS:
+                print(f"Ukjent scenario: {scenario} (velg {', '.join(SCENARIOS)})")
+                return 1
+        if opts["backend"] not in HASH_BACKENDS:
+            print(f"Ukjent backend: {opts['backend']} (velg {', '.join(HASH_BACKENDS)})")
+            return 1
+        result = bench_suite(scenarios, scale=float(opts["scale"]), base_dir=opts["dir"],
+                             jobs=int(opts["jobs"]) if opts["jobs"] else None,
+                             backend=opts["backend"])
+        text = json.dumps(result, indent=2)
+        if opts["out"]:
+            Path(opts["out"]).write_text(text, encoding="utf-8")
+        print(text)
+        return 0
+
+    if cmd == "io":
+        opts = {"strategies": "readinto,read,mmap",
+                "block-sizes": f"{64 * 1024},{DEFAULT_BLOCK_SIZE},{4 * 1024 * 1024}",
+                "repeat": "3"}
+        fadvise = True
+        positional = []
+        while args:
+            arg = args.pop(0)
+            if arg == "--no-fadvise":
+                fadvise = False
+            elif arg.startswith("--") and arg[2:] in opts and args:
+                opts[arg[2:]] = args.pop(0)
+            else:
+                positional.append(arg)
+        if not positional:
+            print("Bruk: python bench.py io <sti> [--strategies ...] [--block-sizes ...]")
+            return 1
+        result = bench_io(positional[0],
+                          strategies=tuple(opts["strategies"].split(",")),
+                          block_sizes=_int_list(opts["block-sizes"]),
+                          repeat=int(opts["repeat"]), fadvise=fadvise)
+        print(json.dumps(result, indent=2))
+        return 0
+
+    print(f"Ukjent kommando: {cmd}")
+    print(__doc__)
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -9,15 +9,25 @@ Usage:
 Eller via CLI:
     python asi_omega.py dash
 """
+import contextlib
 import json
 import csv
+import io
 import os
 import sys
-import subprocess
 import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from flask import Flask, render_template_string, request, jsonify
+from typing import Optional
+from flask import Flask, Response, render_template_string, request, jsonify
+
+from asi_omega import audit, iter_manifest, thread_output, verify
 
 app = Flask(__name__)
 
@@ -25,42 +35,321 @@ app = Flask(__name__)
 # Backend-integrasjon: les .asi-omega data
 # ─────────────────────────────────────────────────────
 
+def read_audit(asi_dir: Path) -> dict:
+    """Sammendrag av én .asi-omega mappe fra dod.json. Kaster OSError/ValueError."""
+    dod = json.loads((asi_dir / "dod.json").read_text(encoding="utf-8"))
+    file_count = dod.get("file_count")
+    if file_count is None:
+        # Audits older than schema_version 2 lack file_count
+        with open(asi_dir / "manifest.csv", "r", encoding="utf-8") as f:
+            file_count = sum(1 for _ in csv.DictReader(f))
+    return {
+        "path": str(asi_dir.parent),
+        "asi_dir": str(asi_dir),
+        "merkle_root": dod.get("merkle_root", ""),
+        "generated": dod.get("generated", ""),
+        "file_count": file_count,
+        "total_size": dod.get("total_size_bytes", 0),
+        "platform": dod.get("platform", ""),
+    }
+
+
+def iter_asi_dirs(base_path: str):
+    """Finn .asi-omega mapper under base_path uten å gå inn i dem."""
+    for dirpath, dirnames, _ in os.walk(base_path):
+        if ".asi-omega" in dirnames:
+            dirnames.remove(".asi-omega")
+            asi_dir = Path(dirpath) / ".asi-omega"
+            if (asi_dir / "dod.json").is_file():
+                yield asi_dir
+
+
 def find_audits(base_path: str = None) -> list[dict]:
-    """Finn alle .asi-omega mapper rekursivt under base_path."""
+    """Finn alle .asi-omega mapper rekursivt under base_path (uten indeks)."""
     if base_path is None:
         base_path = str(Path(__file__).parent.parent)  # audit-pipeline/
 
     audits = []
-    base = Path(base_path)
-
-    for asi_dir in sorted(base.rglob(".asi-omega")):
-        if not asi_dir.is_dir():
-            continue
-        dod_file = asi_dir / "dod.json"
-        if not dod_file.exists():
-            continue
+    for asi_dir in sorted(iter_asi_dirs(base_path)):
         try:
-            dod = json.loads(dod_file.read_text(encoding="utf-8"))
-            manifest_file = asi_dir / "manifest.csv"
-            file_count = 0
-            if manifest_file.exists():
-                with open(manifest_file, "r", encoding="utf-8") as f:
-                    file_count = sum(1 for _ in csv.DictReader(f))
-
-            audits.append({
-                "path": str(asi_dir.parent),
-                "asi_dir": str(asi_dir),
-                "merkle_root": dod.get("merkle_root", ""),
-                "generated": dod.get("generated", ""),
-                "file_count": file_count,
-                "total_size": dod.get("total_size_bytes", 0),
-                "platform": dod.get("platform", ""),
-            })
+            audits.append(read_audit(asi_dir))
         except Exception:
             pass
     return audits
 
 
+# ─────────────────────────────────────────────────────
+# Audit-indeks: SQLite-cache over funne audits
+# ─────────────────────────────────────────────────────
+
+INDEX_PATH = os.environ.get("ASI_OMEGA_INDEX",
+                            str(Path.home() / ".asi-omega" / "dashboard_index.sqlite3"))
+INDEX_REFRESH_SECONDS = 300  # søkestier skannes på nytt i bakgrunnen etter dette
+
+
+class AuditIndex:
+    """
+    Vedvarende indeks over .asi-omega mapper med DoD-sammendrag.
+    audits() svarer fra SQLite og sjekker bare mtime på hver dod.json;
+    en endret dod.json leses på nytt, en slettet fjernes. Nye audits
+    oppdages av en bakgrunnsskanning av søkestien når den er eldre enn
+    INDEX_REFRESH_SECONDS. Første gang en søkesti brukes skannes den
+    synkront, ellers ville siden vært tom.
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.refreshing: set[str] = set()
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            # A folder under two overlapping search paths gets one row per path
+            db.execute("""CREATE TABLE IF NOT EXISTS audits (
+                base TEXT NOT NULL, asi_dir TEXT NOT NULL, dod_mtime_ns INTEGER NOT NULL,
+                summary TEXT NOT NULL, PRIMARY KEY (base, asi_dir))""")
+            db.execute("""CREATE TABLE IF NOT EXISTS bases (
+                base TEXT PRIMARY KEY, scanned REAL NOT NULL)""")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # One connection per call keeps the index usable from any thread.
+        # "with connection" only commits, so close it explicitly.
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as db:
+            with db:
+                yield db
+
+    @staticmethod
+    def _key(base: str) -> str:
+        return os.path.normcase(os.path.abspath(base))
+
+    def audits(self, base: str) -> list[dict]:
+        """Audits under base, fra indeksen."""
+        key = self._key(base)
+        with self._connect() as db:
+            row = db.execute("SELECT scanned FROM bases WHERE base = ?", (key,)).fetchone()
+        if row is None:
+            self.refresh(base)
+        elif time.time() - row[0] > INDEX_REFRESH_SECONDS:
+            self.refresh_async(base)
+
+        with self._connect() as db:
+            rows = db.execute("SELECT asi_dir, dod_mtime_ns, summary FROM audits "
+                              "WHERE base = ? ORDER BY asi_dir", (key,)).fetchall()
+        audits = []
+        for asi_dir, mtime_ns, summary in rows:
+            try:
+                current = os.stat(Path(asi_dir) / "dod.json").st_mtime_ns
+            except OSError:
+                self.remove(asi_dir)
+                continue
+            if current != mtime_ns:
+                entry = self.update(asi_dir, base)
+                if entry is not None:
+                    audits.append(entry)
+            else:
+                audits.append(json.loads(summary))
+        return audits
+
+    def update(self, asi_dir, base: Optional[str] = None) -> Optional[dict]:
+        """
+        Les dod.json for én mappe på nytt og lagre sammendraget, under base
+        eller (base=None) under alle skannede søkestier som inneholder den.
+        """
+        asi_dir = Path(asi_dir)
+        try:
+            mtime_ns = os.stat(asi_dir / "dod.json").st_mtime_ns
+            entry = read_audit(asi_dir)
+        except (OSError, ValueError):
+            self.remove(str(asi_dir))
+            return None
+        with self._connect() as db:
+            if base is None:
+                # File it under every scanned search path that contains it
+                own = self._key(str(asi_dir))
+                keys = [b for (b,) in db.execute("SELECT base FROM bases")
+                        if own.startswith(os.path.join(b, ""))]
+            else:
+                keys = [self._key(base)]
+            db.executemany("INSERT OR REPLACE INTO audits VALUES (?, ?, ?, ?)",
+                           [(key, str(asi_dir), mtime_ns, json.dumps(entry)) for key in keys])
+        return entry
+
+    def remove(self, asi_dir: str):
+        with self._connect() as db:
+            db.execute("DELETE FROM audits WHERE asi_dir = ?", (asi_dir,))
+
+    def refresh(self, base: str):
+        """Skann base på nytt: nye og endrede mapper oppdateres, forsvunne fjernes."""
+        key = self._key(base)
+        with self._connect() as db:
+            known = dict(db.execute("SELECT asi_dir, dod_mtime_ns FROM audits WHERE base = ?",
+                                    (key,)).fetchall())
+        found = set()
+        for asi_dir in iter_asi_dirs(base):
+            found.add(str(asi_dir))
+            try:
+                mtime_ns = os.stat(asi_dir / "dod.json").st_mtime_ns
+            except OSError:
+                continue
+            if known.get(str(asi_dir)) != mtime_ns:
+                self.update(asi_dir, base)
+        with self._connect() as db:
+            db.executemany("DELETE FROM audits WHERE asi_dir = ?",
+                           [(d,) for d in known if d not in found])
+            db.execute("INSERT OR REPLACE INTO bases VALUES (?, ?)", (key, time.time()))
+
+    def refresh_async(self, base: str):
+        """Start refresh(base) i en bakgrunnstråd, om den ikke allerede kjører."""
+        key = self._key(base)
+        with self.lock:
+            if key in self.refreshing:
+                return
+            self.refreshing.add(key)
+
+        def run():
+            try:
+                self.refresh(base)
+            except (OSError, sqlite3.Error):
+                pass
+            finally:
+                with self.lock:
+                    self.refreshing.discard(key)
+
+        threading.Thread(target=run, name="asi-omega-index", daemon=True).start()
+
+
+# ─────────────────────────────────────────────────────
+# Manifest-indeks: sidevisning, filtrering og sortering
+# ─────────────────────────────────────────────────────
+
+MANIFEST_INDEX_DIR = Path(INDEX_PATH).parent / "manifests"
+MANIFEST_PAGE_SIZE = 100
+MANIFEST_MAX_PAGE_SIZE = 1000
+MANIFEST_SORTS = {
+    "manifest": "seq",          # manifest order (walk order)
+    "rel": "rel",
+    "size": "size, seq",
+    "-size": "size DESC, seq",
+}
+
+_manifest_locks: dict[str, threading.Lock] = {}
+_manifest_locks_lock = threading.Lock()
+
+
+def manifest_index(asi_dir: str) -> Path:
+    """
+    SQLite-indeks over manifest.csv i asi_dir, bygget ved første bruk og
+    på nytt når manifest.csv endres (mtime og størrelse). Indeksen ligger
+    i MANIFEST_INDEX_DIR, ikke i audit-mappen, så bevismaterialet ikke
+    endres. Kaster FileNotFoundError uten manifest.
+    """
+    manifest_path = Path(asi_dir).resolve() / "manifest.csv"
+    st = os.stat(manifest_path)
+    stamp = f"{st.st_mtime_ns}:{st.st_size}"
+    name = hashlib.sha256(str(manifest_path).encode("utf-8")).hexdigest()[:32]
+    # The stamp is part of the file name: a rebuilt index never replaces a
+    # file that a running query or NDJSON stream still has open (Windows
+    # refuses to rename over or delete open files)
+    db_path = MANIFEST_INDEX_DIR / f"{name}-{st.st_mtime_ns}-{st.st_size}.sqlite3"
+
+    with _manifest_locks_lock:
+        lock = _manifest_locks.setdefault(name, threading.Lock())
+    with lock:
+        if db_path.exists():
+            return db_path
+
+        # Build into a temporary file so readers never see a partial index
+        MANIFEST_INDEX_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = db_path.with_suffix(".tmp")
+        tmp_path.unlink(missing_ok=True)
+        with contextlib.closing(sqlite3.connect(tmp_path)) as db, db:
+            db.execute("PRAGMA journal_mode=OFF")
+            db.execute("PRAGMA synchronous=OFF")
+            db.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+            db.execute("""CREATE TABLE files (seq INTEGER PRIMARY KEY, path TEXT,
+                          rel TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER)""")
+            rows = ((seq, e["path"], e["rel"], e["sha256"],
+                     int(e["size"]) if e.get("size") not in (None, "") else None)
+                    for seq, e in enumerate(iter_manifest(str(manifest_path))))
+            db.executemany("INSERT INTO files VALUES (?, ?, ?, ?, ?)", rows)
+            db.execute("CREATE INDEX files_rel ON files (rel)")
+            db.execute("CREATE INDEX files_size ON files (size)")
+            db.execute("INSERT INTO meta VALUES ('stamp', ?)", (stamp,))
+        for attempt in range(5):
+            try:
+                os.replace(tmp_path, db_path)
+                break
+            except PermissionError:
+                # Typically a virus scanner holding the new file for a moment
+                if attempt == 4:
+                    raise
+                time.sleep(0.2)
+        # Indexes of older manifest versions; one still open is removed next time
+        for old in MANIFEST_INDEX_DIR.glob(f"{name}-*.sqlite3"):
+            if old != db_path:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+        return db_path
+
+
+def _manifest_query(prefix: Optional[str], pattern: Optional[str]) -> tuple[str, list]:
+    clauses, params = [], []
+    if prefix:
+        # Range on the rel index instead of LIKE, which ignores it
+        clauses.append("rel >= ? AND rel < ?")
+        params += [prefix, prefix + "\U0010ffff"]
+    if pattern:
+        clauses.append("rel GLOB ?")
+        params.append(pattern)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_manifest(asi_dir: str, prefix: Optional[str] = None, pattern: Optional[str] = None,
+                   sort: str = "manifest", offset: int = 0,
+                   limit: int = MANIFEST_PAGE_SIZE) -> tuple[int, list[dict]]:
+    """
+    Én side av manifestet. prefix filtrerer på starten av rel, pattern er
+    et glob-mønster (*, ?, [..]) mot hele rel. Returnerer (antall treff, rader).
+    """
+    where, params = _manifest_query(prefix, pattern)
+    with contextlib.closing(sqlite3.connect(manifest_index(asi_dir))) as db:
+        total = db.execute(f"SELECT COUNT(*) FROM files{where}", params).fetchone()[0]
+        rows = db.execute(f"SELECT path, rel, sha256, size FROM files{where} "
+                          f"ORDER BY {MANIFEST_SORTS[sort]} LIMIT ? OFFSET ?",
+                          params + [limit, offset]).fetchall()
+    return total, [{"path": p, "rel": r, "sha256": h, "size": n} for p, r, h, n in rows]
+
+
+def iter_manifest_query(asi_dir: str, prefix: Optional[str] = None,
+                        pattern: Optional[str] = None, sort: str = "manifest"):
+    """Alle treff som dicts, strømmet fra indeksen (for NDJSON)."""
+    where, params = _manifest_query(prefix, pattern)
+    db = sqlite3.connect(manifest_index(asi_dir))
+    try:
+        cursor = db.execute(f"SELECT path, rel, sha256, size FROM files{where} "
+                            f"ORDER BY {MANIFEST_SORTS[sort]}", params)
+        for p, r, h, n in cursor:
+            yield {"path": p, "rel": r, "sha256": h, "size": n}
+    finally:
+        db.close()
+
+
+_audit_index = None
+_audit_index_lock = threading.Lock()
+
+
+def get_audit_index() -> AuditIndex:
+    """Felles AuditIndex, opprettet ved første bruk."""
+    global _audit_index
+    with _audit_index_lock:
+        if _audit_index is None:
+            _audit_index = AuditIndex()
+        return _audit_index
+
+
 def load_manifest(asi_dir: str) -> list[dict]:
     """Les manifest.csv fra en .asi-omega mappe."""
     manifest_path = Path(asi_dir) / "manifest.csv"
@@ -70,38 +359,153 @@ def load_manifest(asi_dir: str) -> list[dict]:
         return list(csv.DictReader(f))
 
 
-def run_verify(target_path: str) -> dict:
-    """Kjør verifisering via subprocess og returner resultat."""
-    script = str(Path(__file__).parent / "asi_omega.py")
+def _run_captured(fn, *args, **kwargs) -> tuple:
+    """Kjør fn i denne tråden med utskriften fanget. Returnerer (verdi, linjer, returkode)."""
+    output = thread_output()
+    buffer = io.StringIO()
+    output.local.buffer = buffer
     try:
-        result = subprocess.run(
-            [sys.executable, script, "verify", target_path],
-            capture_output=True, text=True, timeout=120
-        )
-        lines = (result.stdout + result.stderr).strip().split("\n")
-        passed = result.returncode == 0
-        return {"passed": passed, "output": lines, "returncode": result.returncode}
-    except subprocess.TimeoutExpired:
-        return {"passed": False, "output": ["Timeout etter 120 sekunder"], "returncode": -1}
+        value = fn(*args, **kwargs)
+        returncode = 0
+    except SystemExit as e:
+        # audit() avslutter med sys.exit(1) når mappen er tom
+        value, returncode = None, e.code if isinstance(e.code, int) else 1
     except Exception as e:
-        return {"passed": False, "output": [str(e)], "returncode": -1}
+        buffer.write(f"  FEIL: {e}\n")
+        value, returncode = None, -1
+    finally:
+        output.local.buffer = None
+    return value, buffer.getvalue().strip().split("\n"), returncode
 
 
-def run_audit(target_path: str) -> dict:
-    """Kjør audit via subprocess og returner resultat."""
-    script = str(Path(__file__).parent / "asi_omega.py")
-    try:
-        result = subprocess.run(
-            [sys.executable, script, "audit", target_path],
-            capture_output=True, text=True, timeout=300
-        )
-        lines = (result.stdout + result.stderr).strip().split("\n")
-        success = result.returncode == 0
-        return {"success": success, "output": lines, "returncode": result.returncode}
-    except subprocess.TimeoutExpired:
-        return {"success": False, "output": ["Timeout etter 300 sekunder"], "returncode": -1}
-    except Exception as e:
-        return {"success": False, "output": [str(e)], "returncode": -1}
+def run_verify(target_path: str, on_event=None) -> dict:
+    """Kjør verifisering i prosessen og returner resultat."""
+    passed, lines, returncode = _run_captured(verify, target_path, on_event=on_event)
+    if returncode == 0 and not passed:
+        returncode = 1
+    return {"passed": bool(passed), "output": lines, "returncode": returncode}
+
+
+def run_audit(target_path: str, on_event=None) -> dict:
+    """Kjør audit i prosessen og returner resultat."""
+    dod, lines, returncode = _run_captured(audit, target_path, on_event=on_event)
+    if returncode == 0:
+        # Make a new audit visible without waiting for the next index scan
+        get_audit_index().update(Path(target_path).resolve() / ".asi-omega")
+    return {"success": returncode == 0, "output": lines, "returncode": returncode}
+
+
+# ─────────────────────────────────────────────────────
+# Jobbmotor: audit/verify i bakgrunnen
+# ─────────────────────────────────────────────────────
+
+MAX_JOBS = 2              # audits/verifiseringer som kjører samtidig
+MAX_FINISHED_JOBS = 100   # ferdige jobber som huskes for /api/jobs
+MAX_JOB_FAILURES = 100    # feilhendelser som lagres per jobb
+
+JOB_RUNNERS = {"audit": run_audit, "verify": run_verify}
+
+
+class JobEngine:
+    """
+    Kjører audit og verify i en trådpool med MAX_JOBS arbeidere. submit()
+    returnerer jobb-ID straks; en jobb av samme type på samme sti som
+    fortsatt står i kø eller kjører gjenbrukes i stedet for å startes på
+    nytt. Fremdrift kommer fra hendelses-API-et i asi_omega
+    (ProgressReporter), utskriften fanges per jobb.
+    """
+
+    def __init__(self, max_workers: int = MAX_JOBS):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers,
+                                           thread_name_prefix="asi-omega-job")
+        self.lock = threading.Lock()
+        self.jobs: "OrderedDict[str, dict]" = OrderedDict()
+        self.active: dict[tuple, str] = {}
+
+    def submit(self, kind: str, target_path: str) -> tuple[dict, bool]:
+        """Legg en jobb i kø. Returnerer (jobb, gjenbrukt)."""
+        key = (kind, os.path.normcase(os.path.abspath(target_path)))
+        with self.lock:
+            job_id = self.active.get(key)
+            if job_id is not None:
+                return self._public(self.jobs[job_id]), True
+            job = {
+                "id": uuid.uuid4().hex,
+                "kind": kind,
+                "path": target_path,
+                "status": "queued",
+                "created": datetime.now().isoformat(),
+                "started": None,
+                "finished": None,
+                "phase": None,
+                "progress": None,
+                "failures": [],
+                "failure_count": 0,
+                "result": None,
+                "error": None,
+                "_key": key,
+            }
+            self.jobs[job["id"]] = job
+            self.active[key] = job["id"]
+            self._evict()
+        self.executor.submit(self._run, job)
+        return self._public(job), False
+
+    def _run(self, job: dict):
+        with self.lock:
+            job["status"] = "running"
+            job["started"] = datetime.now().isoformat()
+        result, error = None, None
+        try:
+            result = JOB_RUNNERS[job["kind"]](job["path"],
+                                              on_event=lambda e: self._on_event(job, e))
+        except Exception as e:
+            # E.g. a locked or unwritable audit index after a finished audit
+            error = f"{type(e).__name__}: {e}"
+            result = {"output": [f"  FEIL: {error}"], "returncode": -1}
+        finally:
+            # Always free the path, or later jobs would attach to this one
+            with self.lock:
+                job["result"] = result
+                job["error"] = error
+                ok = result is not None and result["returncode"] in (0, 1)
+                job["status"] = "finished" if ok else "error"
+                job["finished"] = datetime.now().isoformat()
+                del self.active[job["_key"]]
+
+    def _on_event(self, job: dict, event: dict):
+        with self.lock:
+            kind = event["event"]
+            if kind == "phase":
+                job["phase"] = event["phase"]
+            elif kind == "progress":
+                job["progress"] = event
+            elif kind in ("failure", "warning"):
+                job["failure_count"] += kind == "failure"
+                if len(job["failures"]) < MAX_JOB_FAILURES:
+                    job["failures"].append(event)
+
+    def _evict(self):
+        finished = [j["id"] for j in self.jobs.values() if j["status"] in ("finished", "error")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    @staticmethod
+    def _public(job: dict, with_result: bool = False) -> dict:
+        skip = ("_key",) if with_result else ("_key", "result")
+        return {k: v for k, v in job.items() if k not in skip}
+
+    def get(self, job_id: str, with_result: bool = False):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return self._public(job, with_result) if job else None
+
+    def list_jobs(self) -> list[dict]:
+        with self.lock:
+            return [self._public(j) for j in self.jobs.values()]
+
+
+jobs = JobEngine()
 
 
 def format_size(size_bytes):
@@ -275,6 +679,11 @@ DASHBOARD_HTML = """
         .file-table tr:hover td { background: #1a1a2e; }
         .hash-cell { color: #78909c; font-size: 11px; }
         .size-cell { color: #4fc3f7; text-align: right; }
+        .file-controls { display: flex; gap: 8px; align-items: center; margin-bottom: 8px; font-size: 12px; color: #78909c; }
+        .file-controls input, .file-controls select {
+            background: #0a0a0f; color: #e0e0e0; border: 1px solid #1e1e2e; border-radius: 4px; padding: 6px 8px; font-size: 12px;
+        }
+        .file-controls input { flex: 1; }
 
         /* Verify output */
         .verify-output {
@@ -453,8 +862,8 @@ DASHBOARD_HTML = """
 let audits = [];
 let verifyResults = {};
 
-async function loadAudits() {
-    const resp = await fetch('/api/audits');
+async function loadAudits(rescan) {
+    const resp = await fetch('/api/audits' + (rescan ? '?refresh=1' : ''));
     audits = await resp.json();
     renderAudits();
     updateStats();
@@ -550,18 +959,40 @@ async function toggleDetail(idx, ev) {
     }
 }
 
-async function loadFiles(idx) {
+const PAGE_SIZE = 100;
+let fileQuery = {};
+
+async function loadFiles(idx, changes) {
     const a = audits[idx];
-    const resp = await fetch('/api/manifest?path=' + encodeURIComponent(a.asi_dir));
-    const files = await resp.json();
+    const q = fileQuery[idx] = Object.assign({filter: '', sort: 'manifest', offset: 0}, fileQuery[idx], changes || {});
+    const params = new URLSearchParams({path: a.asi_dir, sort: q.sort, offset: q.offset, limit: PAGE_SIZE});
+    // A filter with glob characters is a glob, anything else a prefix
+    if (q.filter) params.set(/[*?\\[]/.test(q.filter) ? 'glob' : 'prefix', q.filter);
+    const resp = await fetch('/api/manifest?' + params);
+    const page = await resp.json();
+    const files = page.entries || [];
 
     const container = document.getElementById(`tab-files-${idx}`);
-    if (files.length === 0) {
+    if (files.length === 0 && !q.filter) {
         container.innerHTML = '<div style="color:#666">Ingen filer i manifest</div>';
         return;
     }
 
+    const last = Math.min(q.offset + files.length, page.total);
     container.innerHTML = `
+        <div class="file-controls">
+            <input type="text" id="file-filter-${idx}" value="${escHtml(q.filter)}" placeholder="Filter: prefiks eller glob (*.pdf)"
+                   onkeydown="if (event.key === 'Enter') loadFiles(${idx}, {filter: this.value, offset: 0})">
+            <select onchange="loadFiles(${idx}, {sort: this.value, offset: 0})">
+                <option value="manifest" ${q.sort === 'manifest' ? 'selected' : ''}>Manifestrekkefolge</option>
+                <option value="rel" ${q.sort === 'rel' ? 'selected' : ''}>Navn</option>
+                <option value="-size" ${q.sort === '-size' ? 'selected' : ''}>Storst forst</option>
+                <option value="size" ${q.sort === 'size' ? 'selected' : ''}>Minst forst</option>
+            </select>
+            <span>${page.total ? (q.offset + 1) + '-' + last : 0} av ${page.total}</span>
+            <button class="btn" ${q.offset === 0 ? 'disabled' : ''} onclick="loadFiles(${idx}, {offset: ${Math.max(0, q.offset - PAGE_SIZE)}})">Forrige</button>
+            <button class="btn" ${last >= page.total ? 'disabled' : ''} onclick="loadFiles(${idx}, {offset: ${q.offset + PAGE_SIZE}})">Neste</button>
+        </div>
         <table class="file-table">
             <thead><tr><th>Fil</th><th>SHA-256</th><th style="text-align:right">Storrelse</th></tr></thead>
             <tbody>
@@ -576,8 +1007,8 @@ async function loadFiles(idx) {
         </table>
     `;
 
-    // Build merkle visualization
-    buildMerkleViz(idx, files.map(f => f.sha256));
+    // Build merkle visualization from the first page in manifest order
+    if (q.sort === 'manifest' && q.offset === 0 && !q.filter) buildMerkleViz(idx, files.map(f => f.sha256));
 }
 
 function buildMerkleViz(idx, hashes) {
@@ -642,12 +1073,9 @@ async function runVerify(idx) {
     const outputEl = document.getElementById(`verify-output-${idx}`);
     outputEl.innerHTML = '<div style="margin-top:12px"><span class="spinner"></span> Verifiserer...</div>';
 
-    const resp = await fetch('/api/verify', {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({path: a.path})
+    const result = await startJob('verify', a.path, job => {
+        outputEl.innerHTML = '<div style="margin-top:12px"><span class="spinner"></span> Verifiserer... ' + escHtml(progressText(job)) + '</div>';
     });
-    const result = await resp.json();
     verifyResults[idx] = result.passed;
 
     let html = '<div class="verify-output">';
@@ -672,6 +1100,35 @@ async function runVerify(idx) {
     }
 }
 
+const sleep = ms => new Promise(r => setTimeout(r, ms));
+
+function progressText(job) {
+    const p = job.progress;
+    if (job.status === 'queued') return 'I koe...';
+    if (!p) return job.phase ? `Fase: ${job.phase}` : 'Starter...';
+    let text = `${job.phase || p.phase}: ${p.files} filer, ${formatSize(p.bytes)}`;
+    if (p.eta_seconds !== null && p.eta_seconds !== undefined) text += `, ca. ${Math.ceil(p.eta_seconds)} s igjen`;
+    return text;
+}
+
+async function startJob(kind, path, onProgress) {
+    const resp = await fetch('/api/' + kind, {
+        method: 'POST',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({path: path})
+    });
+    const started = await resp.json();
+    if (!resp.ok) return started;
+
+    while (true) {
+        await sleep(1000);
+        const job = await (await fetch('/api/jobs/' + started.job_id)).json();
+        if (job.status === 'finished' || job.status === 'error') break;
+        onProgress(job);
+    }
+    return await (await fetch('/api/jobs/' + started.job_id + '/result')).json();
+}
+
 function toggleAuditForm() {
     document.getElementById('auditForm').classList.toggle('visible');
     document.getElementById('auditPath').focus();
@@ -684,12 +1141,9 @@ async function startAudit() {
     const form = document.getElementById('auditForm');
     form.innerHTML = '<div><span class="spinner"></span> Kjorer audit paa ' + escHtml(path) + '...</div>';
 
-    const resp = await fetch('/api/audit', {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify({path: path})
+    const result = await startJob('audit', path, job => {
+        form.innerHTML = '<div><span class="spinner"></span> Kjorer audit paa ' + escHtml(path) + '... ' + escHtml(progressText(job)) + '</div>';
     });
-    const result = await resp.json();
 
     if (result.success) {
         form.classList.remove('visible');
@@ -717,7 +1171,7 @@ async function startAudit() {
 
 async function refreshAll() {
     verifyResults = {};
-    await loadAudits();
+    await loadAudits(true);
 }
 
 // Init
@@ -754,11 +1208,15 @@ def api_audits():
         "C:/Claude/Projects",
     ])
 
+    index = get_audit_index()
+    refresh = request.args.get("refresh") == "1"
     all_audits = []
     seen = set()
     for p in search_paths:
         if os.path.isdir(p):
-            for a in find_audits(p):
+            if refresh:
+                index.refresh(p)
+            for a in index.audits(p):
                 if a["asi_dir"] not in seen:
                     seen.add(a["asi_dir"])
                     all_audits.append(a)
@@ -768,31 +1226,79 @@ def api_audits():
 
 @app.route("/api/manifest")
 def api_manifest():
+    """
+    ?path=<asi_dir> [&prefix=][&glob=][&sort=manifest|rel|size|-size]
+    [&offset=][&limit=] gir én side; &format=ndjson strømmer alle treff.
+    """
     asi_dir = request.args.get("path", "")
     if not asi_dir or not os.path.isdir(asi_dir):
-        return jsonify([])
-    entries = load_manifest(asi_dir)
-    return jsonify(entries)
+        return jsonify({"total": 0, "offset": 0, "limit": 0, "entries": []})
+    prefix = request.args.get("prefix") or None
+    pattern = request.args.get("glob") or None
+    sort = request.args.get("sort", "manifest")
+    if sort not in MANIFEST_SORTS:
+        return jsonify({"error": f"Ukjent sortering: {sort}"}), 400
+    try:
+        offset = max(0, int(request.args.get("offset", 0)))
+        limit = min(MANIFEST_MAX_PAGE_SIZE,
+                    max(1, int(request.args.get("limit", MANIFEST_PAGE_SIZE))))
+    except ValueError:
+        return jsonify({"error": "offset og limit maa vaere heltall"}), 400
+    if not (Path(asi_dir) / "manifest.csv").exists():
+        return jsonify({"total": 0, "offset": offset, "limit": limit, "entries": []})
+
+    if request.args.get("format") == "ndjson":
+        manifest_index(asi_dir)  # build before streaming starts
+        lines = (json.dumps(e, ensure_ascii=False) + "\n"
+                 for e in iter_manifest_query(asi_dir, prefix, pattern, sort))
+        return Response(lines, mimetype="application/x-ndjson")
+
+    total, entries = query_manifest(asi_dir, prefix, pattern, sort, offset, limit)
+    return jsonify({"total": total, "offset": offset, "limit": limit, "entries": entries})
+
+
+def _submit_job(kind: str):
+    data = request.get_json(silent=True) or {}
+    target = data.get("path", "")
+    if not target or not os.path.isdir(target):
+        return jsonify({"error": "Ugyldig sti", "output": ["Ugyldig sti"], "returncode": -1}), 400
+    job, deduplicated = jobs.submit(kind, target)
+    return jsonify({"job_id": job["id"], "status": job["status"],
+                    "deduplicated": deduplicated}), 202
 
 
 @app.route("/api/verify", methods=["POST"])
 def api_verify():
-    data = request.get_json()
-    target = data.get("path", "")
-    if not target or not os.path.isdir(target):
-        return jsonify({"passed": False, "output": ["Ugyldig sti"], "returncode": -1})
-    result = run_verify(target)
-    return jsonify(result)
+    return _submit_job("verify")
 
 
 @app.route("/api/audit", methods=["POST"])
 def api_audit():
-    data = request.get_json()
-    target = data.get("path", "")
-    if not target or not os.path.isdir(target):
-        return jsonify({"success": False, "output": ["Ugyldig sti"], "returncode": -1})
-    result = run_audit(target)
-    return jsonify(result)
+    return _submit_job("audit")
+
+
+@app.route("/api/jobs")
+def api_jobs():
+    return jsonify(jobs.list_jobs())
+
+
+@app.route("/api/jobs/<job_id>")
+def api_job_status(job_id):
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Ukjent jobb"}), 404
+    return jsonify(job)
+
+
+@app.route("/api/jobs/<job_id>/result")
+def api_job_result(job_id):
+    job = jobs.get(job_id, with_result=True)
+    if job is None:
+        return jsonify({"error": "Ukjent jobb"}), 404
+    if job["result"] is None:
+        # Not done yet; the client keeps polling
+        return jsonify({"status": job["status"]}), 202
+    return jsonify({"status": job["status"], **job["result"]})
 
 
 # ─────────────────────────────────────────────────────
@@ -0,0 +1,52 @@
+"""Shared fixtures for the v2 test suite. Run with: python -m pytest v2/tests"""
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import asi_omega  # noqa: E402
+
+
+def make_tree(root: Path, seed: int = 1) -> Path:
+    """Small deterministic tree: nested folders, loose files, an empty file."""
+    rng = random.Random(seed)
+    (root / "a" / "deep" / "er").mkdir(parents=True)
+    (root / "b").mkdir()
+    (root / "B2").mkdir()
+    files = ["top.txt", "Zeta.bin", "a/one.txt", "a/deep/two.txt", "a/deep/er/three.bin",
+             "b/x.dat", "b/y.dat", "B2/z.dat"]
+    files += [f"b/many{i:03d}.txt" for i in range(40)]
+    for rel in files:
+        (root / rel).write_bytes(rng.randbytes(rng.randint(1, 5000)))
+    (root / "a" / "empty.txt").write_bytes(b"")
+    return root
+
+
+@pytest.fixture
+def tree(tmp_path) -> Path:
+    return make_tree(tmp_path / "tree")
+
+
+@pytest.fixture
+def audited(tree) -> Path:
+    asi_omega.audit(str(tree))
+    return tree
+
+
+def manifest_bytes(target: Path) -> bytes:
+    return (target / ".asi-omega" / "manifest.csv").read_bytes()
+
+
+def rows(entries) -> list[tuple]:
+    return [(e["rel"], e["sha256"], int(e["size"])) for e in entries]
+
+
+def cli(*args) -> subprocess.CompletedProcess:
+    """Run asi_omega.py as the command line does."""
+    return subprocess.run([sys.executable, asi_omega.__file__, *map(str, args)],
+                          capture_output=True, text=True)
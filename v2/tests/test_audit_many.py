@@ -0,0 +1,131 @@
+"""audit-many: the shared device scheduler and per-target results."""
+import json
+import threading
+import time
+
+import pytest
+
+import asi_omega
+from conftest import cli, make_tree, manifest_bytes
+
+
+@pytest.fixture
+def folders(tmp_path):
+    """Three small trees, one missing path and one empty folder."""
+    trees = [make_tree(tmp_path / f"t{i}", seed=i) for i in range(3)]
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    return trees, tmp_path / "missing", empty
+
+
+def test_results_in_given_order(folders, capsys):
+    trees, missing, empty = folders
+    targets = [str(trees[0]), str(missing), str(trees[1]), str(empty), str(trees[2])]
+    results = asi_omega.audit_many(targets, jobs=4, per_device=2, parallel=2)
+    assert [r["target"] for r in results] == targets
+    assert [r["ok"] for r in results] == [True, False, True, False, True]
+    assert results[1]["error"] == "Mappe ikke funnet"
+    assert results[3]["error"] == "Ingen filer funnet"
+    assert all(r["file_count"] == 49 for r in results if r["ok"])
+    assert any("AUDIT FULLFORT" in line for line in results[0]["output"])
+    out = capsys.readouterr().out
+    assert "3 av 5 mapper revidert, 147 filer" in out
+    assert "FEIL: 2 mappe(r) feilet" in out
+
+
+def test_same_output_as_single_audit(folders):
+    trees, _, _ = folders
+    results = asi_omega.audit_many([str(t) for t in trees], jobs=3, per_device=1)
+    for t, result in zip(trees, results):
+        batch = manifest_bytes(t)
+        dod = asi_omega.audit(str(t), jobs=1)
+        assert manifest_bytes(t) == batch
+        assert dod["merkle_root"] == result["merkle_root"]
+
+
+def test_unexpected_error_stays_with_its_target(folders, monkeypatch):
+    trees, _, _ = folders
+    real = asi_omega.audit
+
+    def audit(target, **kwargs):
+        if target == str(trees[1]):
+            raise RuntimeError("disk on fire")
+        return real(target, **kwargs)
+
+    monkeypatch.setattr(asi_omega, "audit", audit)
+    results = asi_omega.audit_many([str(t) for t in trees], jobs=2)
+    assert [r["ok"] for r in results] == [True, False, True]
+    assert results[1]["error"] == "RuntimeError: disk on fire"
+    assert (trees[2] / ".asi-omega" / "dod.json").exists()
+
+
+def test_events_carry_target(folders):
+    trees, _, _ = folders
+    events = []
+    asi_omega.audit_many([str(t) for t in trees[:2]], jobs=2, on_event=events.append)
+    done = [e for e in events if e["event"] == "done"]
+    assert sorted(e["target"] for e in done) == sorted(str(t) for t in trees[:2])
+
+
+def test_cli_writes_summary_despite_failures(folders, tmp_path):
+    trees, missing, empty = folders
+    summary = tmp_path / "summary.json"
+    result = cli("audit-many", trees[0], missing, empty, "--jobs", 2,
+                 "--summary-out", summary)
+    assert result.returncode == 1
+    rows = json.loads(summary.read_text(encoding="utf-8"))
+    assert [(r["target"], r["ok"]) for r in rows] == \
+        [(str(trees[0]), True), (str(missing), False), (str(empty), False)]
+    assert all("output" not in r for r in rows)
+
+
+def test_expand_targets_reads_lists_and_globs(folders, tmp_path):
+    trees, missing, _ = folders
+    listing = tmp_path / "targets.txt"
+    listing.write_text(f"# batch\n{trees[0]}\n{tmp_path / 't[12]'}  # two more\n{missing}\n",
+                       encoding="utf-8")
+    targets = asi_omega.expand_targets([str(listing), str(trees[0])])
+    assert targets == [str(trees[0]), str(trees[1]), str(trees[2]), str(missing)]
+
+
+# ── DeviceScheduler ──────────────────────────────────
+
+def test_scheduler_caps_reads_per_device():
+    running: dict[int, int] = {}
+    peak: dict[int, int] = {}
+    lock = threading.Lock()
+
+    def work(dev):
+        with lock:
+            running[dev] = running.get(dev, 0) + 1
+            peak[dev] = max(peak.get(dev, 0), running[dev])
+        time.sleep(0.01)
+        with lock:
+            running[dev] -= 1
+        return dev
+
+    with asi_omega.DeviceScheduler(jobs=6, per_device=2) as scheduler:
+        futures = [scheduler.submit(dev, work, dev) for _ in range(10) for dev in (1, 2, 3)]
+        assert sorted(f.result() for f in futures) == sorted([1, 2, 3] * 10)
+    assert peak == {1: 2, 2: 2, 3: 2}
+
+
+def test_scheduler_failure_frees_the_slot():
+    def fail():
+        raise OSError("unreadable")
+
+    with asi_omega.DeviceScheduler(jobs=2, per_device=1) as scheduler:
+        bad = scheduler.submit(7, fail)
+        good = scheduler.submit(7, lambda: "next")
+        with pytest.raises(OSError):
+            bad.result(timeout=10)
+        assert good.result(timeout=10) == "next"
+    assert scheduler._running == {7: 0}
+
+
+def test_device_executor_submits_to_its_device():
+    with asi_omega.DeviceScheduler(jobs=3, per_device=2) as scheduler:
+        executor = scheduler.for_device(1)
+        futures = [executor.submit(pow, x, 2) for x in range(20)]
+        assert [f.result(timeout=10) for f in futures] == [x * x for x in range(20)]
+    assert scheduler._running == {1: 0}
@@ -0,0 +1,61 @@
+"""manifest.bin: same rows and the same lookups as manifest.csv."""
+import os
+
+import pytest
+
+import asi_omega
+from conftest import rows
+
+
+def write(tmp_path, entries, root="ab" * 32):
+    path = str(tmp_path / asi_omega.BINARY_MANIFEST_NAME)
+    asi_omega.write_binary_manifest(entries, path, "/base", root)
+    return path
+
+
+def test_rows_match_csv(tree):
+    asi_omega.audit(str(tree), binary_manifest=True)
+    out = tree / ".asi-omega"
+    csv_rows = list(asi_omega.iter_manifest(str(out / "manifest.csv")))
+    with asi_omega.open_binary_manifest(str(out)) as bm:
+        assert len(bm) == len(csv_rows)
+        assert rows(bm) == rows(csv_rows)
+        for index, e in enumerate(csv_rows):
+            assert bm.find(e["rel"]) == (index, bm.entry(index))
+            assert bm.sha256(index) == e["sha256"]
+
+
+@pytest.mark.parametrize("rel", ["top.txt", os.path.join(".", "a", "one.txt"),
+                                 "a" + os.sep + os.sep + "one.txt", "missing.txt", "a"])
+def test_find_agrees_with_csv_lookup(audited, rel):
+    out = audited / ".asi-omega"
+    path = write(out, asi_omega.iter_manifest(str(out / "manifest.csv")))
+    with asi_omega.BinaryManifest(path) as bm:
+        index, entry = bm.find(rel)
+    csv_index, csv_entry = asi_omega._find_manifest_entry(str(out / "manifest.csv"), rel)
+    assert index == csv_index
+    assert (entry is None) == (csv_entry is None)
+
+
+def test_find_is_case_insensitive_where_paths_are(tmp_path, monkeypatch):
+    monkeypatch.setattr(os.path, "normcase", str.lower)
+    rels = ["B2/z", "a/x", "b/y", "Zeta", "top"]
+    entries = [{"rel": rel, "sha256": f"{i:064x}", "size": i} for i, rel in enumerate(rels)]
+    with asi_omega.BinaryManifest(write(tmp_path, entries)) as bm:
+        for i, rel in enumerate(rels):
+            assert bm.find(rel.upper())[0] == i
+            assert bm.find(rel.lower())[0] == i
+        assert bm.find("nope") == (-1, None)
+
+
+def test_older_format_falls_back_to_csv(tmp_path):
+    path = write(tmp_path, [{"rel": "f", "sha256": "00" * 32, "size": 1}])
+    with open(path, "r+b") as f:
+        f.write(b"ASIMANF1")
+    assert asi_omega.open_binary_manifest(str(tmp_path)) is None
+
+
+def test_stale_root_ignored(tmp_path):
+    write(tmp_path, [{"rel": "f", "sha256": "00" * 32, "size": 1}])
+    assert asi_omega.open_binary_manifest(str(tmp_path), "cd" * 32) is None
+    asi_omega.open_binary_manifest(str(tmp_path), "ab" * 32).close()
@@ -0,0 +1,384 @@
+"""Dashboard: background jobs, the audit index and the manifest API."""
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask")
+
+import asi_omega  # noqa: E402
+import dashboard  # noqa: E402
+
+
+@pytest.fixture
+def dash(tmp_path, monkeypatch):
+    """dashboard with its index, manifest indexes and job engine under tmp_path."""
+    monkeypatch.setattr(dashboard, "_audit_index",
+                        dashboard.AuditIndex(str(tmp_path / "index" / "index.sqlite3")))
+    monkeypatch.setattr(dashboard, "MANIFEST_INDEX_DIR", tmp_path / "index" / "manifests")
+    monkeypatch.setattr(dashboard, "jobs", dashboard.JobEngine())
+    yield dashboard
+    dashboard.jobs.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def client(dash):
+    return dash.app.test_client()
+
+
+def wait_job(engine, job_id, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = engine.get(job_id, with_result=True)
+        if job["status"] in ("finished", "error"):
+            return job
+        time.sleep(0.02)
+    pytest.fail(f"job {job_id} did not finish")
+
+
+# ── JobEngine ────────────────────────────────────────
+
+def test_audit_then_verify_job(dash, tree):
+    job, reused = dash.jobs.submit("audit", str(tree))
+    assert not reused and job["status"] in ("queued", "running")
+    assert "result" not in job
+    done = wait_job(dash.jobs, job["id"])
+    assert done["status"] == "finished" and done["result"]["success"]
+    assert any("AUDIT FULLFORT" in line for line in done["result"]["output"])
+
+    (tree / "top.txt").write_bytes(b"changed size")
+    job, _ = dash.jobs.submit("verify", str(tree))
+    done = wait_job(dash.jobs, job["id"])
+    assert done["status"] == "finished"
+    assert done["result"]["passed"] is False and done["result"]["returncode"] == 1
+    assert done["phase"] == "hash"
+    assert done["failure_count"] == 1
+    assert [(f["kind"], f["rel"]) for f in done["failures"]] == [("resized", "top.txt")]
+
+
+def test_running_job_is_reused(dash, tree, monkeypatch):
+    release = threading.Event()
+
+    def slow(path, on_event=None):
+        release.wait(10)
+        return {"returncode": 0, "output": []}
+
+    monkeypatch.setitem(dash.JOB_RUNNERS, "verify", slow)
+    first, reused_first = dash.jobs.submit("verify", str(tree))
+    second, reused_second = dash.jobs.submit("verify", str(tree) + os.sep)
+    other, reused_other = dash.jobs.submit("audit", str(tree))
+    assert (reused_first, reused_second) == (False, True)
+    assert second["id"] == first["id"]
+    assert not reused_other and other["id"] != first["id"]
+    release.set()
+    wait_job(dash.jobs, first["id"])
+    wait_job(dash.jobs, other["id"])
+    # Finished jobs no longer absorb new submissions
+    again, reused = dash.jobs.submit("verify", str(tree))
+    assert not reused and again["id"] != first["id"]
+    wait_job(dash.jobs, again["id"])
+
+
+def test_failing_runner_marks_error_and_frees_path(dash, tree, monkeypatch):
+    def broken(path, on_event=None):
+        raise RuntimeError("index locked")
+
+    monkeypatch.setitem(dash.JOB_RUNNERS, "verify", broken)
+    job, _ = dash.jobs.submit("verify", str(tree))
+    done = wait_job(dash.jobs, job["id"])
+    assert done["status"] == "error"
+    assert done["error"] == "RuntimeError: index locked"
+    assert done["result"]["returncode"] == -1
+    _, reused = dash.jobs.submit("verify", str(tree))
+    assert not reused
+
+
+def test_empty_folder_audit_is_error(dash, tmp_path):
+    empty = tmp_path / "empty"
+    empty.mkdir()
+    job, _ = dash.jobs.submit("audit", str(empty))
+    done = wait_job(dash.jobs, job["id"])
+    assert done["status"] == "finished"
+    assert done["result"]["success"] is False and done["result"]["returncode"] == 1
+
+
+def test_finished_jobs_are_evicted(dash, tree, monkeypatch):
+    monkeypatch.setattr(dash, "MAX_FINISHED_JOBS", 2)
+    monkeypatch.setitem(dash.JOB_RUNNERS, "verify",
+                        lambda path, on_event=None: {"returncode": 0, "output": []})
+    ids = []
+    for _ in range(4):
+        job, _ = dash.jobs.submit("verify", str(tree))
+        wait_job(dash.jobs, job["id"])
+        ids.append(job["id"])
+    dash.jobs.submit("verify", str(tree))
+    remaining = [j["id"] for j in dash.jobs.list_jobs()]
+    assert ids[:2] == [i for i in ids if i not in remaining]
+
+
+def test_job_failures_are_capped(dash, audited, monkeypatch):
+    monkeypatch.setattr(dash, "MAX_JOB_FAILURES", 3)
+    for i in range(10):
+        (audited / "b" / f"many{i:03d}.txt").write_bytes(b"")
+    job, _ = dash.jobs.submit("verify", str(audited))
+    done = wait_job(dash.jobs, job["id"])
+    assert done["failure_count"] == 10
+    assert len(done["failures"]) == 3
+
+
+# ── /api/jobs ────────────────────────────────────────
+
+def test_job_api_flow(client, dash, tree):
+    response = client.post("/api/audit", json={"path": str(tree)})
+    assert response.status_code == 202
+    job_id = response.get_json()["job_id"]
+    assert client.get("/api/jobs").get_json()[0]["id"] == job_id
+    wait_job(dash.jobs, job_id)
+    status = client.get(f"/api/jobs/{job_id}").get_json()
+    assert status["status"] == "finished" and "result" not in status
+    result = client.get(f"/api/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert result.get_json()["success"] is True
+
+    response = client.post("/api/verify", json={"path": str(tree)})
+    job_id = response.get_json()["job_id"]
+    wait_job(dash.jobs, job_id)
+    assert client.get(f"/api/jobs/{job_id}/result").get_json()["passed"] is True
+
+
+def test_job_api_pending_result(client, dash, tree, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setitem(dash.JOB_RUNNERS, "verify",
+                        lambda path, on_event=None: release.wait(10) and
+                        {"returncode": 0, "output": []})
+    job_id = client.post("/api/verify", json={"path": str(tree)}).get_json()["job_id"]
+    again = client.post("/api/verify", json={"path": str(tree)}).get_json()
+    assert again["job_id"] == job_id and again["deduplicated"] is True
+    response = client.get(f"/api/jobs/{job_id}/result")
+    assert response.status_code == 202
+    assert response.get_json()["status"] in ("queued", "running")
+    release.set()
+    wait_job(dash.jobs, job_id)
+
+
+def test_job_api_errors(client, tmp_path):
+    assert client.post("/api/verify", json={"path": str(tmp_path / "nope")}).status_code == 400
+    assert client.post("/api/audit", data="not json").status_code == 400
+    assert client.get("/api/jobs/unknown").status_code == 404
+    assert client.get("/api/jobs/unknown/result").status_code == 404
+
+
+# ── AuditIndex ───────────────────────────────────────
+
+@pytest.fixture
+def base(tmp_path):
+    """Search path with two audited folders, one nested a level down."""
+    root = tmp_path / "base"
+    for sub in ("one", "group/two"):
+        folder = root / sub
+        folder.mkdir(parents=True)
+        (folder / "data.txt").write_text(sub, encoding="utf-8")
+        asi_omega.audit(str(folder))
+    return root
+
+
+def audited_paths(entries):
+    return sorted(os.path.relpath(e["path"]) for e in entries)
+
+
+def test_index_scans_new_base(dash, base, monkeypatch):
+    monkeypatch.chdir(base)
+    entries = dash.get_audit_index().audits(str(base))
+    assert audited_paths(entries) == [os.path.join("group", "two"), "one"]
+    assert all(e["file_count"] == 1 and len(e["merkle_root"]) == 64 for e in entries)
+
+
+def test_index_reads_only_changed_dod(dash, base, monkeypatch):
+    index = dash.get_audit_index()
+    index.audits(str(base))
+    reads = []
+    real = dash.read_audit
+    monkeypatch.setattr(dash, "read_audit", lambda d: reads.append(d) or real(d))
+    assert len(index.audits(str(base))) == 2
+    assert reads == []
+
+    dod = base / "one" / ".asi-omega" / "dod.json"
+    data = json.loads(dod.read_text(encoding="utf-8"))
+    data["generated"] = "2001-01-01T00:00:00"
+    dod.write_text(json.dumps(data), encoding="utf-8")
+    st = dod.stat()
+    os.utime(dod, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    entries = index.audits(str(base))
+    assert reads == [dod.parent]
+    assert {e["generated"] for e in entries if e["path"] == str(base / "one")} == \
+        {"2001-01-01T00:00:00"}
+
+
+def test_index_drops_deleted_dod(dash, base):
+    index = dash.get_audit_index()
+    index.audits(str(base))
+    (base / "one" / ".asi-omega" / "dod.json").unlink()
+    assert [e["path"] for e in index.audits(str(base))] == [str(base / "group" / "two")]
+    with sqlite3.connect(index.path) as db:
+        assert db.execute("SELECT COUNT(*) FROM audits").fetchone()[0] == 1
+
+
+def test_index_refresh_finds_new_and_vanished(dash, base):
+    index = dash.get_audit_index()
+    index.audits(str(base))
+    three = base / "three"
+    three.mkdir()
+    (three / "x.txt").write_text("x", encoding="utf-8")
+    asi_omega.audit(str(three))
+    # Known search path: answered from the index until the next refresh
+    assert len(index.audits(str(base))) == 2
+    shutil.rmtree(base / "group")
+    index.refresh(str(base))
+    assert [e["path"] for e in index.audits(str(base))] == [str(base / "one"), str(three)]
+
+
+def test_index_stale_base_refreshes_in_background(dash, base, monkeypatch):
+    index = dash.get_audit_index()
+    index.audits(str(base))
+    monkeypatch.setattr(dash, "INDEX_REFRESH_SECONDS", -1)
+    calls = []
+    monkeypatch.setattr(index, "refresh_async", calls.append)
+    assert len(index.audits(str(base))) == 2
+    assert calls == [str(base)]
+
+
+def test_index_update_files_under_every_base(dash, base):
+    index = dash.get_audit_index()
+    inner = str(base / "group")
+    index.audits(str(base))
+    index.audits(inner)
+    index.update(base / "group" / "two" / ".asi-omega")
+    with sqlite3.connect(index.path) as db:
+        keys = sorted(b for (b,) in db.execute(
+            "SELECT base FROM audits WHERE asi_dir = ?",
+            (str(base / "group" / "two" / ".asi-omega"),)))
+    assert keys == sorted(index._key(p) for p in (str(base), inner))
+
+
+def test_index_persists_across_instances(dash, base):
+    dash.get_audit_index().audits(str(base))
+    again = dash.AuditIndex(dash.get_audit_index().path)
+    with sqlite3.connect(again.path) as db:
+        assert db.execute("SELECT COUNT(*) FROM bases").fetchone()[0] == 1
+    assert len(again.audits(str(base))) == 2
+
+
+def test_audit_job_updates_index(dash, base):
+    index = dash.get_audit_index()
+    index.audits(str(base))
+    (base / "one" / "more.txt").write_text("more", encoding="utf-8")
+    job, _ = dash.jobs.submit("audit", str(base / "one"))
+    wait_job(dash.jobs, job["id"])
+    entry = [e for e in index.audits(str(base)) if e["path"] == str(base / "one")]
+    assert entry[0]["file_count"] == 2
+
+
+def test_api_audits_with_base(client, base):
+    entries = client.get("/api/audits", query_string={"base": str(base)}).get_json()
+    mine = [e for e in entries if e["path"].startswith(str(base))]
+    assert len(mine) == 2
+
+
+# ── Manifest index and /api/manifest ─────────────────
+
+def manifest_entries(target):
+    return list(asi_omega.iter_manifest(str(target / ".asi-omega" / "manifest.csv")))
+
+
+def test_manifest_index_built_once_and_rebuilt_on_change(dash, audited):
+    asi_dir = str(audited / ".asi-omega")
+    first = dash.manifest_index(asi_dir)
+    assert dash.manifest_index(asi_dir) == first
+    with sqlite3.connect(first) as db:
+        assert db.execute("SELECT COUNT(*) FROM files").fetchone()[0] == 49
+
+    (audited / "extra.txt").write_text("extra", encoding="utf-8")
+    asi_omega.audit(str(audited))
+    second = dash.manifest_index(asi_dir)
+    assert second != first and not first.exists()
+    assert list(dash.MANIFEST_INDEX_DIR.iterdir()) == [second]
+    # The index lives outside the audit folder
+    assert not any(p.suffix == ".sqlite3" for p in (audited / ".asi-omega").iterdir())
+
+
+def test_query_manifest_pages_in_manifest_order(dash, audited):
+    asi_dir = str(audited / ".asi-omega")
+    expected = [e["rel"] for e in manifest_entries(audited)]
+    pages = []
+    for offset in range(0, 49, 20):
+        total, entries = dash.query_manifest(asi_dir, offset=offset, limit=20)
+        assert total == 49
+        pages += [e["rel"] for e in entries]
+    assert pages == expected
+
+
+def test_query_manifest_filters_and_sorts(dash, audited):
+    asi_dir = str(audited / ".asi-omega")
+    entries = manifest_entries(audited)
+
+    total, page = dash.query_manifest(asi_dir, prefix="b/", limit=1000)
+    assert total == 42 and all(e["rel"].startswith("b/") for e in page)
+
+    total, page = dash.query_manifest(asi_dir, pattern="b/many00?.txt", limit=1000)
+    assert [e["rel"] for e in page] == [f"b/many00{i}.txt" for i in range(10)]
+
+    total, page = dash.query_manifest(asi_dir, prefix="b/", pattern="*3?.txt", limit=1000)
+    assert total == 10
+
+    _, page = dash.query_manifest(asi_dir, sort="rel", limit=1000)
+    assert [e["rel"] for e in page] == sorted(e["rel"] for e in entries)
+
+    _, page = dash.query_manifest(asi_dir, sort="-size", limit=3)
+    largest = sorted((int(e["size"]) for e in entries), reverse=True)[:3]
+    assert [e["size"] for e in page] == largest
+    _, page = dash.query_manifest(asi_dir, sort="size", limit=1)
+    assert page[0]["size"] == 0
+
+
+def test_api_manifest_page(client, audited):
+    asi_dir = str(audited / ".asi-omega")
+    body = client.get("/api/manifest", query_string={
+        "path": asi_dir, "prefix": "b/", "sort": "rel", "offset": 35, "limit": 10}).get_json()
+    assert (body["total"], body["offset"], body["limit"]) == (42, 35, 10)
+    assert [e["rel"] for e in body["entries"]] == \
+        [f"b/many{i:03d}.txt" for i in range(35, 40)] + ["b/x.dat", "b/y.dat"]
+    assert set(body["entries"][0]) == {"path", "rel", "sha256", "size"}
+
+
+def test_api_manifest_limits(client, dash, audited, monkeypatch):
+    asi_dir = str(audited / ".asi-omega")
+    monkeypatch.setattr(dash, "MANIFEST_MAX_PAGE_SIZE", 5)
+    body = client.get("/api/manifest", query_string={"path": asi_dir, "limit": 500}).get_json()
+    assert body["limit"] == 5 and len(body["entries"]) == 5
+    body = client.get("/api/manifest", query_string={"path": asi_dir, "offset": -3}).get_json()
+    assert body["offset"] == 0
+
+
+def test_api_manifest_ndjson_streams_all_matches(client, audited):
+    response = client.get("/api/manifest", query_string={
+        "path": str(audited / ".asi-omega"), "glob": "a/*", "format": "ndjson"})
+    assert response.mimetype == "application/x-ndjson"
+    streamed = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    expected = [e for e in manifest_entries(audited) if e["rel"].startswith("a/")]
+    assert [e["rel"] for e in streamed] == [e["rel"] for e in expected]
+    assert [e["sha256"] for e in streamed] == [e["sha256"] for e in expected]
+
+
+def test_api_manifest_bad_requests(client, audited, tree, tmp_path):
+    asi_dir = str(audited / ".asi-omega")
+    assert client.get("/api/manifest", query_string={
+        "path": asi_dir, "sort": "mtime"}).status_code == 400
+    assert client.get("/api/manifest", query_string={
+        "path": asi_dir, "limit": "ten"}).status_code == 400
+    for path in ("", str(tmp_path / "nope"), str(tmp_path)):
+        body = client.get("/api/manifest", query_string={"path": path}).get_json()
+        assert body["total"] == 0 and body["entries"] == []
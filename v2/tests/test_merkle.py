@@ -0,0 +1,148 @@
+"""Merkle engine, stored tree and MerkleTree edits against full rebuilds."""
+import hashlib
+import random
+
+import pytest
+
+import asi_omega
+
+
+def digest(i) -> str:
+    return hashlib.sha256(str(i).encode()).hexdigest()
+
+
+def reference_root(hashes: list[str]) -> str:
+    """Per-node hex definition, as before the binary engine."""
+    level = [asi_omega.merkle_leaf(h) for h in hashes]
+    while len(level) > 1:
+        parent = [asi_omega.merkle_node(level[i], level[i + 1])
+                  for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parent.append(level[-1])
+        level = parent
+    return level[0]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13, 64, 100])
+def test_binary_engine_matches_reference(size):
+    hashes = [digest(i) for i in range(size)]
+    assert asi_omega.build_merkle_tree(hashes) == reference_root(hashes)
+    levels = asi_omega.merkle_levels(iter(hashes))
+    assert [len(level) // asi_omega.DIGEST_SIZE for level in levels] == \
+        asi_omega.merkle_level_sizes(size)
+    assert bytes(levels[-1]).hex() == reference_root(hashes)
+
+
+def test_chunked_levels(monkeypatch):
+    monkeypatch.setattr(asi_omega, "_MERKLE_CHUNK", 3)
+    hashes = [digest(i) for i in range(23)]
+    assert asi_omega.build_merkle_tree(hashes) == reference_root(hashes)
+
+
+def test_empty_tree_rejected():
+    with pytest.raises(ValueError):
+        asi_omega.build_merkle_tree([])
+    with pytest.raises(ValueError):
+        asi_omega.merkle_levels([])
+
+
+def test_sidecar_roundtrip_and_paths(tmp_path):
+    hashes = [digest(i) for i in range(37)]
+    path = str(tmp_path / "tree.bin")
+    levels = asi_omega.merkle_levels(hashes)
+    asi_omega.write_merkle_tree(levels, path)
+    assert asi_omega.read_merkle_levels(path) == levels
+    root = asi_omega.build_merkle_tree(hashes)
+    for i in (0, 17, 35, 36):
+        tree_size, audit_path, stored = asi_omega.read_merkle_path(path, i)
+        assert (tree_size, stored) == (len(hashes), root)
+        assert audit_path == asi_omega.merkle_audit_path(levels, i)
+        assert asi_omega.merkle_root_from_path(hashes[i], i, tree_size, audit_path) == root
+    with pytest.raises(ValueError):
+        asi_omega.merkle_root_from_path(hashes[0], 0, len(hashes), audit_path)
+
+
+# ── MerkleTree edits ─────────────────────────────────
+
+def assert_rebuilt(tree: asi_omega.MerkleTree, hashes: list[str]):
+    full = asi_omega.MerkleTree.from_hashes(hashes)
+    assert tree.levels == full.levels
+    assert tree.root == asi_omega.build_merkle_tree(hashes)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 8, 13, 64, 100])
+def test_levels_match_build(size):
+    hashes = [digest(i) for i in range(size)]
+    assert_rebuilt(asi_omega.MerkleTree.from_hashes(hashes), hashes)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_edits_match_rebuild(seed):
+    rng = random.Random(seed)
+    hashes = [digest(i) for i in range(rng.randint(1, 40))]
+    tree = asi_omega.MerkleTree.from_hashes(hashes)
+    for step in range(200):
+        op = rng.choice(["update", "update_many", "insert", "delete", "append"])
+        value = digest(f"{seed}-{step}")
+        if op == "update":
+            i = rng.randrange(len(hashes))
+            hashes[i] = value
+            tree.update(i, value)
+        elif op == "update_many":
+            changes = {rng.randrange(len(hashes)): digest(f"{value}-{k}") for k in range(3)}
+            for i, h in changes.items():
+                hashes[i] = h
+            tree.update_many(changes)
+        elif op == "insert":
+            i = rng.randint(0, len(hashes))
+            hashes.insert(i, value)
+            tree.insert(i, value)
+        elif op == "delete" and len(hashes) > 1:
+            i = rng.randrange(len(hashes))
+            del hashes[i]
+            tree.delete(i)
+        elif op == "append":
+            hashes.append(value)
+            tree.append(value)
+        assert len(tree) == len(hashes)
+        assert_rebuilt(tree, hashes)
+
+
+def test_edit_errors():
+    tree = asi_omega.MerkleTree.from_hashes([digest(0)])
+    with pytest.raises(ValueError):
+        tree.delete(0)
+    with pytest.raises(IndexError):
+        tree.update(1, digest(1))
+    with pytest.raises(IndexError):
+        tree.insert(2, digest(1))
+    with pytest.raises(ValueError):
+        asi_omega.MerkleTree.from_hashes([])
+
+
+def test_save_load_roundtrip(tmp_path):
+    hashes = [digest(i) for i in range(37)]
+    path = str(tmp_path / "tree.bin")
+    asi_omega.MerkleTree.from_hashes(hashes).save(path)
+    loaded = asi_omega.MerkleTree.load(path)
+    assert_rebuilt(loaded, hashes)
+    for i in (0, 17, 36):
+        tree_size, audit_path, root = asi_omega.read_merkle_path(path, i)
+        assert (tree_size, root) == (len(hashes), loaded.root)
+        assert asi_omega.merkle_root_from_path(hashes[i], i, tree_size, audit_path) == root
+
+
+def test_incremental_audit_updates_stored_tree(tree, capsys):
+    asi_omega.audit(str(tree))
+    asi_omega.audit(str(tree), incremental=True)
+    (tree / "a" / "one.txt").write_bytes(b"edited in place")
+    (tree / "b" / "many005.txt").write_bytes(b"also edited")
+    capsys.readouterr()
+    result = asi_omega.audit(str(tree), incremental=True)
+    assert "blad(er) oppdatert i lagret tre" in capsys.readouterr().out
+    out = tree / ".asi-omega"
+    hashes = [e["sha256"] for e in asi_omega.iter_manifest(str(out / "manifest.csv"))]
+    stored = asi_omega.MerkleTree.load(str(out / asi_omega.MERKLE_TREE_NAME))
+    assert_rebuilt(stored, hashes)
+    assert (out / "merkle_root.txt").read_text().strip() == stored.root
+    assert result["merkle_root"] == stored.root
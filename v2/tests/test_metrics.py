@@ -0,0 +1,40 @@
+"""audit --profile: the metrics block recorded in dod.json."""
+import json
+import os
+
+import pytest
+
+import asi_omega
+
+
+def metrics(target):
+    return json.loads((target / ".asi-omega" / "dod.json").read_text())["metrics"]
+
+
+@pytest.mark.parametrize("backend, jobs, effective", [
+    ("serial", 8, 1), ("thread", 3, 3), ("thread", 1, 1), ("process", 2, 2), ("async", 6, 6),
+])
+def test_records_effective_jobs(tree, backend, jobs, effective):
+    asi_omega.audit(str(tree), jobs=jobs, backend=backend, profile=True)
+    m = metrics(tree)
+    assert (m["backend"], m["jobs"]) == (backend, effective)
+    assert {"scan", "merkle"} <= set(m["phases"])
+    assert m["phases"]["scan"]["files"] == 49
+
+
+def test_default_jobs_recorded(tree):
+    asi_omega.audit(str(tree), profile=True)
+    assert metrics(tree)["jobs"] == asi_omega.default_jobs()
+
+
+def test_shared_pool_size_recorded(tree):
+    with asi_omega.DeviceScheduler(5, per_device=2) as scheduler:
+        asi_omega.audit(str(tree), jobs=2, profile=True,
+                        executor=scheduler.for_device(os.stat(tree).st_dev))
+    assert metrics(tree)["jobs"] == 5
+
+
+def test_no_metrics_without_profile(tree):
+    asi_omega.audit(str(tree))
+    dod = json.loads((tree / ".asi-omega" / "dod.json").read_text())
+    assert "metrics" not in dod
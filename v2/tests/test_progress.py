@@ -0,0 +1,103 @@
+"""Progress events (--events jsonl) from audit, verify and verify --only."""
+import io
+import json
+
+import pytest
+
+import asi_omega
+from conftest import cli
+
+
+def names(events):
+    return [e["event"] for e in events]
+
+
+def test_reporter_throttles_progress(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(asi_omega.time, "monotonic", lambda: clock[0])
+    events = []
+    progress = asi_omega.ProgressReporter(events.append, "audit", interval=1.0)
+    progress.start("/x")
+    progress.phase("scan", total_files=10, total_bytes=1000)
+    for i in range(10):
+        clock[0] += 0.3
+        progress.advance(f"f{i}", 100)
+    progress.done(True)
+    ticks = [e for e in events if e["event"] == "progress"]
+    # At most one event per interval, plus the final one when the phase ends
+    assert [e["files"] for e in ticks] == [4, 8, 10]
+    assert ticks[0]["eta_seconds"] == pytest.approx(1.8)
+    assert ticks[-1]["eta_seconds"] == 0.0
+    assert names(events) == ["start", "phase", "progress", "progress", "progress", "done"]
+    assert all(e["command"] == "audit" for e in events)
+
+
+def test_reporter_without_callback_is_silent():
+    progress = asi_omega.ProgressReporter(None, "verify")
+    progress.start("/x")
+    progress.phase("hash", 1)
+    progress.advance("f", 1)
+    progress.failure("modified", "f")
+    progress.done(False)
+
+
+def test_audit_events(tree):
+    events = []
+    asi_omega.audit(str(tree), on_event=events.append)
+    assert events[0]["event"] == "start"
+    assert events[0]["version"] == asi_omega.EVENTS_VERSION
+    assert events[-1]["event"] == "done" and events[-1]["ok"] is True
+    phases = [e["phase"] for e in events if e["event"] == "phase"]
+    assert phases[0] == "scan"
+    finals = [e for e in events if e["event"] == "progress" and e["phase"] == "scan"]
+    assert finals[-1]["files"] == 49
+
+
+def test_verify_events(audited):
+    (audited / "top.txt").write_bytes(b"different size")
+    (audited / "extra.txt").write_bytes(b"x")
+    events = []
+    assert not asi_omega.verify(str(audited), on_event=events.append)
+    assert [e["phase"] for e in events if e["event"] == "phase"] == ["merkle", "metadata", "hash"]
+    assert [(e["event"], e["kind"], e["rel"]) for e in events
+            if e["event"] in ("failure", "warning")] == [
+        ("warning", "extra", "extra.txt"), ("failure", "resized", "top.txt")]
+    assert events[-1] == {**events[-1], "event": "done", "ok": False}
+
+
+def test_verify_subset_events(audited):
+    (audited / "b" / "x.dat").write_bytes(b"different size")
+    events = []
+    assert not asi_omega.verify_subset(str(audited), ["b"], on_event=events.append)
+    assert events[0]["event"] == "start"
+    assert [e["phase"] for e in events if e["event"] == "phase"] == ["merkle", "metadata", "hash"]
+    assert [(e["kind"], e["rel"]) for e in events if e["event"] == "failure"] == [
+        ("resized", "b/x.dat".replace("/", asi_omega.os.sep))]
+    assert events[-1]["event"] == "done" and events[-1]["ok"] is False
+
+
+def test_verify_subset_events_without_audit(tree):
+    events = []
+    assert not asi_omega.verify_subset(str(tree), ["b"], on_event=events.append)
+    assert names(events) == ["start", "failure", "done"]
+    assert events[1]["kind"] == "no_audit"
+
+
+def test_jsonl_writer():
+    stream = io.StringIO()
+    write = asi_omega.jsonl_event_writer(stream)
+    write({"event": "start", "target": "æøå"})
+    write({"event": "done", "ok": True})
+    assert [json.loads(line) for line in stream.getvalue().splitlines()] == [
+        {"event": "start", "target": "æøå"}, {"event": "done", "ok": True}]
+
+
+@pytest.mark.parametrize("extra", [[], ["--only", "a"]])
+def test_cli_events_out(audited, tmp_path, extra):
+    events_path = tmp_path / "events.jsonl"
+    result = cli("verify", audited, *extra, "--events", "jsonl", "--events-out", events_path)
+    assert result.returncode == 0, result.stdout
+    events = [json.loads(line) for line in events_path.read_text().splitlines()]
+    assert events[0]["event"] == "start" and events[-1] == {**events[-1], "event": "done",
+                                                            "ok": True}
+    assert result.stderr == ""
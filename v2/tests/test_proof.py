@@ -0,0 +1,73 @@
+"""prove and check-proof, in process and through the CLI."""
+import json
+
+import pytest
+
+import asi_omega
+from conftest import cli
+
+
+@pytest.fixture(params=[False, True], ids=["csv", "bin"])
+def proved(request, tree):
+    asi_omega.audit(str(tree), binary_manifest=request.param)
+    return tree
+
+
+def stored_root(target):
+    return (target / ".asi-omega" / "merkle_root.txt").read_text().strip()
+
+
+@pytest.mark.parametrize("rel", ["top.txt", "Zeta.bin", "a/deep/er/three.bin"])
+def test_prove_and_check(proved, rel):
+    proof = asi_omega.prove(str(proved), rel)
+    assert proof["merkle_root"] == stored_root(proved)
+    assert asi_omega.check_proof(proof, str(proved / rel), expected_root=stored_root(proved))
+    assert not asi_omega.check_proof(proof, expected_root="0" * 64)
+    (proved / rel).write_bytes(b"tampered")
+    assert not asi_omega.check_proof(proof, str(proved / rel))
+
+
+def test_prove_unknown_file(proved):
+    with pytest.raises(KeyError):
+        asi_omega.prove(str(proved), "nope.txt")
+
+
+@pytest.mark.parametrize("mangle", [
+    lambda p: p.pop("leaf_index"),
+    lambda p: p.update(audit_path=None),
+    lambda p: p.update(audit_path=["zz"]),
+    lambda p: p.update(sha256=7),
+    lambda p: p.update(tree_size="many"),
+])
+def test_malformed_proof_rejected(audited, mangle, capsys):
+    proof = asi_omega.prove(str(audited), "top.txt")
+    mangle(proof)
+    assert not asi_omega.check_proof(proof)
+    assert "FEIL: Ugyldig bevis" in capsys.readouterr().out
+    assert not asi_omega.check_proof([proof])
+
+
+def test_cli_roundtrip(audited, tmp_path):
+    out = tmp_path / "proof.json"
+    assert cli("prove", audited, "b/x.dat", "--out", out).returncode == 0
+    result = cli("check-proof", out, "--file", audited / "b" / "x.dat",
+                 "--root", stored_root(audited))
+    assert result.returncode == 0, result.stdout
+    assert "BEVIS GYLDIG" in result.stdout
+
+
+def test_cli_bad_inputs(audited, tmp_path):
+    out = tmp_path / "proof.json"
+    cli("prove", audited, "top.txt", "--out", out)
+    garbage = tmp_path / "garbage.json"
+    garbage.write_text("not json")
+    bad_path = tmp_path / "bad.json"
+    proof = json.loads(out.read_text())
+    proof["audit_path"] = 3
+    bad_path.write_text(json.dumps(proof))
+    for args in [(tmp_path / "missing.json",), (garbage,), (bad_path,),
+                 (out, "--file", tmp_path / "missing.txt")]:
+        result = cli("check-proof", *args)
+        assert result.returncode == 1
+        assert "FEIL:" in result.stdout
+        assert "Traceback" not in result.stderr
@@ -0,0 +1,180 @@
+"""Scanning: every backend, sort and cache path gives the serial result."""
+import json
+import os
+
+import pytest
+
+import asi_omega
+from conftest import manifest_bytes, rows
+
+
+@pytest.fixture
+def serial(tree):
+    return rows(asi_omega.scan_directory(str(tree), jobs=1, backend="serial"))
+
+
+@pytest.mark.parametrize("backend", asi_omega.HASH_BACKENDS)
+@pytest.mark.parametrize("jobs", [1, 4])
+def test_backends_match_serial(tree, serial, backend, jobs):
+    assert rows(asi_omega.scan_directory(str(tree), jobs=jobs, backend=backend)) == serial
+
+
+@pytest.mark.parametrize("backend", asi_omega.HASH_BACKENDS)
+def test_audit_manifest_identical_across_backends(tree, backend):
+    asi_omega.audit(str(tree), jobs=1, backend="serial")
+    reference = manifest_bytes(tree)
+    root = (tree / ".asi-omega" / "merkle_root.txt").read_text()
+    asi_omega.audit(str(tree), jobs=4, backend=backend)
+    assert manifest_bytes(tree) == reference
+    assert (tree / ".asi-omega" / "merkle_root.txt").read_text() == root
+
+
+@pytest.mark.parametrize("backend", asi_omega.HASH_BACKENDS)
+def test_completed_order_sorts_back(tree, serial, tmp_path, backend):
+    results = asi_omega.iter_scan_completed(str(tree), jobs=4, backend=backend)
+    # A tiny run size forces the external merge through several run files
+    sorted_rows = asi_omega.sort_scan_results(results, str(tmp_path), run_size=7)
+    assert rows(sorted_rows) == serial
+    assert not list(tmp_path.glob(".manifest-run-*"))
+
+
+def test_walk_order_matches_sort_key(tree):
+    rels = [rel for _, rel in asi_omega.walk_files(tree)]
+    assert rels == sorted(rels, key=asi_omega.walk_sort_key)
+
+
+def test_audit_streams_manifest_in_walk_order(tree, serial):
+    asi_omega.audit(str(tree))
+    written = rows(asi_omega.iter_manifest(str(tree / ".asi-omega" / "manifest.csv")))
+    assert written == serial
+
+
+def test_incremental_matches_full(tree):
+    asi_omega.audit(str(tree))
+    asi_omega.audit(str(tree), incremental=True)
+    (tree / "b" / "x.dat").write_bytes(b"changed")
+    (tree / "a" / "new.txt").write_bytes(b"new")
+    os.remove(tree / "b" / "y.dat")
+    asi_omega.audit(str(tree), incremental=True)
+    incremental = manifest_bytes(tree)
+    asi_omega.audit(str(tree))
+    assert manifest_bytes(tree) == incremental
+
+
+def test_stat_cache_reuses_digests(tree, tmp_path, monkeypatch):
+    cache = {}
+    first = rows(asi_omega.scan_directory(str(tree), stat_cache=cache))
+    assert len(cache) == len(first)
+    cache_path = str(tmp_path / "cache.json")
+    # Recorded well after every mtime, so no entry falls in the racy window
+    asi_omega.save_stat_cache(cache, cache_path,
+                              max(row[1] for row in cache.values()) + 2 * asi_omega.RACY_WINDOW_NS)
+    loaded = asi_omega.load_stat_cache(cache_path)
+    assert loaded == cache
+    monkeypatch.setattr(asi_omega, "sha256_file",
+                        lambda *a, **k: pytest.fail("cached file was rehashed"))
+    assert rows(asi_omega.scan_directory(str(tree), jobs=1, stat_cache=loaded)) == first
+
+
+def test_stat_cache_drops_racy_entries(tree, tmp_path):
+    cache = {}
+    asi_omega.scan_directory(str(tree), stat_cache=cache)
+    cache_path = str(tmp_path / "cache.json")
+    asi_omega.save_stat_cache(cache, cache_path, min(row[1] for row in cache.values()))
+    assert asi_omega.load_stat_cache(cache_path) == {}
+
+
+def test_cache_stats_count_only_hits(tree):
+    cache = {}
+    first = asi_omega.scan_directory(str(tree), stat_cache=cache)
+    stale = os.path.join("b", "x.dat")
+    cache[stale] = (0,) + tuple(cache[stale][1:])
+    stats = {}
+    for _ in asi_omega.iter_scan_completed(str(tree), stat_cache=cache, cache_stats=stats):
+        pass
+    assert stats == {"files": len(first) - 1,
+                     "bytes": sum(e["size"] for e in first if e["rel"] != stale)}
+
+
+def test_incremental_audit_reports_cache_hits(tree, capsys):
+    asi_omega.audit(str(tree), incremental=True)
+    capsys.readouterr()
+    # Every entry was just written, so all are racy and must be rehashed
+    asi_omega.audit(str(tree), incremental=True)
+    assert "0 gjenbrukt fra stat-cache" in capsys.readouterr().out
+    cache_path = tree / ".asi-omega" / asi_omega.STAT_CACHE_NAME
+    data = json.loads(cache_path.read_text())
+    data["scan_started_ns"] += 2 * asi_omega.RACY_WINDOW_NS
+    cache_path.write_text(json.dumps(data))
+    asi_omega.audit(str(tree), incremental=True)
+    count = len(data["entries"])
+    assert f"{count} gjenbrukt fra stat-cache, 0 hashet" in capsys.readouterr().out
+
+
+@pytest.mark.skipif(not hasattr(os, "link"), reason="no hardlinks")
+@pytest.mark.parametrize("backend", asi_omega.HASH_BACKENDS)
+def test_hardlinks_hashed_once(tmp_path, backend):
+    linked, copied = tmp_path / "linked", tmp_path / "copied"
+    for base in (linked, copied):
+        (base / "a").mkdir(parents=True)
+        (base / "b").mkdir()
+    for i in range(30):
+        data = f"content {i}\n".encode()
+        (linked / "a" / f"f{i}").write_bytes(data)
+        os.link(linked / "a" / f"f{i}", linked / "b" / f"f{i}")
+        (copied / "a" / f"f{i}").write_bytes(data)
+        (copied / "b" / f"f{i}").write_bytes(data)
+    stats = {}
+    results = asi_omega.iter_scan_completed(str(linked), jobs=4, backend=backend,
+                                            shared_stats=stats)
+    assert sorted(rows(e for _, e in results)) == \
+        sorted(rows(asi_omega.scan_directory(str(copied), jobs=1)))
+    assert stats["files"] == 30
+
+
+@pytest.mark.parametrize("backend", asi_omega.HASH_BACKENDS)
+def test_reflinks_complete_on_every_backend(tmp_path, monkeypatch, backend):
+    # Same bytes stand in for shared extents; same size alone must not match
+    def extent_map(filepath):
+        with open(filepath, "rb") as f:
+            data = f.read()
+        return ((0, hash(data), len(data)),)
+
+    monkeypatch.setattr(asi_omega, "_extent_map", extent_map)
+    for sub in ("a", "b", "c"):
+        (tmp_path / sub).mkdir()
+    for i in range(200):
+        data = f"{i:04d}".encode() * (i + 1)
+        (tmp_path / "a" / f"f{i}").write_bytes(data)
+        (tmp_path / "b" / f"f{i}").write_bytes(data)
+        (tmp_path / "c" / f"f{i}").write_bytes(bytes(b ^ 0xFF for b in data))
+    expected = sorted(rows(asi_omega.scan_directory(str(tmp_path), jobs=1)))
+    for _ in range(3):
+        stats = {}
+        results = asi_omega.iter_scan_completed(str(tmp_path), jobs=4, backend=backend,
+                                                reflinks=True, shared_stats=stats)
+        assert sorted(rows(e for _, e in results)) == expected
+        assert stats["files"] == 200
+
+
+@pytest.mark.parametrize("first_done", [True, False])
+def test_shared_content_either_order(tmp_path, monkeypatch, first_done):
+    # The first file of a size may finish hashing before or after the second
+    # one is claimed (the async backend walks ahead); both must resolve
+    monkeypatch.setattr(asi_omega, "_extent_map", lambda path: ((0, 1, 5),))
+    for name in ("a", "b"):
+        (tmp_path / name).write_bytes(b"12345")
+    shared = asi_omega._SharedContent(reflinks=True)
+    st = os.stat(tmp_path / "a")
+    assert shared.claim(str(tmp_path / "a"), "a", st) is None
+    done_a = {"path": str(tmp_path / "a"), "rel": "a", "sha256": "d" * 64, "size": 5}
+    ready = shared.resolve(done_a, True) if first_done else []
+    identity = shared.claim(str(tmp_path / "b"), "b", os.stat(tmp_path / "b"))
+    assert identity is not None
+    placeholder = {"path": str(tmp_path / "b"), "rel": "b", "sha256": None, "size": 5,
+                   "shared": identity}
+    ready += shared.resolve(placeholder, True)
+    if not first_done:
+        ready += shared.resolve(done_a, True)
+    assert sorted((e["rel"], e["sha256"]) for e in ready) == [("a", "d" * 64), ("b", "d" * 64)]
+    assert shared.held == {} and shared.owners == {}
@@ -0,0 +1,104 @@
+"""Sharded audits: verify, verify_subset, prove and partial re-audits."""
+import json
+import os
+
+import pytest
+
+import asi_omega
+from conftest import cli, manifest_bytes
+
+
+def dod(target):
+    return json.loads((target / ".asi-omega" / "dod.json").read_text(encoding="utf-8"))
+
+
+@pytest.fixture(params=["top", "7"])
+def sharded(request, tree):
+    asi_omega.audit(str(tree), shard=request.param)
+    return tree
+
+
+def test_sharding_keeps_manifest(tree, sharded):
+    stored = manifest_bytes(sharded)
+    asi_omega.audit(str(tree))
+    assert manifest_bytes(tree) == stored
+
+
+def test_shard_roots_combine_to_dod_root(sharded):
+    d = dod(sharded)
+    assert asi_omega.combine_shard_roots(d["shards"]) == d["merkle_root"]
+    rows = asi_omega.iter_manifest(str(sharded / ".asi-omega" / "manifest.csv"))
+    assert asi_omega.build_shards(rows, d["sharding"]) == d["shards"]
+
+
+def test_verify_detects_tampering(sharded):
+    assert asi_omega.verify(str(sharded))
+    victim = sharded / "a" / "deep" / "two.txt"
+    # Same size, so only the content tier can catch it
+    victim.write_bytes(bytes(b ^ 0xFF for b in victim.read_bytes()))
+    events = []
+    assert not asi_omega.verify(str(sharded), on_event=events.append)
+    failures = [(e["kind"], e["rel"]) for e in events if e["event"] == "failure"]
+    assert failures == [("modified", os.path.join("a", "deep", "two.txt"))]
+
+
+def test_verify_only_shards(tree):
+    asi_omega.audit(str(tree), shard="top")
+    (tree / "b" / "x.dat").write_bytes(b"tampered")
+    assert asi_omega.verify(str(tree), only_shards=["a"])
+    assert not asi_omega.verify(str(tree), only_shards=["b"])
+
+
+def test_verify_subset(sharded):
+    assert asi_omega.verify_subset(str(sharded), ["b"])
+    (sharded / "b" / "y.dat").write_bytes(b"tampered")
+    assert asi_omega.verify_subset(str(sharded), ["a", "top.txt"])
+    assert not asi_omega.verify_subset(str(sharded), [os.path.join("b", "*.dat")])
+
+
+def test_verify_subset_sharded_with_binary_manifest(tree):
+    asi_omega.audit(str(tree), shard="top", binary_manifest=True)
+    assert asi_omega.verify_subset(str(tree), ["top.txt", "a"])
+
+
+@pytest.mark.parametrize("rel", ["top.txt", os.path.join("a", "deep", "er", "three.bin"),
+                                 os.path.join("b", "many039.txt")])
+def test_prove_and_check(sharded, rel):
+    proof = asi_omega.prove(str(sharded), rel)
+    root = dod(sharded)["merkle_root"]
+    assert asi_omega.check_proof(proof, str(sharded / rel), expected_root=root)
+    (sharded / rel).write_bytes(b"tampered")
+    assert not asi_omega.check_proof(proof, str(sharded / rel), expected_root=root)
+
+
+def test_prove_unsharded(audited):
+    proof = asi_omega.prove(str(audited), "Zeta.bin")
+    root = (audited / ".asi-omega" / "merkle_root.txt").read_text().strip()
+    assert proof["merkle_root"] == root
+    assert asi_omega.check_proof(proof, str(audited / "Zeta.bin"), expected_root=root)
+    assert not asi_omega.check_proof(proof, expected_root="0" * 64)
+    with pytest.raises(KeyError):
+        asi_omega.prove(str(audited), "nope.txt")
+
+
+@pytest.mark.parametrize("shard, path", [(".", "top.txt"), ("b", os.path.join("b", "x.dat"))])
+def test_only_shards_matches_full_audit(tree, shard, path):
+    asi_omega.audit(str(tree), shard="top")
+    (tree / path).write_bytes(b"changed")
+    partial = asi_omega.audit(str(tree), shard="top", only_shards=[shard])
+    stored = manifest_bytes(tree)
+    full = asi_omega.audit(str(tree), shard="top")
+    assert partial["merkle_root"] == full["merkle_root"]
+    assert manifest_bytes(tree) == stored
+
+
+def test_only_shards_rejects_unknown(tree):
+    asi_omega.audit(str(tree), shard="top")
+    with pytest.raises(ValueError):
+        asi_omega.audit(str(tree), shard="top", only_shards=["nope"])
+
+
+def test_only_and_only_shard_rejected(sharded):
+    result = cli("verify", sharded, "--only", "a/*", "--only-shard", "a")
+    assert result.returncode == 1
+    assert "FEIL: --only og --only-shard" in result.stdout
@@ -0,0 +1,123 @@
+"""verify --only: subset verification tied to the stored root."""
+import os
+
+import pytest
+
+import asi_omega
+from conftest import cli
+
+
+def flip(path):
+    path.write_bytes(bytes(b ^ 0xFF for b in path.read_bytes()))
+
+
+@pytest.fixture(params=[False, True], ids=["csv", "bin"])
+def subset_audit(request, tree):
+    asi_omega.audit(str(tree), binary_manifest=request.param)
+    return tree
+
+
+def test_subset_passes_and_ignores_other_files(subset_audit):
+    flip(subset_audit / "b" / "x.dat")
+    assert asi_omega.verify_subset(str(subset_audit), ["a", "top.txt"])
+    assert asi_omega.verify_subset(str(subset_audit), [os.path.join("a", "deep", "*")])
+
+
+@pytest.mark.parametrize("pattern", ["b", os.path.join("b", "x.dat"), os.path.join("b", "*.dat")])
+def test_subset_detects_tampering(subset_audit, pattern):
+    flip(subset_audit / "b" / "x.dat")
+    assert not asi_omega.verify_subset(str(subset_audit), [pattern])
+
+
+def test_subset_missing_and_unmatched(subset_audit, capsys):
+    os.remove(subset_audit / "top.txt")
+    assert not asi_omega.verify_subset(str(subset_audit), ["top.txt"])
+    assert "FIL MANGLER: top.txt" in capsys.readouterr().out
+    assert not asi_omega.verify_subset(str(subset_audit), ["nope"])
+
+
+def test_subset_needs_audit(tree, capsys):
+    assert not asi_omega.verify_subset(str(tree), ["a"])
+    assert "Mangler filer" in capsys.readouterr().out
+
+
+def test_subset_reads_sidecar_once(audited, monkeypatch):
+    opened = []
+    real = asi_omega.MerkleTreeFile.__init__
+
+    def counting(self, tree_path):
+        opened.append(tree_path)
+        real(self, tree_path)
+
+    monkeypatch.setattr(asi_omega.MerkleTreeFile, "__init__", counting)
+    assert asi_omega.verify_subset(str(audited), ["b"])
+    assert len(opened) == 1
+
+
+def test_subset_rejects_foreign_sidecar(audited, tmp_path, capsys):
+    other = tmp_path / "other"
+    other.mkdir()
+    (other / "f").write_bytes(b"other")
+    asi_omega.audit(str(other))
+    tree_bin = asi_omega.MERKLE_TREE_NAME
+    (audited / ".asi-omega" / tree_bin).write_bytes((other / ".asi-omega" / tree_bin).read_bytes())
+    assert not asi_omega.verify_subset(str(audited), ["a"])
+    assert "Inklusjonsbevis feiler" in capsys.readouterr().out
+
+
+def test_subset_without_sidecar(audited):
+    os.remove(audited / ".asi-omega" / asi_omega.MERKLE_TREE_NAME)
+    assert asi_omega.verify_subset(str(audited), ["a"])
+    (audited / ".asi-omega" / "merkle_root.txt").write_text("0" * 64)
+    assert not asi_omega.verify_subset(str(audited), ["a"])
+
+
+@pytest.mark.parametrize("backend", asi_omega.HASH_BACKENDS)
+def test_subset_backends(audited, backend):
+    assert asi_omega.verify_subset(str(audited), ["b"], jobs=4, backend=backend)
+    flip(audited / "b" / "many020.txt")
+    assert not asi_omega.verify_subset(str(audited), ["b"], jobs=4, backend=backend)
+
+
+def test_subset_quick_checks_metadata_only(audited):
+    flip(audited / "a" / "one.txt")
+    assert asi_omega.verify_subset(str(audited), ["a"], quick=True)
+    (audited / "a" / "one.txt").write_bytes(b"new size")
+    assert not asi_omega.verify_subset(str(audited), ["a"], quick=True)
+
+
+def test_subset_check_mtime(tree, capsys):
+    asi_omega.audit(str(tree), incremental=True)
+    st = (tree / "top.txt").stat()
+    os.utime(tree / "top.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    capsys.readouterr()
+    assert asi_omega.verify_subset(str(tree), ["top.txt"], check_mtime=True)
+    assert "ENDRET TIDSSTEMPEL: top.txt" in capsys.readouterr().out
+    assert asi_omega.verify_subset(str(tree), ["top.txt"])
+    assert "TIDSSTEMPEL" not in capsys.readouterr().out
+
+
+def test_subset_follows_moved_folder(audited, tmp_path):
+    moved = tmp_path / "moved"
+    audited.rename(moved)
+    assert asi_omega.verify_subset(str(moved), ["a"])
+
+
+def test_subset_unreadable_file(audited, monkeypatch, capsys):
+    real = asi_omega.sha256_file
+
+    def flaky(filepath, hash_io=None):
+        if filepath.endswith("top.txt"):
+            raise PermissionError(13, "denied", filepath)
+        return real(filepath, hash_io)
+
+    monkeypatch.setattr(asi_omega, "sha256_file", flaky)
+    assert not asi_omega.verify_subset(str(audited), ["top.txt", "a"], backend="serial")
+    assert "ULESELIG: top.txt" in capsys.readouterr().out
+
+
+def test_cli_only_honours_flags(audited):
+    flip(audited / "a" / "one.txt")
+    assert cli("verify", audited, "--only", "a", "--quick").returncode == 0
+    assert cli("verify", audited, "--only", "a", "--jobs", "2", "--backend", "process"
+               ).returncode == 1
@@ -0,0 +1,148 @@
+"""verify: per-tier outcomes, vanished files and distributed workers."""
+import hashlib
+import os
+import queue
+import threading
+import urllib.error
+
+import pytest
+
+import asi_omega
+
+
+def failures(events):
+    return [(e["kind"], e["rel"]) for e in events if e["event"] == "failure"]
+
+
+def test_clean_tree_passes(audited):
+    assert asi_omega.verify(str(audited))
+    assert asi_omega.verify(str(audited), quick=True)
+
+
+def test_metadata_tier(audited):
+    os.remove(audited / "b" / "y.dat")
+    (audited / "top.txt").write_bytes(b"other size")
+    events = []
+    assert not asi_omega.verify(str(audited), quick=True, on_event=events.append)
+    assert sorted(failures(events)) == [("missing", os.path.join("b", "y.dat")),
+                                        ("resized", "top.txt")]
+
+
+def test_quick_skips_content(audited):
+    victim = audited / "a" / "one.txt"
+    victim.write_bytes(bytes(b ^ 0xFF for b in victim.read_bytes()))
+    assert asi_omega.verify(str(audited), quick=True)
+    assert not asi_omega.verify(str(audited))
+
+
+@pytest.mark.parametrize("backend", ["serial", "thread"])
+@pytest.mark.parametrize("error, kind", [(FileNotFoundError, "missing"),
+                                         (PermissionError, "unreadable")])
+def test_file_lost_after_metadata_tier(audited, monkeypatch, backend, error, kind):
+    victim = os.path.join("b", "many010.txt")
+    real = asi_omega.sha256_file
+
+    def flaky(filepath, hash_io=None):
+        if filepath.endswith(victim):
+            if error is FileNotFoundError:
+                os.remove(filepath)
+            raise error(2, "gone", filepath)
+        return real(filepath, hash_io)
+
+    monkeypatch.setattr(asi_omega, "sha256_file", flaky)
+    events = []
+    assert not asi_omega.verify(str(audited), jobs=4, backend=backend,
+                                on_event=events.append)
+    assert failures(events) == [(kind, victim)]
+
+
+@pytest.fixture
+def worker(audited):
+    servers = queue.Queue()
+    thread = threading.Thread(target=asi_omega.serve_worker, daemon=True,
+                              args=([str(audited)],),
+                              kwargs={"port": 0, "token": "s3cret", "ready": servers.put})
+    thread.start()
+    server = servers.get(timeout=10)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    thread.join(10)
+
+
+def test_distributed_verify(audited, worker):
+    assert asi_omega.verify(str(audited), workers=[worker], token="s3cret")
+    victim = audited / "a" / "one.txt"
+    victim.write_bytes(bytes(b ^ 0xFF for b in victim.read_bytes()))
+    events = []
+    assert not asi_omega.verify(str(audited), workers=[worker], token="s3cret",
+                                on_event=events.append)
+    assert failures(events) == [("modified", os.path.join("a", "one.txt"))]
+
+
+def test_worker_refuses_outside_roots(audited, worker, tmp_path):
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    (outside / "secret").write_bytes(b"x")
+    payload = {"target": str(outside), "rows": [["secret", "0" * 64, 1]]}
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        asi_omega._post_json(worker + "/v1/hash", payload, token="s3cret")
+    assert exc.value.code == 403
+    # A sibling that shares the root's name as a prefix is outside too
+    sibling = str(audited) + "-evil"
+    os.mkdir(sibling)
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        asi_omega._post_json(worker + "/v1/hash", dict(payload, target=sibling), token="s3cret")
+    assert exc.value.code == 403
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        asi_omega._post_json(worker + "/v1/hash", dict(payload, target=str(audited)))
+    assert exc.value.code == 403
+
+
+def test_map_target_on_path_boundary():
+    path_map = ("/mnt/data", "/srv/data")
+    assert asi_omega._map_target("/mnt/data/x", path_map) == "/srv/data/x"
+    assert asi_omega._map_target("/mnt/data", path_map) == "/srv/data"
+    assert asi_omega._map_target("/mnt/database", path_map) == "/mnt/database"
+
+
+def post_error(url, payload, token="s3cret") -> int:
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        asi_omega._post_json(url + "/v1/hash", payload, token=token)
+    return exc.value.code
+
+
+def test_worker_rejects_malformed_rows(audited, worker):
+    target = str(audited)
+    for rows in ([["a/one.txt", "0" * 64]], [None], [[1, "0" * 64, 1]],
+                 [["a/one.txt", "0" * 64, "big"]], [["../x", "0" * 64, 1]], "rows", 7):
+        assert post_error(worker, {"target": target, "rows": rows}) == 400
+    assert post_error(worker, {"target": 7, "rows": []}) == 400
+    assert post_error(worker, ["not", "an", "object"]) == 400
+    # The worker still serves well-formed requests afterwards
+    assert asi_omega._post_json(worker + "/v1/hash", {"target": target, "rows": []},
+                                token="s3cret")["ok"] == 0
+
+
+def test_worker_accepts_either_separator(audited, worker):
+    data = (audited / "a" / "deep" / "two.txt").read_bytes()
+    sha = hashlib.sha256(data).hexdigest()
+    reply = asi_omega._post_json(worker + "/v1/hash", {"target": str(audited), "rows": [
+        ["a\\deep\\two.txt", sha, len(data)], ["a/deep/two.txt", sha, len(data)]]},
+        token="s3cret")
+    assert reply == {"ok": 2, "bytes": 2 * len(data), "mismatches": []}
+
+
+def test_distributed_verify_subset(audited, worker, capsys):
+    assert asi_omega.verify_subset(str(audited), ["a"], workers=[worker], token="s3cret")
+    assert "fordelt paa 1 arbeider(e)" in capsys.readouterr().out
+    victim = audited / "a" / "one.txt"
+    victim.write_bytes(bytes(b ^ 0xFF for b in victim.read_bytes()))
+    events = []
+    assert not asi_omega.verify_subset(str(audited), ["a"], workers=[worker],
+                                       token="s3cret", on_event=events.append)
+    assert failures(events) == [("modified", os.path.join("a", "one.txt"))]
+
+
+def test_verify_subset_falls_back_when_workers_fail(audited, worker, capsys):
+    assert asi_omega.verify_subset(str(audited), ["b/*"], workers=[worker], token="wrong")
+    assert f"ADVARSEL: Arbeider {worker} feilet" in capsys.readouterr().out
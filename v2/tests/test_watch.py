@@ -0,0 +1,107 @@
+"""watch: state transitions reported while an audited folder changes."""
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+import asi_omega
+
+MODES = [True] + ([False] if sys.platform.startswith("linux") else [])
+
+
+class Watcher:
+    """Runs watch() in a thread and collects its progress events."""
+
+    def __init__(self, target, poll):
+        self.events = []
+        self.stop = threading.Event()
+        self.result = None
+        self.thread = threading.Thread(target=self._run, args=(target, poll), daemon=True)
+        self.thread.start()
+        self.wait_for("start")
+
+    def _run(self, target, poll):
+        self.result = asi_omega.watch(str(target), poll=poll, interval=0.05,
+                                      stop=self.stop, on_event=self.events.append)
+
+    def seen(self):
+        return [(e["event"], e.get("kind"), e.get("rel"))
+                for e in list(self.events) if e["event"] in ("failure", "warning", "resolved")]
+
+    def wait_for(self, event, kind=None, rel=None, timeout=10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            for e in list(self.events):
+                if (e["event"], e.get("kind", kind), e.get("rel", rel)) == (event, kind, rel):
+                    return
+            time.sleep(0.02)
+        pytest.fail(f"no {event} {kind} {rel} event; saw {self.seen()}")
+
+    def finish(self):
+        self.stop.set()
+        self.thread.join(10)
+        assert not self.thread.is_alive()
+        return self.result
+
+
+@pytest.fixture(autouse=True)
+def fast_settle(monkeypatch):
+    monkeypatch.setattr(asi_omega, "WATCH_SETTLE", 0.05)
+
+
+@pytest.fixture
+def audited(tree):
+    # With a stat cache the startup pass also sees edits made before watching began
+    asi_omega.audit(str(tree), incremental=True)
+    return tree
+
+
+def rewrite(path):
+    """Change content but not size, and move mtime so polling notices."""
+    data = path.read_bytes()
+    path.write_bytes(bytes(b ^ 0xFF for b in data))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    return data
+
+
+@pytest.mark.parametrize("poll", MODES)
+def test_transitions(audited, poll):
+    one = audited / "a" / "one.txt"
+    rel_one = os.path.join("a", "one.txt")
+    rel_gone = os.path.join("b", "x.dat")
+    rel_new = os.path.join("b", "fresh.txt")
+    w = Watcher(audited, poll)
+
+    original = rewrite(one)
+    w.wait_for("failure", "modified", rel_one)
+    os.remove(audited / rel_gone)
+    w.wait_for("failure", "missing", rel_gone)
+    (audited / rel_new).write_bytes(b"new")
+    w.wait_for("warning", "extra", rel_new)
+
+    one.write_bytes(original)
+    w.wait_for("resolved", "modified", rel_one)
+    os.remove(audited / rel_new)
+    w.wait_for("resolved", "extra", rel_new)
+
+    assert w.finish() is False  # b/x.dat is still missing
+    # Every transition is reported exactly once
+    assert w.seen() == [("failure", "modified", rel_one), ("failure", "missing", rel_gone),
+                        ("warning", "extra", rel_new), ("resolved", "modified", rel_one),
+                        ("resolved", "extra", rel_new)]
+
+
+def test_clean_stop(audited):
+    w = Watcher(audited, poll=True)
+    time.sleep(0.2)
+    assert w.finish() is True
+    assert w.seen() == []
+
+
+def test_refuses_mismatched_root(audited, capsys):
+    (audited / ".asi-omega" / "merkle_root.txt").write_text("0" * 64)
+    assert asi_omega.watch(str(audited), poll=True, stop=threading.Event()) is False
+    assert "OVERVAKING IKKE STARTET" in capsys.readouterr().out